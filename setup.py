@@ -35,5 +35,6 @@ setup(
         'human readable, JSON, INI',
         package_dir={'': 'src'},
         packages=find_packages(where='src'),
-        install_requires=['argparse', 'pandas', 'os', 'json', 'colorama'],
+        install_requires=['argparse', 'pandas', 'numpy', 'os', 'json',
+                          'colorama'],
     )
@@ -0,0 +1,33 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""In-memory cache of parsed configurations."""
+
+import os
+import functions as fn
+
+
+class Parse_cache(object):
+    """Define cache of parsed configurations invalidated by mtime and size."""
+
+    def __init__(self):
+        # Map (real path, settings) to tuple (mtime_ns, size, configuration)
+        self.entries = {}
+
+    def get(self, file_path, comment_char='#', section_marker='[]',
+            assignment_char='='):
+        """Return cached configuration, re-parsing changed files."""
+        real_path = os.path.realpath(file_path)
+        settings = (comment_char, section_marker, assignment_char)
+        stat = os.stat(real_path)
+        key = (real_path, settings)
+        entry = self.entries.get(key)
+        if (entry is not None and entry[0] == stat.st_mtime_ns and
+                entry[1] == stat.st_size):
+            return entry[2]
+        cfg = fn.load_configuration(file_path, *settings)
+        self.entries[key] = (stat.st_mtime_ns, stat.st_size, cfg)
+        return cfg
+
+    def clear(self):
+        """Remove all cached configurations."""
+        self.entries.clear()
@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Canonical form and content fingerprints of configurations.
+
+The canonical form merges repeated sections (last value of a repeated key
+wins), sorts sections and keys by name and writes them with formatted()
+spacing, without empty lines inside sections. Comments are dropped unless
+kept; kept comments (and unknown lines) stay with the section head or key
+they precede.
+
+Fingerprints hash the same content while the file is parsed, keeping one
+small digest per key instead of normalised text: two configurations have
+the same fingerprint if their canonical forms are equal.
+"""
+
+import hashlib
+import json
+import functions as fn
+import formats
+
+
+# Bytes of hexadecimal digests (32 hex digits)
+DIGEST_SIZE = 16
+
+
+def iter_items(records, comments=False):
+    """Yield tuples (section, key, value, notes) in file order.
+
+    key is None for section heads. Pairs before the first section head
+    are in section '', as top-level JSON values are. Records are tuples
+    (line type, content); notes are the comment and unknown lines
+    preceding the item as (line type, content) records. Notes at the end
+    of the file are yielded with section and key None.
+    """
+    notes = []
+    section = ''
+    for line_type, content in records:
+        if line_type == 'section_head':
+            section = content
+            yield (section, None, None, notes)
+            notes = []
+        elif line_type == 'key_value_pair':
+            yield (section, content[0], content[1], notes)
+            notes = []
+        elif line_type == 'unknown' or (line_type == 'comment' and
+                                        comments is True):
+            notes.append((line_type, content))
+    if notes:
+        yield (None, None, None, notes)
+
+
+def canonical_records(records, comments=False):
+    """Return tuple (types, content) of canonical form of records."""
+    # Map section name to [head notes, {key: (value, notes)}]
+    sections = {}
+    end_notes = []
+    for section, key, value, notes in iter_items(records, comments):
+        if section is None and key is None:
+            end_notes = notes
+            continue
+        entry = sections.setdefault(section, [[], {}])
+        if key is None:
+            entry[0] += notes
+        else:
+            entry[1][key] = (value, notes)
+    types = []
+    content = []
+
+    def add(line_type, line_content):
+        types.append(line_type)
+        content.append(line_content)
+
+    for name in sorted(sections):
+        head_notes, keys = sections[name]
+        if types:
+            add('empty', '')
+        for note in head_notes:
+            add(*note)
+        # Section '' (sorted first) is written without head
+        if name != '':
+            add('section_head', name)
+        for key in sorted(keys):
+            value, notes = keys[key]
+            for note in notes:
+                add(*note)
+            add('key_value_pair', (key, value))
+            for record in fn.iter_continuations(value):
+                add(*record)
+    for note in end_notes:
+        add(*note)
+    return types, content
+
+
+def canonical_lines(records, comments=False, comment_char='#',
+                    section_marker='[]', assignment_char='='):
+    """Return list of canonical config-file lines of records."""
+    types, content = canonical_records(records, comments)
+    return fn.formatted(types, content, False, False, False, comment_char,
+                        section_marker, assignment_char)
+
+
+def item_digest(key, value, notes):
+    """Return digest of key-value pair (or section head) with its notes."""
+    h = hashlib.blake2b(digest_size=DIGEST_SIZE)
+    h.update(json.dumps([key, fn.value_str(value), notes]).encode('utf-8'))
+    return h.digest()
+
+
+class Fingerprint(object):
+    """Define whole-file digest and per-section digests (hexadecimal)."""
+
+    def __init__(self, digest, sections):
+        self.digest = digest
+        # Map section name ('' for pairs before any section) to digest
+        self.sections = sections
+
+    def __eq__(self, other):
+        return (isinstance(other, Fingerprint) and
+                self.digest == other.digest)
+
+    def __hash__(self):
+        return hash(self.digest)
+
+
+def fingerprint_records(records, comments=False):
+    """Return Fingerprint of records (line type, content) in one pass."""
+    # Map section name to [head notes, {key: digest}]
+    sections = {}
+    end_notes = []
+    for section, key, value, notes in iter_items(records, comments):
+        if section is None and key is None:
+            end_notes = notes
+            continue
+        entry = sections.setdefault(section, [[], {}])
+        if key is None:
+            # Notes of repeated heads are concatenated
+            entry[0] += notes
+        else:
+            entry[1][key] = item_digest(key, value, notes)
+    section_digests = {}
+    whole = hashlib.blake2b(digest_size=DIGEST_SIZE)
+    for name in sorted(sections):
+        head_notes, digests = sections[name]
+        h = hashlib.blake2b(digest_size=DIGEST_SIZE)
+        h.update(item_digest(None, None, head_notes))
+        for key in sorted(digests):
+            h.update(digests[key])
+        section_digests[name] = h.hexdigest()
+        whole.update(json.dumps([name, section_digests[name]])
+                     .encode('utf-8'))
+    whole.update(json.dumps(end_notes).encode('utf-8'))
+    return Fingerprint(whole.hexdigest(), section_digests)
+
+
+def fingerprint_file(file_path, comments=False, comment_char='#',
+                     section_marker='[]', assignment_char='='):
+    """Return Fingerprint of INI or JSON file (INI lines streamed)."""
+    config_file = fn.Config_file(file_path, verbose=False)
+    if config_file.format == 'unknown':
+        raise ValueError('Unknown file format: \'{}\''.format(file_path))
+    records = formats.backend(config_file.format).parse_stream(
+        config_file, None, comment_char, section_marker, assignment_char)
+    return fingerprint_records(((line_type, content) for line, line_type,
+                                content in records), comments)
+
+
+def group_files(file_paths, comments=False, comment_char='#',
+                section_marker='[]', assignment_char='=', errors=None):
+    """Return dict mapping whole-file digest to list of file paths.
+
+    Files that cannot be parsed are skipped and, if errors is a list,
+    appended to it as tuples (path, message).
+    """
+    groups = {}
+    for file_path in file_paths:
+        try:
+            fingerprint = fingerprint_file(file_path, comments, comment_char,
+                                           section_marker, assignment_char)
+        except (ValueError, OSError) as e:
+            if errors is not None:
+                errors.append((file_path, str(e)))
+            continue
+        groups.setdefault(fingerprint.digest, []).append(file_path)
+    return groups
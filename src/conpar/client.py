@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Thin client for a running conpar server.
+
+Takes the same arguments as conpar, e.g. 'client.py read -j config.ini',
+or 'client.py get <infile> <section> <key>' for a single value (protocol
+command 'query').
+"""
+
+import json
+import os
+import socket
+import stat
+import sys
+import defaults as dflt
+
+
+def private_directory(directory, create=False):
+    """Check that directory is owned by the user and closed to others.
+
+    Optionally create it with mode 0700 first.
+    """
+    if create is True:
+        try:
+            os.mkdir(directory, 0o700)
+        except FileExistsError:
+            pass
+    info = os.lstat(directory)
+    if (not stat.S_ISDIR(info.st_mode) or info.st_uid != os.getuid() or
+            info.st_mode & 0o077):
+        raise PermissionError('Socket directory \'{}\' must be a directory '
+                              'of the user with mode 0700'.format(directory))
+
+
+def send_request(request, path=None):
+    """Send single request to conpar server and return response dict."""
+    if path is None:
+        path = dflt.socket_path()
+    if os.path.dirname(path) == dflt.socket_directory():
+        # Do not talk to a server in a directory set up by another user
+        private_directory(os.path.dirname(path))
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.connect(path)
+        sock.sendall(json.dumps(request).encode('utf-8') + b'\n')
+        with sock.makefile('rb') as f:
+            return json.loads(f.readline())
+
+
+def main():
+    """Forward command-line arguments to conpar server."""
+    argv = sys.argv[1:]
+    if argv[:1] == ['get']:
+        if len(argv) != 4:
+            sys.exit('usage: client.py get <infile> <section> <key>')
+        request = {'command': 'query', 'infile': argv[1],
+                   'section': argv[2], 'key': argv[3], 'cwd': os.getcwd()}
+    else:
+        request = {'command': 'cli', 'argv': argv, 'cwd': os.getcwd()}
+    try:
+        response = send_request(request)
+    except OSError as e:
+        sys.exit('[error] {}'.format(e))
+    sys.stdout.write(response.get('output', ''))
+    error = response.get('error', '')
+    if error:
+        # Captured output of the command line may end with a newline
+        print(error.rstrip('\n'), file=sys.stderr)
+    sys.exit(response['status'])
+
+
+if __name__ == '__main__':
+    main()
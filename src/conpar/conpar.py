@@ -4,9 +4,26 @@
 
 # Import modules
 import argparse
+import contextlib
 import os
+import sys
 import functions as fn
+import canonical
 import defaults as dflt
+import diff
+import encoding as enc
+import merge
+import include
+import server
+import typed
+import interpolate
+import validate
+import index
+import export
+import formats
+import lineindex
+import spill
+import streams
 
 
 # Define version string
@@ -15,7 +32,7 @@ version_dat = '2022-03-14'
 version_str = '{} ({})'.format(version_num, version_dat)
 
 
-def main():
+def build_parser():
     """Define argument parsers and subparsers."""
     # Top-level parser
     parser = argparse.ArgumentParser(description='A parser for configuration '
@@ -32,7 +49,8 @@ def main():
     parent_parser = argparse.ArgumentParser(add_help=False)
 
     # Common options for all subparsers based on parent parser
-    parent_parser.add_argument('infile', help='name of configuration file')
+    parent_parser.add_argument('infile', help='name of configuration file '
+                               '(\'-\' = standard input)')
     parent_parser.add_argument('-v', '--verbose', action='count', default=0,
                                help='verbosity level (-v, -vv)')
     parent_parser.add_argument('-q', '--quiet', action='store_true',
@@ -60,10 +78,15 @@ def main():
                                '(default: \'=\')')
 
     # Subparser read
+    # Only merge resolves include directives
+    include_note = ('\'{} = FILE\' directives are not resolved (they are '
+                    'keys of section \'\'); use \'merge -n\' to resolve '
+                    'them.'.format(include.INCLUDE_KEY))
     read_parser = subparsers.add_parser('read',
                                         aliases=['rea', 're', 'r', 'rd'],
                                         parents=[parent_parser],
                                         description='read config file',
+                                        epilog=include_note,
                                         add_help=True)
 
     read_parser.add_argument('-r', '--raw', action='store_true',
@@ -78,6 +101,32 @@ def main():
                              help='show INI representation of config file')
     read_parser.add_argument('-A', '--all', action='store_true',
                              help='combines optional arguments -rpj')
+    read_parser.add_argument('-l', '--lines',
+                             help='restrict to line range START:STOP '
+                             '(1-based, inclusive, e.g. 1000:2000; INI '
+                             'files only)')
+    read_parser.add_argument('--in-section', dest='in_section',
+                             help='restrict to lines of section IN_SECTION '
+                             '(INI files only)')
+    read_parser.add_argument('-T', '--typed', action='store_true',
+                             help='convert values in JSON representation '
+                             'to inferred types (int, float, bool, '
+                             'duration, list)')
+    read_parser.add_argument('-U', '--duplicates',
+                             choices=fn.DUPLICATE_POLICIES,
+                             help='report duplicate sections and keys; '
+                             'keep first or last value, collect values '
+                             'in a list, or stop with an error')
+    read_parser.add_argument('-I', '--interpolate', action='store_true',
+                             help='resolve ${section:key}, ${key} and '
+                             '${ENV} references in JSON representation')
+    read_parser.add_argument('-S', '--stats', action='store_true',
+                             help='show line-type statistics of config file')
+    read_parser.add_argument('-M', '--max-memory', dest='max_memory',
+                             type=spill.parse_size, metavar='SIZE',
+                             help='keep line records within about SIZE '
+                             'bytes (e.g. 512M); further records are '
+                             'spilled to a temporary file')
 
     # Subparser convert
     convert_parser = subparsers.add_parser('convert',
@@ -85,16 +134,264 @@ def main():
                                                     'con', 'co', 'c'],
                                            parents=[parent_parser],
                                            description='convert config file',
+                                           epilog=include_note,
                                            add_help=True)
-    convert_parser.add_argument('outfile', help='name of output file')
+    convert_parser.add_argument('outfile', help='name of output file '
+                                '(\'-\' = standard output)')
     convert_parser.add_argument('-j', '--json',
                                 action='store_true',
                                 help='convert to JSON file')
     convert_parser.add_argument('-i', '--ini',
                                 action='store_true',
                                 help='convert to INI file')
+    convert_parser.add_argument('-N', '--nested', action='store_true',
+                                help='write dotted section names '
+                                '([a.b.c]) as nested JSON objects')
+    convert_parser.add_argument('-U', '--duplicates',
+                                choices=fn.DUPLICATE_POLICIES,
+                                help='report duplicate sections and keys; '
+                                'keep first or last value, collect values '
+                                'in a list, or stop with an error (without '
+                                'it, INI converted to JSON on stdout is '
+                                'streamed and stops at a duplicate)')
+    convert_parser.add_argument('-I', '--interpolate', action='store_true',
+                                help='resolve ${section:key}, ${key} and '
+                                '${ENV} references')
+    convert_parser.add_argument('-K', '--canonical', action='store_true',
+                                help='convert to canonical INI file '
+                                '(sorted sections and keys, merged '
+                                'duplicates, no comments)')
+    convert_parser.add_argument('-C', '--comments', action='store_true',
+                                help='keep comments in canonical INI file')
+    convert_parser.add_argument('-M', '--max-memory', dest='max_memory',
+                                type=spill.parse_size, metavar='SIZE',
+                                help='keep line records within about SIZE '
+                                'bytes (e.g. 512M); further records are '
+                                'spilled to a temporary file')
+
+    # Subparser diff
+    diff_parser = subparsers.add_parser('diff',
+                                        aliases=['dif', 'di', 'd'],
+                                        parents=[parent_parser],
+                                        description='compare two config '
+                                        'files (INI or JSON) section by '
+                                        'section',
+                                        add_help=True)
+    diff_parser.add_argument('otherfile',
+                             help='name of configuration file to compare '
+                             'with')
+
+    # Subparser merge
+    merge_parser = subparsers.add_parser('merge',
+                                         aliases=['merg', 'mer', 'me', 'm'],
+                                         parents=[parent_parser],
+                                         description='merge stacked config '
+                                         'files (base first, highest '
+                                         'priority last)',
+                                         add_help=True)
+    merge_parser.add_argument('overlays', nargs='*',
+                              help='names of overlay configuration files')
+    merge_parser.add_argument('-n', '--includes', action='store_true',
+                              help='resolve \'{} = FILE\' directives of '
+                              'each file'.format(include.INCLUDE_KEY))
+    merge_parser.add_argument('-P', '--provenance', action='store_true',
+                              help='show file and line of each effective '
+                              'value')
+
+    # Subparser validate
+    validate_parser = subparsers.add_parser('validate',
+                                            aliases=['valid', 'val', 'va',
+                                                     'v'],
+                                            parents=[parent_parser],
+                                            description='validate config '
+                                            'file against JSON schema',
+                                            add_help=True)
+    validate_parser.add_argument('schema', help='name of JSON schema file')
+    validate_parser.add_argument('-f', '--fail-fast', dest='fail_fast',
+                                 action='store_true',
+                                 help='stop at first violation')
+
+    # Subparser index
+    index_parser = subparsers.add_parser('index',
+                                         aliases=['ind', 'in'],
+                                         description='build or update '
+                                         'persistent index of a directory '
+                                         'tree of config files',
+                                         add_help=True)
+    index_parser.add_argument('directory', help='directory to be indexed')
+    index_parser.add_argument('--index-file', dest='index_file',
+                              help='name of index file (default: '
+                              'DIRECTORY/{})'.format(index.INDEX_FILE))
+    for option, dest, default, text in (
+            ('-c', 'comment_char', '#', 'comment character'),
+            ('-s', 'section_marker', '[]', 'section marker(s)'),
+            ('-a', 'assignment_char', '=', 'assignment character')):
+        index_parser.add_argument(option, dest=dest, default=default,
+                                  help='define {} (default: \'{}\')'
+                                  .format(text, default))
+
+    # Subparser query
+    query_parser = subparsers.add_parser('query',
+                                         aliases=['que', 'qu', 'q'],
+                                         description='query index of a '
+                                         'directory tree of config files',
+                                         add_help=True)
+    query_parser.add_argument('directory', help='indexed directory')
+    query_parser.add_argument('key', help='key name')
+    query_parser.add_argument('--index-file', dest='index_file',
+                              help='name of index file (default: '
+                              'DIRECTORY/{})'.format(index.INDEX_FILE))
+    query_parser.add_argument('-S', '--in-section', dest='in_section',
+                              help='restrict to section name')
+    query_parser.add_argument('--eq', help='value equal to')
+    query_parser.add_argument('--gt', type=float,
+                              help='numeric value greater than')
+    query_parser.add_argument('--lt', type=float,
+                              help='numeric value less than')
+    query_parser.add_argument('--match', help='value matches regex')
+
+    # Subparser export
+    export_parser = subparsers.add_parser('export',
+                                          aliases=['exp', 'ex'],
+                                          description='export line records '
+                                          '(file, line, type, section, key, '
+                                          'value) of many config files',
+                                          add_help=True)
+    export_parser.add_argument('outfile', help='name of output file '
+                               '(\'-\' = standard output)')
+    export_parser.add_argument('paths', nargs='+',
+                               help='config files or directories')
+    export_parser.add_argument('-f', '--format', choices=export.FORMATS,
+                               help='output format (default: by extension '
+                               'of OUTFILE, else csv)')
+    for option, dest, default, text in (
+            ('-c', 'comment_char', '#', 'comment character'),
+            ('-s', 'section_marker', '[]', 'section marker(s)'),
+            ('-a', 'assignment_char', '=', 'assignment character')):
+        export_parser.add_argument(option, dest=dest, default=default,
+                                   help='define {} (default: \'{}\')'
+                                   .format(text, default))
+
+    # Subparser fingerprint
+    fingerprint_parser = subparsers.add_parser('fingerprint',
+                                               aliases=['finger', 'fp'],
+                                               description='print content '
+                                               'hashes of config files '
+                                               '(equal for equal canonical '
+                                               'form)',
+                                               add_help=True)
+    fingerprint_parser.add_argument('paths', nargs='+',
+                                    help='config files or directories')
+    fingerprint_parser.add_argument('-g', '--group', action='store_true',
+                                    help='list groups of files with equal '
+                                    'content')
+    fingerprint_parser.add_argument('-S', '--sections', action='store_true',
+                                    help='also print hash of each section')
+    fingerprint_parser.add_argument('-C', '--comments', action='store_true',
+                                    help='include comments in hashes')
+    for option, dest, default, text in (
+            ('-c', 'comment_char', '#', 'comment character'),
+            ('-s', 'section_marker', '[]', 'section marker(s)'),
+            ('-a', 'assignment_char', '=', 'assignment character')):
+        fingerprint_parser.add_argument(option, dest=dest, default=default,
+                                        help='define {} (default: \'{}\')'
+                                        .format(text, default))
+
+    # Subparser serve
+    serve_parser = subparsers.add_parser('serve',
+                                         description='serve read/convert '
+                                         'requests on a local Unix socket '
+                                         'with a warm parse cache',
+                                         add_help=True)
+    serve_parser.add_argument('--socket', default=dflt.socket_path(),
+                              help='path of Unix socket (default: '
+                              '$CONPAR_SOCKET, else conpar.sock in '
+                              '$XDG_RUNTIME_DIR or in a private directory '
+                              '<tmp>/conpar-<uid>)')
+
+    return parser
 
-    args = parser.parse_args()
+
+def run(args, cache=None):
+    """Execute subcommand, optionally using a parse cache."""
+    if getattr(args, 'outfile', None) == '-':
+        # Converted data goes to stdout, all messages to stderr
+        stdout = sys.stdout
+        with contextlib.redirect_stdout(sys.stderr):
+            run_command(args, cache, stdout)
+    else:
+        run_command(args, cache, sys.stdout)
+
+
+def run_command(args, cache, stdout):
+    """Execute subcommand; converted data for outfile '-' goes to stdout."""
+    # Define command aliases
+    aliases_index = ('index', 'ind', 'in')
+    aliases_query = ('query', 'que', 'qu', 'q')
+    aliases_export = ('export', 'exp', 'ex')
+    aliases_fingerprint = ('fingerprint', 'finger', 'fp')
+
+    if args.command in aliases_index:
+        with index.Config_index(args.directory, args.index_file) as idx:
+            indexed, removed = idx.update(args.comment_char,
+                                          args.section_marker,
+                                          args.assignment_char)
+        print('[index] Indexed {} new or changed files, removed {} files.'
+              .format(indexed, removed))
+        return
+
+    if args.command in aliases_query:
+        with index.Config_index(args.directory, args.index_file) as idx:
+            rows = idx.query(args.key, args.in_section, args.eq, args.gt,
+                             args.lt, args.match)
+        fn.printlist(index.format_results(rows))
+        return
+
+    if args.command in aliases_export:
+        export_format = args.format
+        if export_format is None:
+            export_format = export.format_of(args.outfile) or 'csv'
+        errors = []
+        records = export.iter_records(export.expand_paths(args.paths),
+                                      args.comment_char, args.section_marker,
+                                      args.assignment_char, errors)
+        try:
+            count = export.export(records, args.outfile, export_format,
+                                  stdout)
+        except ValueError as e:
+            sys.exit('[error] {}'.format(e))
+        for file_path, message in errors:
+            print('[export] Error in {}: {}'.format(file_path, message))
+        print('[export] Wrote {} records.'.format(count))
+        return
+
+    if args.command in aliases_fingerprint:
+        errors = []
+        file_paths = export.expand_paths(args.paths)
+        settings = (args.comment_char, args.section_marker,
+                    args.assignment_char)
+        if args.group:
+            groups = canonical.group_files(file_paths, args.comments,
+                                           *settings, errors=errors)
+            for digest, paths in groups.items():
+                if len(paths) > 1:
+                    print('{} ({} files)'.format(digest, len(paths)))
+                    fn.printlist('    ' + path for path in paths)
+        else:
+            for file_path in file_paths:
+                try:
+                    fingerprint = canonical.fingerprint_file(
+                        file_path, args.comments, *settings)
+                except (ValueError, OSError) as e:
+                    errors.append((file_path, str(e)))
+                    continue
+                print('{}  {}'.format(fingerprint.digest, file_path))
+                if args.sections:
+                    for name, digest in fingerprint.sections.items():
+                        print('    {}  [{}]'.format(digest, name))
+        for file_path, message in errors:
+            print('[fingerprint] Skipped {}: {}'.format(file_path, message))
+        return
 
     # Check verbosity level
     verbosity = args.verbose
@@ -106,6 +403,9 @@ def main():
     # Define command aliases
     aliases_convert = ('convert', 'conver', 'conve', 'conv', 'con', 'co', 'c')
     aliases_read = ('read', 'rea', 're', 'r', 'rd')
+    aliases_diff = ('diff', 'dif', 'di', 'd')
+    aliases_merge = ('merge', 'merg', 'mer', 'me', 'm')
+    aliases_validate = ('validate', 'valid', 'val', 'va', 'v')
 
     # Create config-settings object using specified arguments
     settings_dict = {'comment_char': args.comment_char,
@@ -119,17 +419,59 @@ def main():
     # Create color object
     color = fn.Color(**colors_dict)
 
+    if args.command in aliases_diff:
+        changes = diff.diff_files(args.infile, args.otherfile,
+                                  **settings_dict)
+        fn.printlist(diff.format_changes(changes, color))
+        return
+
+    if args.command in aliases_merge:
+        file_paths = [args.infile] + args.overlays
+        if args.includes:
+            layers = []
+            try:
+                for file_path in file_paths:
+                    layers += include.resolve_layers(file_path,
+                                                     cache=cache,
+                                                     **settings_dict)
+            except include.Include_error as e:
+                sys.exit('[error] {}'.format(e))
+            # Include directives are left out of section ''
+            merged = include.Included_configuration(layers)
+        else:
+            merged = merge.merge_files(file_paths, **settings_dict)
+        if args.provenance:
+            fn.printlist(merged.provenance_lines())
+        else:
+            fn.printdict(merged.to_dict())
+        return
+
+    if args.command in aliases_validate:
+        try:
+            validator = validate.load_schema(args.schema)
+            violations = validate.validate_file(args.infile, validator,
+                                                args.fail_fast,
+                                                **settings_dict)
+        except (OSError, ValueError) as e:
+            # Schema errors, unreadable or unknown files
+            sys.exit('[error] {}'.format(e))
+        for violation in violations:
+            print('{}[invalid] {}{}'.format(color.warning, violation,
+                                            color.reset))
+        if violations:
+            sys.exit(1)
+        print('{}[validate] No violations found.{}'.format(color.success,
+                                                         color.reset))
+        return
+
     # Handle undefined args.outfile
     if args.command in aliases_convert:
         outfile = args.outfile
     else:
         outfile = ''
 
-    # Create configuration-file object
-    config_file = fn.Config_file(args.infile)
-
     # Detect file extension
-    extension = config_file.extension
+    extension = streams.config_extension(args.infile)
 
     # Define command-line messages
     msg_dict = dflt.messages(color, args.infile, extension, outfile)
@@ -139,27 +481,132 @@ def main():
 
     print(color.detail + str(args) + color.reset)
 
-    if (args.command in aliases_read or args.command in aliases_convert):
-        print(msg.read_file, end='')
-        rawlines = config_file.to_list()
-        print(msg.done)
-        file_format = config_file.detect_format()
-
-        if file_format == 'JSON':
-            dict_json = fn.import_json(args.infile)
-            cfg_json = fn.Configuration_JSON(dict_json)
-            types = cfg_json.get_types()
-            content = cfg_json.get_content()
-            ini = fn.formatted(types, content, **settings_dict)
-            cfg = fn.Configuration(types, content, list(dict_json), ini,
-                                   **settings_dict)
-        elif file_format == 'INI':
-            cfg_ini = fn.Configuration_INI(rawlines, **settings_dict)
-            types = cfg_ini.get_types()
-            content = cfg_ini.get_content()
-            json = list(cfg_ini.to_dictionary())
-            ini = fn.formatted(types, content, **settings_dict)
-            cfg = fn.Configuration(types, content, json, ini, **settings_dict)
+    # Plan which representations the requested output needs
+    needs = set()
+    if args.command in aliases_read:
+        if args.raw or args.all:
+            needs.add('rawlines')
+        if args.parse or args.all:
+            needs.update(('types', 'content', 'ini'))
+        if (args.json or args.all) and (args.typed or args.interpolate):
+            needs.update(('types', 'content'))
+        elif args.json or args.all:
+            needs.add('dict')
+        if args.stats:
+            needs.update(('rawlines', 'types', 'content'))
+    if args.command in aliases_convert and args.json:
+        if args.interpolate:
+            needs.update(('types', 'content'))
+        elif (args.outfile == '-' and args.duplicates is None and
+                not args.nested):
+            # INI input is converted while it is read
+            needs.add('stream')
+        else:
+            needs.add('dict')
+    elif args.command in aliases_convert and args.canonical:
+        needs.update(('types', 'content'))
+    elif args.command in aliases_convert and args.ini:
+        if args.interpolate:
+            needs.update(('types', 'content'))
+        else:
+            needs.add('dict')
+
+    # Select line range by seeking through a line-offset index
+    selection = None
+    first_line = 1
+    # Duplicate sections and keys found while building dictionaries
+    duplicates = []
+    if (args.command in aliases_read and (args.lines or args.in_section) and
+            args.infile == '-'):
+        sys.exit('[error] Line selection requires a file, not stdin.')
+    if args.command in aliases_read and (args.lines or args.in_section):
+        try:
+            # Line-offset index and section heads exist for INI lines only
+            if fn.Config_file(args.infile, verbose=False).format != 'INI':
+                sys.exit('[error] Line and section selection (-l, '
+                         '--in-section) requires an INI file.')
+            line_index = lineindex.Line_index.open(args.infile,
+                                                   args.section_marker)
+            if args.in_section:
+                selection = line_index.section_range(args.in_section)
+            else:
+                selection = lineindex.parse_range(args.lines)
+        except (OSError, ValueError) as e:
+            sys.exit('[error] {}'.format(e))
+        except KeyError as e:
+            sys.exit('[error] {}'.format(e.args[0]))
+        first_line = selection[0]
+
+    if ((args.command in aliases_read or args.command in aliases_convert)
+            and cache is not None and selection is None):
+        # Reuse parsed configuration (format detection included); line
+        # selections are read and parsed through the line-offset index
+        cfg = cache.get(args.infile, **settings_dict)
+        rawlines = cfg.rawlines
+    elif (args.command in aliases_read or args.command in aliases_convert):
+        # Create configuration-file object (includes format detection)
+        config_file = fn.Config_file(args.infile)
+        file_format = config_file.format
+        if file_format == 'unknown':
+            if args.infile == '-':
+                print(msg.unknown)
+            return
+        lines = None
+        types = None
+        content = None
+        dictionary = None
+        ini = None
+        rawlines = None
+        if args.max_memory is not None:
+            # Shared by buffers of raw lines, line records and INI lines
+            budget = spill.budget(args.max_memory, 3)
+        if selection is not None:
+            # Read selected lines only (also parsed instead of whole file)
+            with line_index:
+                rawlines = line_index.read_lines(*selection)
+        elif needs == {'rawlines'}:
+            # Raw lines are printed while they are read
+            rawlines = config_file.iter_lines()
+        elif 'rawlines' in needs:
+            print(msg.read_file, end='')
+            if args.max_memory is None:
+                rawlines = config_file.to_list()
+            else:
+                rawlines = spill.buffered(config_file.iter_lines(), budget)
+            print(msg.done)
+
+        # Backend module is imported only now that its format is known
+        backend = formats.backend(file_format)
+        if 'types' in needs or 'ini' in needs:
+            # Lines are streamed when no line list is needed; line numbers
+            # are those of the backend (JSON keys keep their source lines)
+            records = backend.parse_stream(config_file, rawlines,
+                                           **settings_dict,
+                                           first_line=first_line)
+            if args.max_memory is None:
+                lines, types, content = formats.columns(records)
+            else:
+                records = spill.buffered(records, budget)
+                lines, types, content = (records.column(i) for i in range(3))
+        if 'dict' in needs or ('stream' in needs and
+                               backend.STREAM_JSON is None):
+            if types is None or backend.NESTED is True:
+                # Single parse-to-dict pass
+                try:
+                    dictionary = backend.to_dict(
+                        config_file, rawlines, args.duplicates or 'last',
+                        duplicates, first_line, **settings_dict)
+                except fn.Duplicate_error as e:
+                    sys.exit('[error] {}'.format(e))
+        if 'ini' in needs and args.max_memory is None:
+            ini = fn.formatted(types, content, False, False, False,
+                               **settings_dict)
+        elif 'ini' in needs:
+            ini = spill.buffered(fn.iter_formatted(types, content, False,
+                                                   False, False,
+                                                   **settings_dict), budget)
+        cfg = fn.Configuration(types, content, dictionary, ini,
+                               **settings_dict, lines=lines)
 
     if args.command in aliases_read:
         if args.all:
@@ -169,24 +616,117 @@ def main():
             fn.printlist(rawlines)
         if args.parse or args.all:
             print(msg.arg_parse)
-            cfg_df = cfg.to_dataframe()
-            print(cfg_df)
+            fn.printlist(fn.parse_table(cfg.types, cfg.content, cfg.ini,
+                                        cfg.lines))
         if args.json or args.all:
             print(msg.arg_dict)
             print(msg.warn_comments)
-            cfg_dict = cfg.to_dictionary()
+            if args.interpolate:
+                cfg_dict = interpolated(cfg)
+                if args.typed:
+                    cfg_dict = {name: {key: typed.COERCERS[
+                        typed.infer_type(value)](value)
+                        for key, value in section.items()}
+                        for name, section in cfg_dict.items()}
+            elif args.typed:
+                cfg_dict = typed.Typed_configuration(cfg).to_dict()
+            else:
+                cfg_dict = checked_dict(cfg, args.duplicates, duplicates)
             fn.printdict(cfg_dict)
+        if args.stats:
+            print(msg.arg_stats)
+            fn.printlist(cfg.statistics(rawlines).summary())
 
     if args.command in aliases_convert:
-        cfg = fn.Configuration_INI(rawlines, **settings_dict)
-        if args.json:
+        if (args.json and 'stream' in needs and cache is None and
+                backend.STREAM_JSON is not None):
+            print(msg.warn_comments)
+            try:
+                backend.STREAM_JSON(config_file, stdout, **settings_dict)
+            except fn.Duplicate_error as e:
+                sys.exit('[error] {} (streamed output is incomplete; use '
+                         '--duplicates to merge)'.format(e))
+        elif args.json:
             print(msg.arg_dict)
             print(msg.warn_comments)
-            cfg_dict = cfg.to_dictionary()
-            fn.printdict(cfg_dict)
+            if args.interpolate:
+                cfg_dict = interpolated(cfg)
+            else:
+                cfg_dict = checked_dict(cfg, args.duplicates, duplicates)
+            if args.nested:
+                try:
+                    cfg_dict = fn.unflatten(cfg_dict)
+                except ValueError as e:
+                    sys.exit('[error] {}'.format(e))
+            if args.outfile != '-':
+                fn.printdict(cfg_dict)
+            print(msg.write_file, end='')
+            print(msg.done)
+            fn.dict_to_json(args.outfile, cfg_dict, stdout)
+        elif args.canonical:
             print(msg.write_file, end='')
             print(msg.done)
-            fn.dict_to_json(args.outfile, cfg_dict)
+            with streams.open_output(args.outfile, stdout=stdout) as f:
+                for line in canonical.canonical_lines(
+                        zip(cfg.types, cfg.content), args.comments,
+                        **settings_dict):
+                    f.write(line + '\n')
+        elif args.ini:
+            if args.interpolate:
+                cfg_dict = interpolated(cfg)
+            else:
+                cfg_dict = checked_dict(cfg, args.duplicates, duplicates)
+            print(msg.write_file, end='')
+            print(msg.done)
+            # Written by the INI backend (nested sections are flattened)
+            with streams.open_output(args.outfile, stdout=stdout) as f:
+                formats.backend('INI').emit(cfg_dict, f, **settings_dict)
+
+    for duplicate in duplicates:
+        print('{}[duplicate] {}{}'.format(color.warning, duplicate,
+                                          color.reset))
+
+
+def checked_dict(cfg, policy, duplicates):
+    """Return dictionary built with duplicate policy or exit with error.
+
+    The policy (default 'last') is applied where the dictionary is built:
+    while reading, or else from the parsed records, so duplicates are
+    reported alike whichever representations were requested.
+    """
+    try:
+        if cfg.json is None and cfg.types is not None:
+            return cfg.to_dict(policy or 'last', duplicates)
+        return cfg.to_dict()
+    except fn.Duplicate_error as e:
+        sys.exit('[error] {}'.format(e))
+
+
+def interpolated(cfg):
+    """Return dictionary with resolved references or exit with error."""
+    try:
+        return interpolate.Interpolator(cfg).to_dict()
+    except interpolate.Interpolation_error as e:
+        sys.exit('[error] {}'.format(e))
+
+
+def main():
+    """Parse command-line arguments and execute subcommand."""
+    args = build_parser().parse_args()
+    try:
+        if args.command == 'serve':
+            server.serve(args.socket, build_parser, run)
+        else:
+            run(args)
+        sys.stdout.flush()
+    except enc.Decode_error as e:
+        sys.exit('[error] {}: {}'.format(getattr(args, 'infile', ''), e))
+    except BrokenPipeError:
+        # Output pipe was closed early (e.g. '| head'): silence the final
+        # flush at interpreter exit and exit quietly
+        devnull = os.open(os.devnull, os.O_WRONLY)
+        os.dup2(devnull, sys.stdout.fileno())
+        sys.exit(1)
 
 
 if __name__ == '__main__':
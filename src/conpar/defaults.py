@@ -2,10 +2,33 @@
 # -*- coding: utf-8 -*-
 """Collection of default values."""
 
+import os
+import tempfile
 from colorama import init, Fore, Style
 init()
 
 
+def socket_directory():
+    """Define private directory of default socket (created with mode 0700).
+
+    Used if $XDG_RUNTIME_DIR is not set.
+    """
+    return os.path.join(tempfile.gettempdir(),
+                        'conpar-{}'.format(os.getuid()))
+
+
+def socket_path():
+    """Define default Unix-socket path of conpar server."""
+    path = os.environ.get('CONPAR_SOCKET')
+    if path:
+        return path
+    # Per-user runtime directory, accessible by the user only
+    runtime_directory = os.environ.get('XDG_RUNTIME_DIR')
+    if runtime_directory:
+        return os.path.join(runtime_directory, 'conpar.sock')
+    return os.path.join(socket_directory(), 'conpar.sock')
+
+
 def colors():
     """Define colors for command-line output."""
     colors_dict = {'message': Fore.YELLOW,
@@ -17,6 +40,14 @@ def colors():
     return colors_dict
 
 
+def format_messages(color, file_format):
+    """Define messages (try parsing, detected) of format detection."""
+    return ('{}[read] Try parsing {} format ...{}'.format(
+                color.message, file_format, color.reset),
+            '{}[read] Detected {} format.{}'.format(
+                color.message, file_format, color.reset))
+
+
 def messages(color, infile, extension, outfile):
     """Define command-line messages."""
     msg_dict = {
@@ -34,6 +65,9 @@ def messages(color, infile, extension, outfile):
                     '...{}'.format(color.message,
                                    color.reset),
         'arg_ini': 'Bla',
+        'arg_stats': '{}[read] Optional argument \'--stats\': Showing '
+                     'line-type statistics of config file '
+                     '...{}'.format(color.message, color.reset),
         'read_file': '{}[read] Reading file: '
         '\'{}\' ...{}'.format(color.message,
                               infile,
@@ -52,16 +86,10 @@ def messages(color, infile, extension, outfile):
                            '\'.ini\').{}'.format(color.warning,
                                                  extension,
                                                  color.reset),
-        'test_json': '{}[read] Try parsing JSON format '
-                     '...{}'.format(color.message,
-                                    color.reset),
-        'test_ini': '{}[read] Try parsing INI format '
-                    '...{}'.format(color.message,
-                                   color.reset),
-        'is_json': '{}[read] Detected JSON format.{}'.format(color.message,
-                                                             color.reset),
-        'is_ini': '{}[read] Detected INI format.{}'.format(color.message,
-                                                           color.reset),
+        'test_json': format_messages(color, 'JSON')[0],
+        'test_ini': format_messages(color, 'INI')[0],
+        'is_json': format_messages(color, 'JSON')[1],
+        'is_ini': format_messages(color, 'INI')[1],
         'unknown': '{}[error] Unknown file format!{}'.format(color.warning,
                                                              color.reset),
         'done': '{} DONE!{}'.format(color.message,
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Compare configurations on the section/key level."""
+
+import functions as fn
+
+
+class Change(object):
+    """Define single difference between two configurations."""
+
+    def __init__(self, kind, section, key=None, old=None, new=None,
+                 old_line=None, new_line=None):
+        # kind: 'added', 'removed' or 'changed'
+        self.kind = kind
+        self.section = section
+        # key is None for changes of whole sections
+        self.key = key
+        self.old = old
+        self.new = new
+        self.old_line = old_line
+        self.new_line = new_line
+
+    def __repr__(self):
+        return 'Change({!r}, {!r}, {!r})'.format(self.kind, self.section,
+                                                 self.key)
+
+
+def section_line(section):
+    """Return line of section head, else of the first key, or None.
+
+    Section '' of pairs before the first section head has no head line.
+    """
+    if section.line is not None:
+        return section.line
+    for value, line in section.entries.values():
+        if line is not None:
+            return line
+    return None
+
+
+def diff_sections(old, new):
+    """Compare two dicts of Section objects and return list of changes."""
+    changes = []
+    for name, section in old.items():
+        if name not in new:
+            changes.append(Change('removed', name,
+                                  old_line=section_line(section)))
+    for name, section in new.items():
+        if name not in old:
+            changes.append(Change('added', name,
+                                  new_line=section_line(section)))
+            continue
+        old_section = old[name]
+        # Skip identical sections by comparing section hashes
+        if old_section.digest() == section.digest():
+            continue
+        for key, (value, line) in old_section.entries.items():
+            if key not in section.entries:
+                changes.append(Change('removed', name, key, old=value,
+                                      old_line=line))
+        for key, (value, line) in section.entries.items():
+            if key not in old_section.entries:
+                changes.append(Change('added', name, key, new=value,
+                                      new_line=line))
+                continue
+            old_value, old_line = old_section.entries[key]
+            if fn.value_str(old_value) != fn.value_str(value):
+                changes.append(Change('changed', name, key, old_value, value,
+                                      old_line, line))
+    return changes
+
+
+def diff_configurations(old, new):
+    """Compare two Configuration objects and return list of changes."""
+    return diff_sections(old.sections(), new.sections())
+
+
+def diff_files(old_path, new_path, comment_char='#', section_marker='[]',
+               assignment_char='='):
+    """Compare two INI or JSON files and return list of changes."""
+    settings = (comment_char, section_marker, assignment_char)
+    return diff_configurations(fn.load_configuration(old_path, *settings),
+                               fn.load_configuration(new_path, *settings))
+
+
+def line_note(line):
+    """Return ' (line N)', or '' if the line is unknown."""
+    if line is None:
+        return ''
+    return ' (line {})'.format(line)
+
+
+def format_changes(changes, color):
+    """Create colored command-line lines for list of changes."""
+    lines = []
+    for change in changes:
+        if change.key is None:
+            if change.kind == 'removed':
+                lines.append('{}- [{}]{}{}'.format(
+                    color.warning, change.section,
+                    line_note(change.old_line), color.reset))
+            else:
+                lines.append('{}+ [{}]{}{}'.format(
+                    color.success, change.section,
+                    line_note(change.new_line), color.reset))
+        elif change.kind == 'removed':
+            lines.append('{}- [{}] {} = {}{}{}'.format(
+                color.warning, change.section, change.key,
+                fn.value_str(change.old), line_note(change.old_line),
+                color.reset))
+        elif change.kind == 'added':
+            lines.append('{}+ [{}] {} = {}{}{}'.format(
+                color.success, change.section, change.key,
+                fn.value_str(change.new), line_note(change.new_line),
+                color.reset))
+        else:
+            lines.append('{}~ [{}] {} = {}{} -> {}{}{}'.format(
+                color.detail, change.section, change.key,
+                fn.value_str(change.old), line_note(change.old_line),
+                fn.value_str(change.new), line_note(change.new_line),
+                color.reset))
+    return lines
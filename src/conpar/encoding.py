@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Encoding detection on byte buffers."""
+
+import codecs
+import streams
+
+
+# Byte-order marks (UTF-32 before UTF-16, whose BOM is a prefix of it)
+BOMS = (
+    (codecs.BOM_UTF32_LE, 'utf-32'),
+    (codecs.BOM_UTF32_BE, 'utf-32'),
+    (codecs.BOM_UTF8, 'utf-8-sig'),
+    (codecs.BOM_UTF16_LE, 'utf-16'),
+    (codecs.BOM_UTF16_BE, 'utf-16'),
+    )
+
+# Fallback for legacy 8-bit files (decodes any byte sequence)
+FALLBACK = 'latin-1'
+
+# Number of bytes read and decoded at a time
+CHUNK_SIZE = 65536
+
+
+class Decode_error(ValueError):
+    """Define error for bytes that fit no encoding of the whole stream."""
+
+
+def detect_bom(data):
+    """Return codec name of byte-order mark, or None."""
+    for bom, codec in BOMS:
+        if data.startswith(bom):
+            return codec
+    return None
+
+
+def decode(data):
+    """Detect encoding of byte buffer and decode it once.
+
+    Return tuple (text, encoding name).
+    """
+    codec = detect_bom(data)
+    if codec is not None:
+        return data.decode(codec), codec
+    # Fast path: pure ASCII needs no validation while decoding
+    if data.isascii():
+        return data.decode('ascii'), 'ascii'
+    try:
+        return data.decode('utf-8'), 'utf-8'
+    except UnicodeDecodeError:
+        return data.decode(FALLBACK), FALLBACK
+
+
+def detect_prefix(prefix):
+    """Return encoding name for decoding a stream from its first bytes."""
+    codec = detect_bom(prefix)
+    if codec is not None:
+        return codec
+    # A multi-byte character may be cut off at the end of the prefix
+    try:
+        codecs.getincrementaldecoder('utf-8')().decode(prefix, final=False)
+    except UnicodeDecodeError:
+        return FALLBACK
+    return 'utf-8'
+
+
+class Decoder(object):
+    """Define incremental decoding of a binary stream.
+
+    The rules of decode() are applied while the stream is read: a
+    byte-order mark selects its codec, otherwise bytes are decoded as
+    UTF-8 and invalid UTF-8 switches to the fallback encoding. Invalid
+    UTF-8 after non-ASCII UTF-8 text raises Decode_error, since text
+    already decoded would differ from decoding the whole stream.
+    """
+
+    def __init__(self, stream, chunk_size=CHUNK_SIZE):
+        self.stream = stream
+        self.chunk_size = chunk_size
+        # Encoding of the text decoded so far
+        self.encoding = None
+        # Number of bytes decoded before the current chunk
+        self.position = 0
+
+    def iter_text(self):
+        """Yield decoded text chunks."""
+        data = self.stream.read(self.chunk_size)
+        codec = detect_bom(data)
+        if codec is None:
+            self.encoding = 'ascii'
+            codec = 'utf-8'
+        else:
+            self.encoding = codec
+        decoder = codecs.getincrementaldecoder(codec)()
+        while True:
+            final = len(data) == 0
+            if self.encoding in ('ascii', 'utf-8'):
+                # Bytes of a character cut off at the end of the last chunk
+                pending = decoder.getstate()[0]
+                try:
+                    text = decoder.decode(data, final)
+                except UnicodeDecodeError as e:
+                    if self.encoding == 'utf-8':
+                        raise Decode_error(
+                            'Invalid UTF-8 at byte {} after UTF-8 text '
+                            '(mixed encodings)'.format(
+                                self.position - len(pending) + e.start)
+                            ) from None
+                    # Only ASCII so far, which the fallback decodes alike
+                    self.encoding = FALLBACK
+                    decoder = codecs.getincrementaldecoder(FALLBACK)()
+                    text = decoder.decode(pending + data, final)
+                else:
+                    if self.encoding == 'ascii' and not text.isascii():
+                        self.encoding = 'utf-8'
+            else:
+                text = decoder.decode(data, final)
+            if text:
+                yield text
+            if final:
+                return
+            self.position += len(data)
+            data = self.stream.read(self.chunk_size)
+
+
+def iter_lines(chunks):
+    """Yield lines (without trailing whitespace) of text chunks."""
+    # Parts of a line spread over several chunks
+    parts = []
+    for text in chunks:
+        start = 0
+        while True:
+            end = text.find('\n', start)
+            if end == -1:
+                parts.append(text[start:])
+                break
+            parts.append(text[start:end])
+            yield ''.join(parts).rstrip()
+            parts = []
+            start = end + 1
+    rest = ''.join(parts)
+    if rest:
+        yield rest.rstrip()
+
+
+def read_text(file_path):
+    """Read (decompressed) file and decode it with the detected encoding.
+
+    Return tuple (text, encoding name). The (decompressed) bytes are
+    decoded chunk by chunk instead of being held as a whole.
+    """
+    with streams.open_input(file_path) as f:
+        decoder = Decoder(f)
+        try:
+            return ''.join(decoder.iter_text()), decoder.encoding
+        except Decode_error:
+            pass
+    # Mixed encodings: decode() falls back for the whole file
+    with streams.open_input(file_path) as f:
+        chunks = iter(lambda: f.read(CHUNK_SIZE), b'')
+        return ''.join(codecs.iterdecode(chunks, FALLBACK)), FALLBACK
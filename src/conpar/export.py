@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Bulk export of line records of many config files.
+
+Records are tuples (file, line, type, section, key, value) and are
+written while the files are read, without per-file tables.
+"""
+
+import csv
+import itertools
+import json
+import os
+import sqlite3
+import formats
+import functions as fn
+import index
+import streams
+
+
+# Column names of records
+COLUMNS = ('file', 'line', 'type', 'section', 'key', 'value')
+
+# Number of records per executemany call and transaction
+BATCH_SIZE = 10000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS records (
+    file TEXT NOT NULL,
+    line INTEGER,
+    type TEXT NOT NULL,
+    section TEXT,
+    key TEXT,
+    value TEXT
+);
+"""
+
+
+def iter_file_records(file_path, comment_char='#', section_marker='[]',
+                      assignment_char='='):
+    """Yield records of one INI or JSON file."""
+    config_file = fn.Config_file(file_path, verbose=False)
+    if config_file.format == 'unknown':
+        raise ValueError('Unknown file format: \'{}\''.format(file_path))
+    section = None
+    # INI lines are parsed while they are read
+    for line, line_type, content in formats.backend(
+            config_file.format).parse_stream(config_file, None, comment_char,
+                                             section_marker, assignment_char):
+        key = None
+        value = None
+        if line_type == 'section_head':
+            section = content
+        elif line_type == 'key_value_pair':
+            key, value = content
+            value = fn.value_str(value)
+        elif line_type in ('comment', 'unknown'):
+            value = content
+        yield (file_path, line, line_type, section, key, value)
+
+
+def expand_paths(paths):
+    """Return list of files, replacing directories by their config files."""
+    file_paths = []
+    for path in paths:
+        if os.path.isdir(path):
+            file_paths += [os.path.join(path, name)
+                           for name in index.find_files(path)]
+        else:
+            file_paths.append(path)
+    return file_paths
+
+
+def iter_records(file_paths, comment_char='#', section_marker='[]',
+                 assignment_char='=', errors=None):
+    """Yield records of all files.
+
+    Reading a file stops at the first error (records read before it are
+    kept), and if errors is a list, the file is appended to it as tuple
+    (path, message).
+    """
+    for file_path in file_paths:
+        try:
+            # Parse errors show up anywhere while iterating
+            yield from iter_file_records(file_path, comment_char,
+                                         section_marker, assignment_char)
+        except (ValueError, OSError) as e:
+            if errors is not None:
+                errors.append((file_path, str(e)))
+
+
+def iter_batches(records, batch_size=BATCH_SIZE):
+    """Yield lists of up to batch_size records."""
+    records = iter(records)
+    while True:
+        batch = list(itertools.islice(records, batch_size))
+        if not batch:
+            return
+        yield batch
+
+
+def write_csv(records, out):
+    """Write records as CSV with header line; return number of records."""
+    writer = csv.writer(out, lineterminator='\n')
+    writer.writerow(COLUMNS)
+    count = 0
+    for batch in iter_batches(records):
+        writer.writerows(batch)
+        count += len(batch)
+    return count
+
+
+def write_ndjson(records, out):
+    """Write records as newline-delimited JSON; return number of records."""
+    count = 0
+    for batch in iter_batches(records):
+        out.write(''.join(json.dumps(dict(zip(COLUMNS, record))) + '\n'
+                          for record in batch))
+        count += len(batch)
+    return count
+
+
+def write_sqlite(records, db_path):
+    """Append records to table 'records'; return number of records."""
+    connection = sqlite3.connect(db_path)
+    try:
+        connection.executescript(SCHEMA)
+        count = 0
+        for batch in iter_batches(records):
+            # One transaction per batch
+            with connection:
+                connection.executemany('INSERT INTO records VALUES '
+                                       '(?, ?, ?, ?, ?, ?)', batch)
+            count += len(batch)
+        with connection:
+            connection.execute('CREATE INDEX IF NOT EXISTS '
+                               'records_section_key ON records(section, key)')
+    finally:
+        connection.close()
+    return count
+
+
+# Map format name to tuple (writer, text output)
+FORMATS = {
+    'csv': (write_csv, True),
+    'ndjson': (write_ndjson, True),
+    'sqlite': (write_sqlite, False),
+    }
+
+# Map file-name extension to format name
+EXTENSIONS = {
+    '.csv': 'csv',
+    '.ndjson': 'ndjson',
+    '.jsonl': 'ndjson',
+    '.sqlite': 'sqlite',
+    '.db': 'sqlite',
+    }
+
+
+def format_of(outfile):
+    """Return export format suggested by file-name extension, or None."""
+    return EXTENSIONS.get(streams.config_extension(outfile))
+
+
+def export(records, outfile, export_format, stdout=None):
+    """Write records to outfile ('-' = stdout); return number of records."""
+    writer, text = FORMATS[export_format]
+    if not text:
+        if outfile == '-':
+            raise ValueError('Format {} cannot be written to standard '
+                             'output'.format(export_format))
+        return writer(records, outfile)
+    with streams.open_output(outfile, stdout=stdout) as f:
+        return writer(records, f)
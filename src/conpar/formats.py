@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Registry of configuration-file formats with lazily imported backends.
+
+A format is registered with a sniff function, which cheaply scores the
+first characters of a file, and the name of its backend module. Backend
+modules are imported only when detection selects their format and provide
+
+    accepts(config_file)
+        check the whole file (after a positive sniff score)
+    parse_stream(config_file, rawlines, comment_char, section_marker,
+                 assignment_char, first_line)
+        yield records (line, line type, content); rawlines (list or
+        iterator) replace the lines of the file if not None
+    to_dict(config_file, rawlines, duplicates, report, first_line,
+            comment_char, section_marker, assignment_char)
+        return dictionary (see functions.records_to_dict for duplicates)
+    emit(dictionary, out, comment_char, section_marker, assignment_char)
+        write dictionary to text stream out
+
+and the constants NESTED (to_dict returns the document itself, not a
+dictionary built from records) and STREAM_JSON (function writing JSON
+while the file is read, or None).
+"""
+
+import importlib
+
+
+class Format(object):
+    """Define registered format with sniff function and backend module."""
+
+    def __init__(self, name, module, extensions, sniff):
+        self.name = name
+        self.module = module
+        self.extensions = extensions
+        self.sniff = sniff
+        self._backend = None
+
+    def backend(self):
+        """Return backend module (imported on first use)."""
+        if self._backend is None:
+            self._backend = importlib.import_module(self.module)
+        return self._backend
+
+
+# Map format name to Format object (in order of registration)
+REGISTRY = {}
+
+# Added to the sniff score of formats suggested by the file-name extension
+EXTENSION_BONUS = 0.5
+
+# Sniff score of formats the prefix gives no evidence for or against;
+# accepts() decides, detect() (prefix only) ignores such formats
+FALLBACK_SCORE = 0.05
+
+
+def register(name, module, extensions, sniff):
+    """Register format; a registered name is replaced."""
+    REGISTRY[name] = Format(name, module, tuple(extensions), sniff)
+    return REGISTRY[name]
+
+
+def backend(name):
+    """Return backend module of registered format."""
+    try:
+        return REGISTRY[name].backend()
+    except KeyError:
+        raise ValueError('Unknown file format: \'{}\''.format(name))
+
+
+def extensions():
+    """Return tuple of file-name extensions of all formats."""
+    return tuple(extension for fmt in REGISTRY.values()
+                 for extension in fmt.extensions)
+
+
+def scores(prefix, extension=None):
+    """Return list of (score, format name) with positive sniff scores.
+
+    The list is sorted by decreasing score; equal scores keep the order of
+    registration.
+    """
+    prefix = prefix.lstrip('\ufeff \t\r\n')
+    result = []
+    for fmt in REGISTRY.values():
+        score = fmt.sniff(prefix)
+        if score <= 0:
+            continue
+        if extension in fmt.extensions:
+            score += EXTENSION_BONUS
+        result.append((score, fmt.name))
+    result.sort(key=lambda item: -item[0])
+    return result
+
+
+def candidates(prefix, extension=None):
+    """Return names of formats worth trying, most likely first."""
+    return [name for score, name in scores(prefix, extension)]
+
+
+def detect(prefix, extension=None):
+    """Return name of best-scoring format, or 'unknown'."""
+    for score, name in scores(prefix, extension):
+        if score > FALLBACK_SCORE:
+            return name
+    return 'unknown'
+
+
+def columns(records):
+    """Return tuple of lists (lines, types, content) of records."""
+    lines = []
+    types = []
+    content = []
+    for line, line_type, line_content in records:
+        lines.append(line)
+        types.append(line_type)
+        content.append(line_content)
+    return lines, types, content
+
+
+def sniff_json(prefix):
+    """Score prefix (without leading whitespace) as JSON object."""
+    if prefix.startswith('{'):
+        return 1.0
+    return 0.0
+
+
+def sniff_ini(prefix):
+    """Score prefix as INI by its first section head or key-value pair."""
+    for line in prefix.splitlines():
+        line = line.strip()
+        if line.startswith('[') and line.endswith(']'):
+            return 0.8
+        if '=' in line and line.split('=')[0] != '':
+            return 0.6
+    if prefix[:1] in ('#', ';'):
+        # Long comment header; the whole file is checked by the backend
+        return 0.1
+    # Long preamble or other markers; the backend checks the whole file
+    return FALLBACK_SCORE
+
+
+register('JSON', 'json_backend', ('.json',), sniff_json)
+register('INI', 'ini_backend', ('.ini',), sniff_ini)
@@ -3,9 +3,19 @@
 """Collection of functions."""
 
 import os
+import sys
+import hashlib
 import pandas as pd
 import json
+import re
+from json.decoder import scanstring
+import numpy as np
 import defaults as dflt
+import encoding as enc
+import formats
+import spill
+import stats as st
+import streams
 
 
 class Color(object):
@@ -23,14 +33,15 @@ class Message(object):
     """Define messages for command-line output."""
 
     def __init__(self, arg_all, arg_raw, arg_parse, arg_dict, arg_ini,
-                 read_file, write_file, extension, other_extension, test_json,
-                 test_ini, is_json, is_ini, unknown, done, success, failure,
-                 warn_comments):
+                 arg_stats, read_file, write_file, extension, other_extension,
+                 test_json, test_ini, is_json, is_ini, unknown, done, success,
+                 failure, warn_comments):
         self.arg_all = arg_all
         self.arg_raw = arg_raw
         self.arg_parse = arg_parse
         self.arg_dict = arg_dict
         self.arg_ini = arg_ini
+        self.arg_stats = arg_stats
         self.read_file = read_file
         self.write_file = write_file
         self.extension = extension
@@ -46,47 +57,92 @@ class Message(object):
         self.warn_comments = warn_comments
 
 
+# Number of bytes peeked at for detecting stream format and encoding
+PREFIX_SIZE = 65536
+
+
 class Config_file(object):
     """Define configuration-file properties and methods."""
 
-    def __init__(self, file_path):
+    def __init__(self, file_path, verbose=True):
         self.file_path = file_path
         self.directory = os.path.dirname(file_path)
         self.filename = os.path.basename(file_path)
-        self.extension = os.path.splitext(file_path)[-1]
-        self.format = self.detect_format()
+        # Extension of config format (e.g. '.ini' for 'name.ini.gz')
+        self.extension = streams.config_extension(file_path)
+        # File content is read and decoded only once
+        self.encoding = None
+        self._text = None
+        self._json = None
+        self.stream = None
+        if file_path == '-':
+            # Standard input can be read only once; detect format on prefix
+            self.stream = streams.open_input(file_path)
+            self.format = self.detect_format_prefix()
+        elif verbose is True:
+            self.format = self.detect_format()
+        else:
+            self.format = self.detect_format_quiet()
+
+    def read_text(self):
+        """Read and decode file once (encoding detected from bytes)."""
+        if self._text is None and self.stream is not None:
+            self._text, self.encoding = enc.decode(self.stream.read())
+        elif self._text is None:
+            self._text, self.encoding = enc.read_text(self.file_path)
+        return self._text
+
+    def iter_lines(self):
+        """Iterate over lines without building a list of lines.
+
+        Lines are decoded while the file is read, unless the text was read
+        already (e.g. for JSON detection).
+        """
+        if self._text is not None:
+            yield from enc.iter_lines([self._text])
+            return
+        if self.stream is not None:
+            # Standard input is read once, while it arrives
+            yield from self.iter_decoded(self.stream)
+            return
+        with streams.open_input(self.file_path) as f:
+            yield from self.iter_decoded(f)
+
+    def iter_decoded(self, stream):
+        """Yield lines of binary stream, decoded incrementally."""
+        decoder = enc.Decoder(stream)
+        for line in enc.iter_lines(decoder.iter_text()):
+            # Encoding of the lines decoded so far
+            self.encoding = decoder.encoding
+            yield line
+        self.encoding = decoder.encoding
 
     def to_list(self):
         """Read file into list line by line."""
-        with open(self.file_path, 'r', encoding='utf-8') as f:
-            lines = []
-            for line in f:
-                lines.append(line.rstrip())
-        return lines
+        return list(self.iter_lines())
 
     def to_dict(self):
         """Read JSON file and write content into nested dictionary."""
         if self.is_json() is False:
             print('[error] Direct conversion from INI to dict not supported!')
             return None
-        with open(self.file_path, 'r') as f:
-            config_dict = json.load(f)
-        return config_dict
+        return self._json
 
     def is_json(self):
-        """Check if file is JSON."""
+        """Check if file is JSON (parsed result is kept for to_dict)."""
+        if self._json is not None:
+            return True
         try:
-            with open(self.file_path, 'r') as f:
-                json.load(f)
+            self._json = json.loads(self.read_text())
         except ValueError:
             return False
         return True
 
     def is_ini(self):
         """Check if file is INI."""
-        rawlines = self.to_list()
         assignment_char = '='
-        for line in rawlines:
+        # Stop reading at the first key-value pair
+        for line in self.iter_lines():
             # Check if (at least one) assignment character is present
             if assignment_char in line:
                 # Check if assignment character is surrounded by key-value pair
@@ -94,55 +150,50 @@ class Config_file(object):
                     return True
         return False
 
+    def prefix(self):
+        """Return decoded first characters of file for format sniffing."""
+        if self._text is None and self.stream is not None:
+            prefix = self.stream.peek(PREFIX_SIZE)
+            return prefix.decode(enc.detect_prefix(prefix), 'replace')
+        if self._text is None:
+            with streams.open_input(self.file_path) as f:
+                prefix = f.read(PREFIX_SIZE)
+            return prefix.decode(enc.detect_prefix(prefix), 'replace')
+        return self._text[:PREFIX_SIZE]
+
     def detect_format(self):
-        """Detect configuration-file format (JSON or INI)."""
+        """Detect configuration-file format (e.g. JSON or INI)."""
         colors_dict = dflt.colors()
         color = Color(**colors_dict)
         msg_dict = dflt.messages(color, self.file_path, self.extension, '')
         msg = Message(**msg_dict)
-        file_format = 'unknown'
         # Use filename extension as hint for file format
-        if self.extension in ('.json', '.ini'):
+        if self.extension in formats.extensions():
             print(msg.extension)
         else:
             print(msg.other_extension)
-        if self.extension != '.ini':
-            print(msg.test_json, end='')
-            is_json = self.is_json()
-            if is_json is True:
-                file_format = 'JSON'
+        # Try formats by decreasing sniff score of the file prefix
+        for name in formats.candidates(self.prefix(), self.extension):
+            test_msg, detected_msg = dflt.format_messages(color, name)
+            print(test_msg, end='')
+            if formats.backend(name).accepts(self) is True:
                 print(msg.success)
-                print(msg.is_json)
-            else:
-                print(msg.failure)
-                print(msg.test_ini, end='')
-                is_ini = self.is_ini()
-                if is_ini is True:
-                    file_format = 'INI'
-                    print(msg.success)
-                    print(msg.is_ini)
-                else:
-                    print(msg.failure)
-                    print(msg.unknown)
-        elif self.extension == '.ini':
-            print(msg.test_ini, end='')
-            is_ini = self.is_ini()
-            if is_ini is True:
-                file_format = 'INI'
-                print(msg.success)
-                print(msg.is_ini)
-            else:
-                print(msg.failure)
-                print(msg.test_json, end='')
-                is_json = self.is_json()
-                if is_json is True:
-                    file_format = 'JSON'
-                    print(msg.success)
-                    print(msg.is_json)
-                else:
-                    print(msg.failure)
-                    print(msg.unknown)
-        return file_format
+                print(detected_msg)
+                return name
+            print(msg.failure)
+        print(msg.unknown)
+        return 'unknown'
+
+    def detect_format_prefix(self):
+        """Detect stream format from its first bytes."""
+        return formats.detect(self.prefix())
+
+    def detect_format_quiet(self):
+        """Detect configuration-file format without terminal output."""
+        for name in formats.candidates(self.prefix(), self.extension):
+            if formats.backend(name).accepts(self) is True:
+                return name
+        return 'unknown'
 
 
 # class Line(object):
@@ -289,6 +340,49 @@ class Skip_settings(object):
         self.skip_unknown = skip_unknown
 
 
+# Quote characters of quoted values
+QUOTES = ('"', "'")
+
+
+def unquote(value, comment_char='#'):
+    """Return content of quoted value (backslash escapes), else value.
+
+    Only an inline comment may follow the closing quote. Values without
+    closing quote or with other text after it are returned unchanged.
+    """
+    if len(value) < 2 or value[0] not in QUOTES:
+        return value
+    quote = value[0]
+    chars = []
+    i = 1
+    # Single scan; each character is looked at once
+    while i < len(value):
+        char = value[i]
+        if char == '\\' and i + 1 < len(value):
+            chars.append(value[i + 1])
+            i += 2
+        elif char == quote:
+            rest = value[i + 1:].lstrip()
+            if rest == '' or rest[0] == comment_char:
+                return ''.join(chars)
+            return value
+        else:
+            chars.append(char)
+            i += 1
+    return value
+
+
+def quoted(value):
+    """Return value in quotes with backslash escapes (see unquote)."""
+    return '"{}"'.format(value.replace('\\', '\\\\').replace('"', '\\"'))
+
+
+def escaped_key(key, assignment_char):
+    """Return key with backslash escapes (see Line_INI.key_value_pair)."""
+    return key.replace('\\', '\\\\').replace(assignment_char,
+                                        '\\' + assignment_char)
+
+
 class Line_INI(Config_settings):
     """Define single-line properties and methods."""
 
@@ -299,6 +393,7 @@ class Line_INI(Config_settings):
         # Create a version of rawline without leading and trailing spaces
         self.line = self.rawline.strip()
         self.len = len(self.line)
+        self._separator = None
 
     # Functions for determining content type
 
@@ -322,11 +417,39 @@ class Line_INI(Config_settings):
 
     def is_key_value_pair(self):
         """Check if line contains a key-value separator."""
-        if self.assignment_char in self.line:
+        if self.separator() >= 0:
             return True
         else:
             return False
 
+    def separator(self):
+        """Return index of first unescaped assignment character, or -1."""
+        if self._separator is None:
+            index = self.line.find(self.assignment_char)
+            # Skip assignment characters escaped by a backslash, i.e. after
+            # an odd number of backslashes ('\\' is an escaped backslash)
+            while index > 0 and self.line[index - 1] == '\\':
+                start = index - 1
+                while start > 0 and self.line[start - 1] == '\\':
+                    start -= 1
+                if (index - start) % 2 == 0:
+                    break
+                index = self.line.find(self.assignment_char, index + 1)
+            self._separator = index
+        return self._separator
+
+    def continues(self):
+        """Check if line ends with a backslash (outside of quotes)."""
+        if self.line[-1:] != '\\':
+            return False
+        # Quoted values end with their closing quote (or inline comment)
+        value = self.line[self.separator() + 1:].strip()
+        return unquote(value, self.comment_char) == value
+
+    def indent(self):
+        """Return number of leading whitespace characters of raw line."""
+        return self.rawlen - len(self.rawline.lstrip())
+
     def is_section(self):
         """Check if line has a section marker."""
         # Return False if line is empty
@@ -361,11 +484,24 @@ class Line_INI(Config_settings):
 
     def key_value_pair(self):
         """If line is a key-value pair, return tuple (key, value)."""
+        # Split at first unescaped assignment character only, so values may
+        # contain it
+        index = self.separator()
         # Check if line is a key-value pair
-        if self.is_key_value_pair() is True:
-            # Return key and value strings without leading and trailing spaces
-            return (self.line.split(self.assignment_char)[0].strip(),
-                    self.line.split(self.assignment_char)[1].strip())
+        if index >= 0:
+            key = self.line[:index]
+            if '\\' in key:
+                # Escaped backslashes and assignment characters
+                key = re.sub(r'\\([\\{}])'.format(
+                    re.escape(self.assignment_char)), r'\1', key)
+            value = self.line[index + 1:].strip()
+            unquoted = unquote(value, self.comment_char)
+            if unquoted != value:
+                value = unquoted
+            elif value[-1:] == '\\':
+                # Value (quoted or not) continues on the next line
+                value = unquote(value[:-1].rstrip(), self.comment_char)
+            return (key.strip(), value)
 
     def section_name(self):
         """If line is section head, return section name."""
@@ -375,6 +511,13 @@ class Line_INI(Config_settings):
             return self.line[1:-1].strip()
 
 
+def joined_value(record, continued):
+    """Return key-value record with joined value and continuation records."""
+    key, value = record[1]
+    lines = [value] + [content for line_type, content in continued]
+    return [('key_value_pair', (key, '\n'.join(lines)))] + continued
+
+
 class Configuration_INI(Skip_settings, Config_settings):
     """Define INI configuration properties and methods."""
 
@@ -384,42 +527,98 @@ class Configuration_INI(Skip_settings, Config_settings):
         Skip_settings.__init__(self, skip_comments, skip_empty, skip_unknown)
         Config_settings.__init__(self, comment_char, section_marker,
                                  assignment_char)
+        # Line types and contents of the first call of parse()
+        self._parsed = None
 
     def get_types(self):
         """Determine configuration content type."""
-        types = []
-        for rawline in self.rawlines:
-            line = Line_INI(rawline, self.comment_char, self.section_marker,
-                            self.assignment_char)
-            if line.is_comment() is True:
-                types.append('comment')
-            elif line.is_empty() is True:
-                types.append('empty')
-            elif line.is_section() is True:
-                types.append('section_head')
-            elif line.is_key_value_pair() is True:
-                types.append('key_value_pair')
-            else:
-                types.append('unknown')
-        return types
+        return self.parse()[0]
 
     def get_content(self):
         """Determine line contents."""
-        content = []
+        return self.parse()[1]
+
+    def iter_parse(self):
+        """Yield tuple (line type, line content) for each line.
+
+        Key-value pairs continue on the following lines if they end with a
+        backslash (any non-empty line), or on lines indented deeper than
+        the pair that are no comments, section heads or key-value pairs.
+        The pair is yielded with the value lines joined by newlines,
+        followed by its continuation lines.
+        """
+        # Key-value pair held back until its value is complete, and its
+        # continuation lines
+        pending = None
+        continued = None
+        key_indent = 0
+        # Last line ended with a backslash
+        explicit = False
         for rawline in self.rawlines:
             line = Line_INI(rawline, self.comment_char, self.section_marker,
                             self.assignment_char)
+            if pending is not None:
+                if explicit is True:
+                    is_continuation = line.is_empty() is False
+                else:
+                    # Only indented lines can continue a value
+                    is_continuation = (rawline[:1] in (' ', '\t') and
+                                       line.is_empty() is False and
+                                       line.indent() > key_indent and
+                                       line.is_comment() is False and
+                                       line.is_section() is False and
+                                       line.is_key_value_pair() is False)
+                if is_continuation is True:
+                    text = line.line
+                    explicit = text[-1:] == '\\'
+                    if explicit is True:
+                        text = text[:-1].rstrip()
+                    if continued is None:
+                        continued = []
+                    continued.append(('continuation', text))
+                    continue
+                explicit = False
+                if continued is None:
+                    yield pending
+                else:
+                    yield from joined_value(pending, continued)
+                    continued = None
+                pending = None
             if line.is_comment() is True:
-                content.append(line.comment())
+                yield ('comment', line.comment())
             elif line.is_empty() is True:
-                content.append('')
+                yield ('empty', '')
             elif line.is_section() is True:
-                content.append(line.section_name())
-            elif line.is_key_value_pair() is True:
-                content.append(line.key_value_pair())
+                yield ('section_head', line.section_name())
+            else:
+                pair = line.key_value_pair()
+                if pair is None:
+                    yield ('unknown', line.rawline)
+                    continue
+                pending = ('key_value_pair', pair)
+                explicit = line.continues()
+                key_indent = 0
+                if rawline[:1] in (' ', '\t'):
+                    key_indent = line.indent()
+        if pending is not None:
+            if continued is None:
+                yield pending
             else:
-                content.append(line.rawline)
-        return content
+                yield from joined_value(pending, continued)
+
+    def parse(self):
+        """Determine line types and line contents in a single pass.
+
+        The lines are parsed once; later calls return the same lists.
+        """
+        if self._parsed is None:
+            types = []
+            content = []
+            for line_type, line_content in self.iter_parse():
+                types.append(line_type)
+                content.append(line_content)
+            self._parsed = (types, content)
+        return self._parsed
 
     def to_ini(self):
         """Generate INI representation."""
@@ -445,40 +644,25 @@ class Configuration_INI(Skip_settings, Config_settings):
 
     def count_types(self):
         """Return dict with frequencies of config-file line types."""
-        type_count = self.to_dataframe()['TYPE'].value_counts()
-        types = [
-            'comment',
-            'empty',
-            'section_head',
-            'key_value_pair',
-            'unknown'
-            ]
-        return dict(type_count.reindex(types, fill_value=0))
-        # .rename_axis('TYPE').reset_index(name='COUNTS')
-
-    def to_dict(self):
-        """Create dictionary with sections and key-value pairs."""
-        df = self.to_dataframe()
-        # Get series of section heads
-        section_heads = df['CONTENT'][df['TYPE'] == 'section_head']
-        # Get series of key-value pairs
-        key_value_pairs = df['CONTENT'][df['TYPE'] == 'key_value_pair']
-        # Initialize section list
-        section = []
-        for i, section_head in enumerate(section_heads):
-            # Determine start index for i-th section head
-            start = section_heads.index.values[i]
-            if i < len(section_heads)-1:
-                # Determine stop index for i-th section head
-                stop = section_heads.index.values[i+1]
-            else:
-                # Determine stop index for final section head
-                stop = key_value_pairs.index[-1]
-            # Cast key-value pairs between start and stop into list, then dict
-            section.append(dict(list(key_value_pairs.loc[start:stop])))
-        # Return dictionary with section heads as first-level keys and
-        # sub-dictionaries with key-value pairs as values
-        return dict(zip(section_heads, section))
+        return dict(zip(st.TYPES,
+                        st.count_codes(st.type_codes(self.get_types()))
+                        .tolist()))
+
+    def statistics(self):
+        """Return line statistics (type counts, skip mask, section keys)."""
+        return st.Line_statistics(self.get_types(), self.get_content(),
+                                  self.rawlines, self.skip_comments,
+                                  self.skip_empty, self.skip_unknown)
+
+    def to_dict(self, duplicates='last', report=None, first_line=1):
+        """Create dictionary with sections and key-value pairs.
+
+        See records_to_dict for duplicate policies.
+        """
+        # Single pass without intermediate lists or DataFrame
+        records = ((line, line_type, content) for line, (line_type, content)
+                   in enumerate(self.iter_parse(), start=first_line))
+        return records_to_dict(records, duplicates, report)
 
     # def export_json(self, filename):
     #     """Export config data to JSON file."""
@@ -486,6 +670,64 @@ class Configuration_INI(Skip_settings, Config_settings):
     #         json.dump(self.to_dictionary(), f, indent=4)
 
 
+# Next character of JSON text that changes the key tree
+JSON_TOKEN = re.compile(r'["{}\[\],]')
+
+
+def json_key_lines(text):
+    """Return key tree of JSON text with line numbers (starting at 1).
+
+    Maps the keys of each object to tuples (line, key tree of the object
+    value or None). Strings are skipped as a whole, so string values equal
+    to a key are never taken for keys, and escaped names are decoded. Of
+    repeated keys the last one is kept, as by json.loads.
+    """
+    tree = {}
+    # Key trees of open objects and None for open arrays
+    stack = []
+    expect_key = False
+    # Key whose value follows
+    pending = None
+    line = 1
+    counted = 0
+    match = JSON_TOKEN.search(text)
+    while match is not None:
+        position = match.start()
+        char = text[position]
+        end = position + 1
+        if char == '"':
+            string, end = scanstring(text, end)
+            if expect_key is True:
+                line += text.count('\n', counted, position)
+                counted = position
+                pending = string
+                stack[-1][string] = (line, None)
+                expect_key = False
+            else:
+                pending = None
+        elif char == '{':
+            node = {}
+            if pending is not None:
+                stack[-1][pending] = (stack[-1][pending][0], node)
+            elif not stack:
+                tree = node
+            stack.append(node)
+            pending = None
+            expect_key = True
+        elif char == '[':
+            stack.append(None)
+            pending = None
+        elif char == ',':
+            pending = None
+            expect_key = len(stack) > 0 and stack[-1] is not None
+        else:
+            stack.pop()
+            pending = None
+            expect_key = False
+        match = JSON_TOKEN.search(text, end)
+    return tree
+
+
 class Configuration_JSON(object):
     """Define INI configuration properties and methods."""
 
@@ -494,30 +736,47 @@ class Configuration_JSON(object):
 
     def get_content(self):
         """Convert JSON dict to list."""
-        # df = pd.DataFrame.from_dict(json_dict)
-        sections = list(self.dictionary.keys())
-        keys = list(list(self.dictionary.values())[0].keys())
-        values = list(list(self.dictionary.values())[0].values())
-        key_value_pairs = list(zip(keys, values))
-        list1 = []
-        for i, section in enumerate(sections):
-            keys = list(list(self.dictionary.values())[i].keys())
-            values = list(list(self.dictionary.values())[i].values())
-            key_value_pairs = list(zip(keys, values))
-            list1.append(section)
-            for pair in key_value_pairs:
-                list1.append(pair)
-        return list1
+        return [content for line_type, content, name
+                in iter_flatten(self.dictionary)]
+
+    def get_lines(self, text):
+        """Determine line numbers (starting at 1) of sections and keys.
+
+        Follows the traversal of iter_flatten and looks names up in the
+        key tree of the JSON text (see json_key_lines).
+        """
+        lines = []
+        # Frames as in iter_flatten plus key tree and line of the object
+        stack = [['', None, iter(self.dictionary.items()), False,
+                  json_key_lines(text), None]]
+        current = None
+        while stack:
+            frame = stack[-1]
+            for name, value in frame[2]:
+                line, node = frame[4].get(name, (None, None))
+                if isinstance(value, dict):
+                    stack.append([None, name, iter(value.items()), False,
+                                  node or {}, line])
+                    if not value:
+                        current = section_path(stack, NESTED_SEPARATOR)
+                        lines.append(line)
+                    break
+                path = section_path(stack, NESTED_SEPARATOR)
+                if path != current:
+                    # Repeated section heads have no name in the file
+                    lines.append(None if frame[3] else frame[5])
+                    frame[3] = True
+                    current = path
+                lines.append(line)
+                lines.extend(None for record in iter_continuations(value))
+            else:
+                stack.pop()
+        return lines
 
     def get_types(self):
         """Determine content type."""
-        types = []
-        for line in self.get_content():
-            if type(line) is tuple:
-                types.append('key_value_pair')
-            else:
-                types.append('section_head')
-        return types
+        return [line_type for line_type, content, name
+                in iter_flatten(self.dictionary)]
 
     def to_ini(self, skip_comments, skip_empty, skip_unknown, comment_char,
                section_marker, assignment_char):
@@ -554,23 +813,139 @@ class Configuration_JSON(object):
     #     return dict(type_count.reindex(types, fill_value=0))
 
 
+# Separator of nested names in flattened section names
+NESTED_SEPARATOR = '.'
+
+
+def iter_flatten(dictionary, separator=NESTED_SEPARATOR):
+    """Yield records (line type, content, JSON name) of nested dictionary.
+
+    Objects become sections with dotted names ('a.b.c'); other values
+    become key-value pairs. Records follow the document order, so a
+    section head is repeated (with JSON name None) if values follow a
+    nested object. Top-level values go into section ''. Further lines of
+    multi-line strings follow their pair as continuation records. Uses an
+    explicit stack instead of recursion.
+    """
+    # Stack of [section name or None, JSON name, item iterator, head
+    # written]; section names are only built for objects with values, so
+    # deep nesting costs no quadratic name building
+    stack = [['', None, iter(dictionary.items()), False]]
+    # Section of the last section head
+    current = None
+    while stack:
+        frame = stack[-1]
+        for name, value in frame[2]:
+            if isinstance(value, dict):
+                stack.append([None, name, iter(value.items()), False])
+                if not value:
+                    # Keep empty objects as empty sections
+                    current = section_path(stack, separator)
+                    yield ('section_head', current, name)
+                break
+            path = section_path(stack, separator)
+            if path != current:
+                yield ('section_head', path, None if frame[3] else frame[1])
+                frame[3] = True
+                current = path
+            yield ('key_value_pair', (name, value), name)
+            for line_type, content in iter_continuations(value):
+                yield (line_type, content, None)
+        else:
+            stack.pop()
+
+
+def section_path(stack, separator):
+    """Return (and store) dotted section name of top frame of stack."""
+    frame = stack[-1]
+    if frame[0] is None:
+        frame[0] = separator.join(f[1] for f in stack[1:])
+    return frame[0]
+
+
+def unflatten(dictionary, separator=NESTED_SEPARATOR):
+    """Create nested dictionary from sections with dotted names.
+
+    Inverse of iter_flatten; keys of section '' are top-level values.
+    """
+    nested = {}
+    for section, values in dictionary.items():
+        if not isinstance(values, dict):
+            # Top-level value of a JSON document
+            nested[section] = values
+            continue
+        node = nested
+        if section != '':
+            for name in section.split(separator):
+                node = node.setdefault(name, {})
+                if not isinstance(node, dict):
+                    raise ValueError('Section [{}] conflicts with value '
+                                     '\'{}\''.format(section, name))
+        for key, value in values.items():
+            if isinstance(node.get(key), dict):
+                raise ValueError('Key \'{}\' of section [{}] conflicts '
+                                 'with section'.format(key, section))
+            node[key] = value
+    return nested
+
+
+class Section(object):
+    """Define section with key-value pairs and their line numbers."""
+
+    def __init__(self, name, line):
+        self.name = name
+        self.line = line
+        # Map key to tuple (value, line)
+        self.entries = {}
+        self._digest = None
+
+    def values(self):
+        """Return dict with keys and values."""
+        return {key: entry[0] for key, entry in self.entries.items()}
+
+    def digest(self):
+        """Return hash of sorted key-value pairs (line numbers ignored)."""
+        if self._digest is None:
+            h = hashlib.blake2b(digest_size=16)
+            for key in sorted(self.entries):
+                h.update(json.dumps([key, value_str(self.entries[key][0])])
+                         .encode('utf-8'))
+            self._digest = h.digest()
+        return self._digest
+
+
 class Configuration(Config_settings):
     """Define generic configuration object."""
 
     def __init__(self, types, content, json, ini, comment_char, section_marker,
-                 assignment_char):
+                 assignment_char, lines=None, source=None, rawlines=None):
         super().__init__(comment_char, section_marker, assignment_char)
         self.types = types
         self.content = content
         self.json = json
         self.ini = ini
+        # Line numbers (starting at 1) of all entries
+        if lines is None and types is not None:
+            lines = list(range(1, len(types) + 1))
+        self.lines = lines
+        self.source = source
+        self.rawlines = rawlines
+        self._sections = None
 
     def to_dataframe(self):
-        """Create Pandas DataFrame with all information."""
+        """Create Pandas DataFrame with all information.
+
+        Not available for configurations read with a memory budget, whose
+        lines are spilled to disk (see statistics() for line counts).
+        """
+        if isinstance(self.types, spill.Record_column):
+            raise ValueError('DataFrame would hold all lines in memory; '
+                             'read configuration without memory budget')
+        # No 'JSON' column: the document has one entry per section, not
+        # one per line (see to_dict)
         cfg_dict = {
             'TYPE': self.types,
             'CONTENT': self.content,
-            'JSON': self.json,
             'INI': self.ini,
             }
         df = pd.DataFrame(cfg_dict)
@@ -578,17 +953,50 @@ class Configuration(Config_settings):
         df.index.name = 'LINE'
         return df
 
+    def to_dict(self, duplicates=None, report=None):
+        """Return dictionary with sections and key-value pairs.
+
+        With a duplicate policy (see records_to_dict), the dictionary is
+        built again from the parsed lines.
+        """
+        if duplicates is not None and self.types is not None:
+            return records_to_dict(zip(self.lines, self.types, self.content),
+                                   duplicates, report)
+        if self.json is None:
+            self.json = {name: section.values()
+                         for name, section in self.sections().items()}
+        return self.json
+
+    def sections(self):
+        """Return dict with section names and Section objects (cached)."""
+        if self._sections is not None:
+            return self._sections
+        sections = {}
+        section = None
+        for line_type, content, line in zip(self.types, self.content,
+                                            self.lines):
+            if line_type == 'section_head':
+                section = sections.get(content)
+                if section is None:
+                    section = Section(content, line)
+                    sections[content] = section
+            elif line_type == 'key_value_pair':
+                if section is None:
+                    # Pairs before the first section head (see
+                    # records_to_dict)
+                    section = sections[''] = Section('', None)
+                section.entries[content[0]] = (content[1], line)
+        self._sections = sections
+        return sections
+
     def count_types(self):
         """Return dict with frequencies of config-file line types."""
-        type_count = self.to_dataframe()['TYPE'].value_counts()
-        types = [
-            'comment',
-            'empty',
-            'section_head',
-            'key_value_pair',
-            'unknown'
-            ]
-        return dict(type_count.reindex(types, fill_value=0))
+        return dict(zip(st.TYPES,
+                        st.count_codes(st.type_codes(self.types)).tolist()))
+
+    def statistics(self, rawlines=None):
+        """Return line statistics (type counts, section keys)."""
+        return st.Line_statistics(self.types, self.content, rawlines)
 
 
 # def import_json(filename):
@@ -615,52 +1023,216 @@ class Configuration(Config_settings):
 #             list1.append(pair)
 #     return list1
 
+# Policies for duplicate keys
+DUPLICATE_POLICIES = ('error', 'first', 'last', 'list')
+
+
+class Duplicate(object):
+    """Define repeated section head or key with line numbers."""
+
+    def __init__(self, section, key, line, first_line):
+        self.section = section
+        # None for repeated section heads
+        self.key = key
+        self.line = line
+        self.first_line = first_line
+
+    def __str__(self):
+        if self.key is None:
+            return 'line {}: section [{}] already defined in line {}'.format(
+                self.line, self.section, self.first_line)
+        return 'line {}: key \'{}\' of section [{}] already defined in ' \
+            'line {}'.format(self.line, self.key, self.section,
+                             self.first_line)
+
+
+class Duplicate_error(ValueError):
+    """Define error raised by duplicate policy 'error'."""
+
+    def __init__(self, duplicate):
+        super().__init__(str(duplicate))
+        self.duplicate = duplicate
+
+
+def records_to_dict(records, duplicates='last', report=None):
+    """Create dictionary from records (line, line type, content).
+
+    Key-value pairs before the first section head go into section ''
+    (top-level values, see iter_flatten). Repeated sections are merged.
+    Repeated keys are handled by policy
+    duplicates: 'error' (raise Duplicate_error, also for repeated
+    sections), 'first' or 'last' (keep first or last value) or 'list'
+    (collect all values in a list). If report is a list, Duplicate objects
+    are appended to it.
+    """
+    if duplicates not in DUPLICATE_POLICIES:
+        raise ValueError('Unknown duplicate policy: \'{}\''.format(
+            duplicates))
+    dictionary = {}
+    # Line numbers of section heads and keys, for reporting duplicates
+    section_lines = {}
+    all_key_lines = {}
+    key_lines = None
+    section = None
+    # Keys whose values were collected into a list
+    listed = set()
+    for line, line_type, content in records:
+        if line_type == 'key_value_pair' and section is None:
+            section = dictionary[''] = {}
+            key_lines = all_key_lines[''] = {}
+            section_lines[''] = line
+            name = ''
+        if line_type == 'section_head':
+            if content in dictionary:
+                duplicate = Duplicate(content, None, line,
+                                      section_lines[content])
+                if duplicates == 'error':
+                    raise Duplicate_error(duplicate)
+                if report is not None:
+                    report.append(duplicate)
+                section = dictionary[content]
+                key_lines = all_key_lines[content]
+            else:
+                section = dictionary[content] = {}
+                key_lines = all_key_lines[content] = {}
+                section_lines[content] = line
+            name = content
+        elif line_type == 'key_value_pair':
+            key, value = content
+            if key not in section:
+                section[key] = value
+                key_lines[key] = line
+                continue
+            duplicate = Duplicate(name, key, line, key_lines[key])
+            if duplicates == 'error':
+                raise Duplicate_error(duplicate)
+            if report is not None:
+                report.append(duplicate)
+            if duplicates == 'last':
+                section[key] = value
+            elif duplicates == 'list':
+                if (name, key) in listed:
+                    section[key].append(value)
+                else:
+                    section[key] = [section[key], value]
+                    listed.add((name, key))
+    return dictionary
+
+
+def value_str(value):
+    """Return string representation of INI or JSON value."""
+    if isinstance(value, str):
+        return value
+    return json.dumps(value)
+
+
+def iter_continuations(value):
+    """Yield continuation records of the further lines of a value."""
+    if isinstance(value, str) and '\n' in value:
+        for line in value.split('\n')[1:]:
+            yield ('continuation', line)
+
+
+def load_configuration(file_path, comment_char='#', section_marker='[]',
+                       assignment_char='=', verbose=False, max_memory=None):
+    """Read configuration file into generic configuration object.
+
+    With max_memory (bytes), raw lines, parsed lines and INI lines are kept
+    in spill.Record_buffer objects sharing about this budget.
+    """
+    config_file = Config_file(file_path, verbose)
+    if config_file.format == 'unknown':
+        raise ValueError('Unknown file format: \'{}\''.format(file_path))
+    settings = (comment_char, section_marker, assignment_char)
+    backend = formats.backend(config_file.format)
+    if max_memory is None:
+        rawlines = config_file.to_list()
+        lines, types, content = formats.columns(backend.parse_stream(
+            config_file, rawlines, *settings))
+        ini = formatted(types, content, False, False, False, *settings)
+    else:
+        budget = spill.budget(max_memory, 3)
+        rawlines = spill.buffered(config_file.iter_lines(), budget)
+        records = spill.buffered(backend.parse_stream(
+            config_file, rawlines, *settings), budget)
+        lines, types, content = (records.column(i) for i in range(3))
+        ini = spill.buffered(iter_formatted(types, content, False, False,
+                                            False, *settings), budget)
+    dictionary = None
+    if backend.NESTED is True:
+        dictionary = backend.to_dict(config_file, rawlines)
+    return Configuration(types, content, dictionary, ini, *settings,
+                         lines=lines, source=file_path, rawlines=rawlines)
+
+
 def skip_mark(types_list, skip_comments, skip_empty, skip_unknown):
-    skip_dict = {
-        'TYPE': types_list,
-        'SKIP': 'False',
-        }
-    types_df = pd.DataFrame(skip_dict)
-    types_df.index.name = 'LINE'
-    if skip_comments is True:
-        types_df.loc[types_df['TYPE'] == 'comment', 'SKIP'] = 'True'
-    if skip_empty is True:
-        types_df.loc[types_df['TYPE'] == 'empty', 'SKIP'] = 'True'
-    if skip_unknown is True:
-        types_df.loc[types_df['TYPE'] == 'unknown', 'SKIP'] = 'True'
-    return types_df['SKIP'].tolist()
+    """Return list of 'True'/'False' strings marking lines to be skipped."""
+    mask = st.skip_mask(st.type_codes(types_list), skip_comments, skip_empty,
+                        skip_unknown)
+    return np.where(mask, 'True', 'False').tolist()
 
 
 def formatted(types, content, skip_comments, skip_empty, skip_unknown,
               comment_char, section_marker, assignment_char):
     """Create nicely formatted config-file lines."""
-    clean_lines = []
-    for line_type, content in zip(types, content):
+    return list(iter_formatted(types, content, skip_comments, skip_empty,
+                               skip_unknown, comment_char, section_marker,
+                               assignment_char))
+
+
+def iter_formatted(types, content, skip_comments, skip_empty, skip_unknown,
+                   comment_char, section_marker, assignment_char):
+    """Yield nicely formatted config-file lines (one per record)."""
+    records = zip(types, content)
+    following = next(records, None)
+    while following is not None:
+        line_type, content = following
+        # Type of next line, for continued values
+        following = next(records, None)
+        next_type = None if following is None else following[0]
         if line_type == 'comment':
             if skip_comments is True:
-                clean_lines.append('**skip**')
+                yield '**skip**'
             else:
-                clean_lines.append('{} {}'.format(comment_char, content))
+                yield '{} {}'.format(comment_char, content)
         elif line_type == 'empty':
             if skip_empty is True:
-                clean_lines.append('**skip**')
+                yield '**skip**'
             else:
-                clean_lines.append('')
+                yield ''
         elif line_type == 'section_head':
             sec_line = '{} {}'.format(section_marker[0], content)
             if len(section_marker) == 2:
                 sec_line = sec_line + ' ' + section_marker[1]
-            clean_lines.append(sec_line)
+            yield sec_line
         elif line_type == 'key_value_pair':
-            clean_lines.append('{} {} {}'.format(content[0],
-                                                 assignment_char,
-                                                 content[1]))
+            key, value = content
+            if isinstance(value, str):
+                if '\n' in value:
+                    # Further lines are written by the continuation records
+                    value = value[:value.index('\n')]
+                if (value[:1] in QUOTES or value[-1:] == '\\' or
+                        value != value.strip()):
+                    value = quoted(value)
+            else:
+                # JSON value
+                value = value_str(value)
+            if assignment_char in key or '\\' in key:
+                key = escaped_key(key, assignment_char)
+            kv_line = '{} {} {}'.format(key, assignment_char, value)
+            if next_type == 'continuation':
+                kv_line += ' \\'
+            yield kv_line
+        elif line_type == 'continuation':
+            if next_type == 'continuation':
+                yield '    {} \\'.format(content)
+            else:
+                yield '    ' + content
         else:
             if skip_unknown is True:
-                clean_lines.append('**skip**')
+                yield '**skip**'
             else:
-                clean_lines.append(content)
-    return clean_lines
+                yield content
 
 
 # def ini_to_dataframe(lines_list, comment_char, section_marker, assignment_char):
@@ -703,21 +1275,108 @@ def listtofile(outfile, lines):
     -------
     None.
     """
-    with open(outfile, 'w', encoding='utf-8') as f:
+    with streams.open_output(outfile) as f:
         for line in lines:
             f.write(line + '\n')
 
 
-def dict_to_json(outfile, settings_dict):
-    """Write config file."""
-    with open(outfile, 'w') as f:
+def dict_to_json(outfile, settings_dict, stdout=None):
+    """Write config file ('-' = stdout)."""
+    with streams.open_output(outfile, stdout=stdout) as f:
         json.dump(settings_dict, f, indent=4)
+        if outfile == '-':
+            f.write('\n')
+
 
+def ini_to_json_stream(rawlines, out, comment_char='#', section_marker='[]',
+                       assignment_char='='):
+    """Write JSON representation of INI lines while reading them.
 
-def printlist(rawlines):
-    """Print all lines."""
+    Output matches dict_to_json. Sections are written as they are read, so
+    a repeated section or key raises Duplicate_error (merging them needs
+    the whole file, see records_to_dict). Each finished section is
+    flushed.
+    """
+    cfg_ini = Configuration_INI(rawlines, False, False, False, comment_char,
+                                section_marker, assignment_char)
+    out.write('{')
+    # None: no section yet, True: section without keys yet
+    section_empty = None
+    # Line numbers of section heads, and of keys of the current section
+    section_lines = {}
+    key_lines = {}
+    for line, (line_type, content) in enumerate(cfg_ini.iter_parse(),
+                                                start=1):
+        if line_type == 'key_value_pair' and section_empty is None:
+            # Pairs before the first section head go into section ''
+            records = (('section_head', ''), (line_type, content))
+        else:
+            records = ((line_type, content),)
+        for line_type, content in records:
+            if line_type == 'section_head':
+                if content in section_lines:
+                    raise Duplicate_error(Duplicate(
+                        content, None, line, section_lines[content]))
+                section_lines[content] = line
+                name = content
+                key_lines = {}
+                if section_empty is None:
+                    out.write('\n    ')
+                else:
+                    out.write('}' if section_empty else '\n    }')
+                    out.write(',\n    ')
+                    out.flush()
+                out.write(json.dumps(content) + ': {')
+                section_empty = True
+            elif line_type == 'key_value_pair':
+                if content[0] in key_lines:
+                    raise Duplicate_error(Duplicate(
+                        name, content[0], line, key_lines[content[0]]))
+                key_lines[content[0]] = line
+                out.write('\n        ' if section_empty else ',\n        ')
+                out.write(json.dumps(content[0]) + ': ' +
+                          json.dumps(content[1]))
+                section_empty = False
+    if section_empty is None:
+        out.write('}\n')
+    else:
+        out.write('}' if section_empty else '\n    }')
+        out.write('\n}\n')
+    out.flush()
+
+
+def printlist(rawlines, chunk_size=4096):
+    """Print all lines, written in chunks of lines."""
+    write = sys.stdout.write
+    chunk = []
     for line in rawlines:
-        print(line)
+        chunk.append(line)
+        if len(chunk) == chunk_size:
+            # Trailing empty string adds the final line break
+            chunk.append('')
+            write('\n'.join(chunk))
+            chunk = []
+    if chunk:
+        chunk.append('')
+        write('\n'.join(chunk))
+
+
+def parse_table(types, content, ini, lines):
+    """Yield fixed-width table lines with parsing result per line.
+
+    Line numbers of None (e.g. repeated JSON section heads) are left blank.
+    """
+    row = '{:>7}  {:<14}  {:<32}  {}'
+    yield row.format('LINE', 'TYPE', 'CONTENT', 'INI')
+    for line, line_type, line_content, ini_line in zip(lines, types, content,
+                                                       ini):
+        if line is None:
+            line = ''
+        if type(line_content) is tuple:
+            line_content = '({}, {})'.format(*line_content)
+        # Keep one table row per line for continued values
+        line_content = str(line_content).replace('\n', '\\n')
+        yield row.format(line, line_type, line_content, ini_line)
 
 
 def printdict(dictionary):
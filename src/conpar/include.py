@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Resolve 'include = other.ini' directives into stacked configurations.
+
+Include directives are key-value pairs with key INCLUDE_KEY before the
+first section head of an INI file. Paths are relative to the including
+file. Included files are lower layers: the including file overrides them,
+and later includes override earlier ones.
+
+Only 'conpar merge -n' resolves includes; 'read' and 'convert' show the
+directives as keys of section ''.
+"""
+
+import os
+import cache as ch
+import merge
+
+
+# Key of include directives
+INCLUDE_KEY = 'include'
+
+# Parse cache shared by all top-level files of this process
+SHARED_CACHE = ch.Parse_cache()
+
+
+class Include_error(ValueError):
+    """Define error for missing included files and include cycles."""
+
+
+def include_directives(cfg):
+    """Yield tuples (path, line) of include directives of configuration."""
+    for line_type, content, line in zip(cfg.types, cfg.content, cfg.lines):
+        if line_type == 'section_head':
+            break
+        if line_type == 'key_value_pair' and content[0] == INCLUDE_KEY:
+            yield (content[1], line)
+
+
+class Included_configuration(merge.Layered_configuration):
+    """Define merged configuration of a file and its includes.
+
+    Include directives are pairs before the first section head, i.e. in
+    section '', but no values: they are left out of that section.
+    """
+
+    def _chain(self, section):
+        chain = self._chains.get(section)
+        if chain is None:
+            chain = super()._chain(section)
+            if section == '':
+                chain.maps[1:] = [{key: entry for key, entry
+                                   in entries.items() if key != INCLUDE_KEY}
+                                  for entries in chain.maps[1:]]
+        return chain
+
+    def section_names(self):
+        return [name for name in super().section_names()
+                if name != '' or len(self._chain(name)) > 0]
+
+
+def resolve_layers(file_path, comment_char='#', section_marker='[]',
+                   assignment_char='=', cache=None):
+    """Return list of configurations of file and its includes.
+
+    Layers are ordered from lowest to highest priority; a file included
+    several times appears once, at its first position.
+    """
+    if cache is None:
+        cache = SHARED_CACHE
+    settings = (comment_char, section_marker, assignment_char)
+    layers = []
+    # Real paths of files already added as layers
+    added = set()
+
+    def visit(path, chain):
+        real_path = os.path.realpath(path)
+        if real_path in chain:
+            cycle = chain[chain.index(real_path):] + (real_path,)
+            raise Include_error('Include cycle: {}'.format(
+                ' -> '.join(cycle)))
+        if real_path in added:
+            return
+        cfg = cache.get(path, *settings)
+        for target, line in include_directives(cfg):
+            target = os.path.join(os.path.dirname(path), target)
+            if not os.path.isfile(target):
+                raise Include_error('Included file not found: \'{}\' '
+                                    '({}, line {})'.format(target, path, line))
+            visit(target, chain + (real_path,))
+        added.add(real_path)
+        layers.append(cfg)
+
+    visit(file_path, ())
+    return layers
+
+
+def load_with_includes(file_path, comment_char='#', section_marker='[]',
+                       assignment_char='=', cache=None):
+    """Read file with includes into Included_configuration."""
+    return Included_configuration(resolve_layers(
+        file_path, comment_char, section_marker, assignment_char, cache))
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Persistent inverted index of section/key/value over a config tree."""
+
+import os
+import streams
+import store as st
+
+
+# Name of index file created in the indexed directory
+INDEX_FILE = '.conpar_index.sqlite'
+
+# File-name extensions of indexed configuration files
+EXTENSIONS = ('.ini', '.json', '.conf', '.cfg')
+
+
+def find_files(directory, extensions=EXTENSIONS):
+    """Return sorted list of config-file paths relative to directory."""
+    paths = []
+    for root, dirs, files in os.walk(directory):
+        # Skip hidden directories
+        dirs[:] = [d for d in dirs if not d.startswith('.')]
+        for name in files:
+            if streams.config_extension(name) in extensions:
+                paths.append(os.path.relpath(os.path.join(root, name),
+                                             directory))
+    return sorted(paths)
+
+
+class Config_index(st.Config_store):
+    """Define inverted index of a directory tree of config files."""
+
+    # Index files keep the rollback journal (no -wal and -shm files in the
+    # indexed directory)
+    JOURNAL_MODE = None
+
+    def __init__(self, directory, index_file=None):
+        self.directory = directory
+        if index_file is None:
+            index_file = os.path.join(directory, INDEX_FILE)
+        self.index_file = index_file
+        super().__init__(index_file)
+
+    def update(self, comment_char='#', section_marker='[]',
+               assignment_char='='):
+        """Re-index new and changed files, drop removed files.
+
+        Return tuple (number of indexed files, number of removed files).
+        """
+        return self.ingest(find_files(self.directory), self.directory, True,
+                           comment_char, section_marker, assignment_char)
+
+
+def format_results(rows):
+    """Create lines 'path:line: [section] key = value'."""
+    return ['{}:{}: [{}] {} = {}'.format(*row) for row in rows]
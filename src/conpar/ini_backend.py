@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""INI backend of the format registry (see formats.py)."""
+
+import functions as fn
+
+
+# Dictionaries are built from the parsed lines
+NESTED = False
+
+
+def accepts(config_file):
+    """Check if file is INI."""
+    return config_file.is_ini()
+
+
+def parse_stream(config_file, rawlines=None, comment_char='#',
+                 section_marker='[]', assignment_char='=', first_line=1):
+    """Yield records (line, line type, content) while lines are read."""
+    if rawlines is None:
+        rawlines = config_file.iter_lines()
+    cfg_ini = fn.Configuration_INI(rawlines, False, False, False,
+                                   comment_char, section_marker,
+                                   assignment_char)
+    for line, (line_type, content) in enumerate(cfg_ini.iter_parse(),
+                                                start=first_line):
+        yield (line, line_type, content)
+
+
+def to_dict(config_file, rawlines=None, duplicates='last', report=None,
+            first_line=1, comment_char='#', section_marker='[]',
+            assignment_char='='):
+    """Return dictionary built in a single parse pass."""
+    return fn.records_to_dict(parse_stream(config_file, rawlines,
+                                           comment_char, section_marker,
+                                           assignment_char, first_line),
+                              duplicates, report)
+
+
+def stream_json(config_file, out, comment_char='#', section_marker='[]',
+                assignment_char='='):
+    """Write JSON representation while the file is read."""
+    fn.ini_to_json_stream(config_file.iter_lines(), out, comment_char,
+                          section_marker, assignment_char)
+
+
+STREAM_JSON = stream_json
+
+
+def emit(dictionary, out, comment_char='#', section_marker='[]',
+         assignment_char='='):
+    """Write dictionary as INI lines (nested sections flattened).
+
+    Top-level values (section '') are written first, without section head.
+    """
+    top = []
+    nested = []
+    section = None
+    for line_type, line_content, name in fn.iter_flatten(dictionary):
+        if line_type == 'section_head':
+            section = line_content
+            if section == '':
+                continue
+        if section == '':
+            top.append((line_type, line_content))
+        else:
+            nested.append((line_type, line_content))
+    types = []
+    content = []
+    for line_type, line_content in top + nested:
+        if line_type == 'section_head' and types:
+            # Blank line between sections
+            types.append('empty')
+            content.append('')
+        types.append(line_type)
+        content.append(line_content)
+    for line in fn.iter_formatted(types, content, False, False, False,
+                                  comment_char, section_marker,
+                                  assignment_char):
+        out.write(line + '\n')
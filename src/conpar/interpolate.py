@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Lazy ${section:key} and ${ENV} interpolation with memoized resolution.
+
+References:
+    ${section:key}  value of key in section
+    ${name}         value of key in the same section, else environment
+                    variable name
+    $$              literal '$'
+"""
+
+import os
+import re
+import functions as fn
+
+
+# '$$' or '${...}' (no nesting, so matching is linear)
+REFERENCE = re.compile(r'\$(?:(\$)|\{([^${}]*)\})')
+
+
+class Interpolation_error(ValueError):
+    """Define error for undefined references and reference cycles."""
+
+
+class Interpolator(object):
+    """Define lazily resolved view over a Configuration object."""
+
+    def __init__(self, configuration, environ=None):
+        self.sections = configuration.sections()
+        if environ is None:
+            environ = os.environ
+        self.environ = environ
+        # Map (section, key) to resolved value
+        self.resolved = {}
+        # Map (section, key) to list of referenced (section, key) tuples
+        self._dependencies = {}
+
+    def _entry(self, node):
+        """Return tuple (raw value, line) of (section, key)."""
+        section, key = node
+        try:
+            return self.sections[section].entries[key]
+        except KeyError:
+            raise KeyError('[{}] {}'.format(section, key)) from None
+
+    def _target(self, node, name):
+        """Return referenced (section, key), or None for environment."""
+        section, separator, key = name.partition(':')
+        if separator == '':
+            # ${name}: key of the same section or environment variable
+            if name in self.sections[node[0]].entries:
+                return (node[0], name)
+            return None
+        if section in self.sections and key in self.sections[section].entries:
+            return (section, key)
+        raise Interpolation_error('Undefined reference ${{{}}} in [{}] {} '
+                                  '(line {})'.format(name, node[0], node[1],
+                                                     self._entry(node)[1]))
+
+    def dependencies(self, node):
+        """Return list of (section, key) tuples referenced by node."""
+        dependencies = self._dependencies.get(node)
+        if dependencies is None:
+            value = self._entry(node)[0]
+            dependencies = []
+            if isinstance(value, str):
+                for match in REFERENCE.finditer(value):
+                    if match.group(2) is not None:
+                        target = self._target(node, match.group(2))
+                        if target is not None:
+                            dependencies.append(target)
+            self._dependencies[node] = dependencies
+        return dependencies
+
+    def _substitute(self, node):
+        """Replace references of node whose dependencies are resolved."""
+        value = self._entry(node)[0]
+        if not isinstance(value, str):
+            return value
+
+        def replace(match):
+            if match.group(1) is not None:
+                return '$'
+            name = match.group(2)
+            target = self._target(node, name)
+            if target is not None:
+                # JSON values (numbers, booleans, ...) as in INI output
+                return fn.value_str(self.resolved[target])
+            if name not in self.environ:
+                raise Interpolation_error(
+                    'Undefined reference ${{{}}} in [{}] {} (line {})'
+                    .format(name, node[0], node[1], self._entry(node)[1]))
+            return self.environ[name]
+        return REFERENCE.sub(replace, value)
+
+    def get(self, section, key):
+        """Return resolved value (resolving referenced keys once each)."""
+        node = (section, key)
+        if node in self.resolved:
+            return self.resolved[node]
+        self._entry(node)
+        # Iterative depth-first resolution; stack holds the current path
+        stack = [node]
+        on_stack = {node}
+        while stack:
+            current = stack[-1]
+            pending = None
+            for dependency in self.dependencies(current):
+                if dependency not in self.resolved:
+                    pending = dependency
+                    break
+            if pending is None:
+                self.resolved[current] = self._substitute(current)
+                stack.pop()
+                on_stack.discard(current)
+            elif pending in on_stack:
+                cycle = stack[stack.index(pending):] + [pending]
+                raise Interpolation_error('Reference cycle: {}'.format(
+                    ' -> '.join('[{}] {}'.format(*n) for n in cycle)))
+            else:
+                stack.append(pending)
+                on_stack.add(pending)
+        return self.resolved[node]
+
+    def to_dict(self):
+        """Create dictionary with resolved values of all sections."""
+        return {name: {key: self.get(name, key) for key in section.entries}
+                for name, section in self.sections.items()}
@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""JSON backend of the format registry (see formats.py)."""
+
+import json
+import functions as fn
+
+
+# Dictionaries are the parsed documents themselves
+NESTED = True
+
+# JSON input is parsed as a whole
+STREAM_JSON = None
+
+
+def accepts(config_file):
+    """Check if file is JSON."""
+    return config_file.is_json()
+
+
+def parse_stream(config_file, rawlines=None, comment_char='#',
+                 section_marker='[]', assignment_char='=', first_line=1):
+    """Yield records (line, line type, content) of flattened document.
+
+    Line numbers of section heads and keys are looked up in rawlines (or
+    the file text); first_line is not used.
+    """
+    if rawlines is None:
+        text = config_file.read_text()
+    else:
+        text = '\n'.join(rawlines)
+    cfg_json = fn.Configuration_JSON(config_file.to_dict())
+    lines = cfg_json.get_lines(text)
+    for line, (line_type, content, name) in zip(
+            lines, fn.iter_flatten(cfg_json.dictionary)):
+        yield (line, line_type, content)
+
+
+def to_dict(config_file, rawlines=None, duplicates='last', report=None,
+            first_line=1, comment_char='#', section_marker='[]',
+            assignment_char='='):
+    """Return parsed document (JSON objects have no duplicate keys)."""
+    return config_file.to_dict()
+
+
+def emit(dictionary, out, comment_char='#', section_marker='[]',
+         assignment_char='='):
+    """Write dictionary as indented JSON."""
+    json.dump(dictionary, out, indent=4)
+    out.write('\n')
@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Line-offset index for random access into large config files."""
+
+import json
+import os
+import re
+import numpy as np
+import encoding as enc
+import streams
+
+
+# Size of blocks read while scanning for line breaks
+BLOCK_SIZE = 1 << 20
+
+# Sidecar index file: SIDECAR_MAGIC, JSON header line, raw offset array
+SIDECAR_SUFFIX = '.conpar-idx'
+SIDECAR_MAGIC = b'CONPAR-IDX 1\n'
+
+
+def parse_range(text):
+    """Convert 'start:stop' (1-based, inclusive, both optional) to tuple."""
+    start, separator, stop = text.partition(':')
+    if separator == '':
+        # Single line number
+        stop = start
+    try:
+        start = int(start) if start.strip() != '' else 1
+        stop = int(stop) if stop.strip() != '' else None
+    except ValueError:
+        raise ValueError('Invalid line range: \'{}\''.format(text)) from None
+    if start < 1 or (stop is not None and stop < start):
+        raise ValueError('Invalid line range: \'{}\''.format(text))
+    return (start, stop)
+
+
+def section_pattern(section_marker='[]'):
+    """Compile byte pattern matching section-head lines."""
+    opening = re.escape(section_marker[0].encode('utf-8'))
+    if len(section_marker) == 2:
+        closing = re.escape(section_marker[1].encode('utf-8'))
+    else:
+        closing = b''
+    return re.compile(rb'^[ \t]*' + opening + rb'([^\r\n]*)' + closing +
+                      rb'[ \t\r]*$', re.MULTILINE)
+
+
+class Line_index(object):
+    """Define byte offsets of line starts and section heads of a file."""
+
+    def __init__(self, file_path, offsets, size, sections, mtime_ns=None,
+                 section_marker='[]', file_size=None):
+        self.file_path = file_path
+        # Byte offset of each line start, followed by the file size
+        self.offsets = offsets
+        self.size = size
+        # List of tuples (section name, line number starting at 1)
+        self.sections = sections
+        self.mtime_ns = mtime_ns
+        self.section_marker = section_marker
+        # Size on disk (differs from size for compressed files)
+        if file_size is None:
+            file_size = size
+        self.file_size = file_size
+        # Stream kept open between reads (decompressing for compressed files)
+        self._stream = None
+
+    def close(self):
+        """Close stream of file."""
+        if self._stream is not None:
+            self._stream.close()
+            self._stream = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    @classmethod
+    def build(cls, file_path, section_marker='[]'):
+        """Scan file once for line breaks and section heads."""
+        pattern = section_pattern(section_marker)
+        stat = os.stat(file_path)
+        chunks = [np.zeros(1, np.int64)]
+        heads = []
+        # Blocks are cut after their last line break; the rest is carried
+        carry = b''
+        position = 0
+        with streams.open_input(file_path) as f:
+            while True:
+                block = f.read(BLOCK_SIZE)
+                data = carry + block
+                if block:
+                    cut = data.rfind(b'\n') + 1
+                else:
+                    cut = len(data)
+                chunk = data[:cut]
+                carry = data[cut:]
+                breaks = np.flatnonzero(np.frombuffer(chunk, np.uint8) == 10)
+                chunks.append(breaks.astype(np.int64) + (position + 1))
+                for m in pattern.finditer(chunk):
+                    heads.append((position + m.start(), m.group(1)))
+                position += cut
+                if not block:
+                    break
+        offsets = np.concatenate(chunks)
+        # Drop start of the empty 'line' after a final line break (or of
+        # the only 'line' of an empty file)
+        if offsets[-1] == position:
+            offsets = offsets[:-1]
+        offsets = np.append(offsets, position)
+        sections = []
+        if heads:
+            starts = np.array([start for start, name in heads], np.int64)
+            lines = np.searchsorted(offsets[:-1], starts, side='right')
+            sections = [(name.decode('utf-8', 'replace').strip(), int(line))
+                        for (start, name), line in zip(heads, lines)]
+        return cls(file_path, offsets, position, sections, stat.st_mtime_ns,
+                   section_marker, stat.st_size)
+
+    @classmethod
+    def open(cls, file_path, section_marker='[]'):
+        """Load valid sidecar index, or build index and save sidecar."""
+        index = cls.load(file_path, section_marker)
+        if index is None:
+            index = cls.build(file_path, section_marker)
+            try:
+                index.save()
+            except OSError:
+                # Directory not writable; use index without sidecar
+                pass
+        return index
+
+    @classmethod
+    def load(cls, file_path, section_marker='[]'):
+        """Load sidecar index if it matches file size and mtime."""
+        stat = os.stat(file_path)
+        try:
+            with open(file_path + SIDECAR_SUFFIX, 'rb') as f:
+                if f.readline() != SIDECAR_MAGIC:
+                    return None
+                header = json.loads(f.readline())
+                if (header['file_size'] != stat.st_size or
+                        header['mtime_ns'] != stat.st_mtime_ns or
+                        header['section_marker'] != section_marker):
+                    return None
+                offsets = np.frombuffer(f.read(), dtype=header['dtype'])
+        except (OSError, ValueError, KeyError):
+            return None
+        if header.get('delta') is True:
+            # Line lengths were stored instead of offsets
+            offsets = np.concatenate([np.zeros(1, np.int64),
+                                      np.cumsum(offsets, dtype=np.int64)])
+        if len(offsets) != header['lines'] + 1:
+            return None
+        sections = [tuple(section) for section in header['sections']]
+        return cls(file_path, offsets.astype(np.int64), header['size'],
+                   sections, header['mtime_ns'], section_marker,
+                   header['file_size'])
+
+    def save(self):
+        """Write sidecar index next to the file."""
+        lengths = np.diff(self.offsets)
+        if len(lengths) == 0 or lengths.max() < 2**16:
+            # Store line lengths with 2 bytes per line
+            data = lengths.astype('<u2')
+            delta = True
+        elif self.size < 2**32:
+            data = self.offsets.astype('<u4')
+            delta = False
+        else:
+            data = self.offsets.astype('<i8')
+            delta = False
+        header = {
+            'size': self.size,
+            'file_size': self.file_size,
+            'mtime_ns': self.mtime_ns,
+            'section_marker': self.section_marker,
+            'lines': self.num_lines(),
+            'dtype': data.dtype.str,
+            'delta': delta,
+            'sections': self.sections,
+            }
+        sidecar = self.file_path + SIDECAR_SUFFIX
+        # Write to temporary file first so readers never see partial files
+        temp = sidecar + '.tmp'
+        with open(temp, 'wb') as f:
+            f.write(SIDECAR_MAGIC)
+            f.write(json.dumps(header).encode('utf-8') + b'\n')
+            f.write(data.tobytes())
+        os.replace(temp, sidecar)
+
+    def num_lines(self):
+        """Return number of lines."""
+        return len(self.offsets) - 1
+
+    def section_range(self, name):
+        """Return tuple (first line, last line) of section (first match)."""
+        for i, (section, line) in enumerate(self.sections):
+            if section == name:
+                if i + 1 < len(self.sections):
+                    return (line, self.sections[i + 1][1] - 1)
+                return (line, self.num_lines())
+        raise KeyError('Section not found: \'{}\''.format(name))
+
+    def read_lines(self, start, stop=None):
+        """Read lines start to stop (1-based, inclusive) by seeking."""
+        if stop is None or stop > self.num_lines():
+            stop = self.num_lines()
+        if start > stop:
+            return []
+        begin = int(self.offsets[start - 1])
+        end = int(self.offsets[stop])
+        if self._stream is None:
+            self._stream = streams.open_input(self.file_path)
+        # Compressed streams emulate seeking by decompressing; reads further
+        # on continue from the current position
+        self._stream.seek(begin)
+        data = self._stream.read(end - begin)
+        text, encoding = enc.decode(data)
+        return [line.rstrip() for line in
+                text.split('\n')[:stop - start + 1]]
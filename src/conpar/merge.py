@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Merge stacked configurations with overlay semantics."""
+
+from collections import ChainMap
+import functions as fn
+
+
+class Layered_configuration(object):
+    """Define effective configuration of stacked configuration layers.
+
+    Layers are given from lowest to highest priority. Sections are ChainMap
+    views over the Section entries of all layers, so layers shared between
+    many merged configurations are never copied. Values set on the merged
+    configuration go into a local top layer (copy-on-write).
+    """
+
+    def __init__(self, layers):
+        self.layers = list(layers)
+        # Local overrides: section name -> {key: (value, None)}
+        self.local = {}
+        self._chains = {}
+
+    def section_names(self):
+        """Return list of section names in order of first appearance."""
+        names = {}
+        for layer in self.layers:
+            for name in layer.sections():
+                names[name] = None
+        for name, entries in self.local.items():
+            if entries:
+                names[name] = None
+        return list(names)
+
+    def _chain(self, section):
+        """Return ChainMap over all layers containing section."""
+        chain = self._chains.get(section)
+        if chain is None:
+            maps = [self.local.setdefault(section, {})]
+            sources = ['<local>']
+            for layer in reversed(self.layers):
+                layer_section = layer.sections().get(section)
+                if layer_section is not None:
+                    maps.append(layer_section.entries)
+                    sources.append(layer.source)
+            chain = ChainMap(*maps)
+            chain.sources = sources
+            self._chains[section] = chain
+        return chain
+
+    def get(self, section, key, default=None):
+        """Return effective value of key in section."""
+        entry = self._chain(section).get(key)
+        if entry is None:
+            return default
+        return entry[0]
+
+    def provenance(self, section, key):
+        """Return tuple (source, line) of layer defining effective value."""
+        chain = self._chain(section)
+        for entries, source in zip(chain.maps, chain.sources):
+            if key in entries:
+                return (source, entries[key][1])
+        return None
+
+    def set(self, section, key, value):
+        """Set value in local top layer without touching shared layers."""
+        self._chain(section)[key] = (value, None)
+
+    def overlay(self, configuration):
+        """Return new merged configuration with additional top layer."""
+        merged = type(self)(self.layers + [configuration])
+        # Local overrides stay on top of the new layer
+        for section, entries in self.local.items():
+            if entries:
+                merged.local[section] = dict(entries)
+        return merged
+
+    def items(self, section):
+        """Return dict with effective keys and values of section."""
+        return {key: entry[0]
+                for key, entry in self._chain(section).items()}
+
+    def to_dict(self):
+        """Create dictionary with effective sections and key-value pairs."""
+        return {section: self.items(section)
+                for section in self.section_names()}
+
+    def provenance_lines(self):
+        """Create lines '[section] key = value  # source:line'."""
+        lines = []
+        for section in self.section_names():
+            for key in self._chain(section):
+                source, line = self.provenance(section, key)
+                lines.append('[{}] {} = {}  # {}:{}'.format(
+                    section, key, fn.value_str(self.get(section, key)),
+                    source, line))
+        return lines
+
+
+def merge_configurations(*configurations):
+    """Stack Configuration objects (lowest priority first)."""
+    return Layered_configuration(configurations)
+
+
+def merge_files(file_paths, comment_char='#', section_marker='[]',
+                assignment_char='='):
+    """Read INI or JSON files and stack them (lowest priority first)."""
+    settings = (comment_char, section_marker, assignment_char)
+    return Layered_configuration([fn.load_configuration(path, *settings)
+                                  for path in file_paths])
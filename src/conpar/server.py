@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Long-running conpar server on a local Unix socket.
+
+Protocol: one JSON object per line in each direction.
+
+Requests:
+    {"command": "cli", "argv": [...], "cwd": "..."}
+        Run conpar with command-line arguments (read, convert, diff, merge).
+    {"command": "query", "infile": "...", "section": "...", "key": "..."}
+        Return a single value from a parsed configuration.
+
+Responses:
+    {"status": 0, "output": "..."} or {"status": 1, "error": "..."}
+"""
+
+import contextlib
+import io
+import json
+import os
+import signal
+import socket
+import socketserver
+import stat
+import sys
+import cache as ch
+import client
+import defaults as dflt
+import functions as fn
+
+
+class Request_handler(socketserver.StreamRequestHandler):
+    """Handle newline-delimited JSON requests of one client connection."""
+
+    def handle(self):
+        for line in self.rfile:
+            try:
+                request = json.loads(line)
+                response = self.server.execute(request)
+            except Exception as e:
+                response = {'status': 1, 'error': '{}: {}'.format(
+                    type(e).__name__, e)}
+            self.wfile.write(json.dumps(response).encode('utf-8') + b'\n')
+            self.wfile.flush()
+
+
+def remove_stale_socket(socket_path):
+    """Remove socket file left by a previous server that is not running.
+
+    Raise OSError if a server is listening or the file is no socket.
+    """
+    if not os.path.lexists(socket_path):
+        return
+    if not stat.S_ISSOCK(os.lstat(socket_path).st_mode):
+        raise OSError('Not a socket: \'{}\''.format(socket_path))
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        try:
+            sock.connect(socket_path)
+        except ConnectionRefusedError:
+            # Nobody listening: stale socket
+            os.remove(socket_path)
+            return
+    raise OSError('Server already running on \'{}\''.format(socket_path))
+
+
+class Conpar_server(socketserver.UnixStreamServer):
+    """Define Unix-socket server with a warm parse cache.
+
+    Requests are handled one after another, so changing the working
+    directory and redirecting stdout per request is safe.
+    """
+
+    def __init__(self, socket_path, build_parser, run):
+        self.socket_path = socket_path
+        self.parser = build_parser()
+        self.run = run
+        self.cache = ch.Parse_cache()
+        if os.path.dirname(socket_path) == dflt.socket_directory():
+            client.private_directory(os.path.dirname(socket_path), True)
+        remove_stale_socket(socket_path)
+        super().__init__(socket_path, Request_handler)
+
+    def execute(self, request):
+        """Execute single request and return response dict."""
+        command = request.get('command')
+        cwd = request.get('cwd')
+        if cwd is not None:
+            os.chdir(cwd)
+        if command == 'cli':
+            return self.execute_cli(request['argv'])
+        if command == 'query':
+            cfg = self.cache.get(request['infile'],
+                                 **request.get('settings', {}))
+            section = cfg.sections().get(request['section'])
+            if section is None or request['key'] not in section.entries:
+                return {'status': 1, 'error': 'Key not found'}
+            value, line = section.entries[request['key']]
+            return {'status': 0, 'output': fn.value_str(value) + '\n',
+                    'line': line}
+        return {'status': 1, 'error': 'Unknown command: {}'.format(command)}
+
+    def execute_cli(self, argv):
+        """Run conpar command line and capture its output."""
+        stdout = io.StringIO()
+        stderr = io.StringIO()
+        status = 0
+        with contextlib.redirect_stdout(stdout), \
+                contextlib.redirect_stderr(stderr):
+            try:
+                args = self.parser.parse_args(argv)
+                if args.command == 'serve':
+                    raise ValueError('Server is already running')
+                self.run(args, self.cache)
+            except SystemExit as e:
+                # Raised by argparse for --help, --version and usage errors,
+                # and by sys.exit('[error] ...') with the message as code
+                if e.code is None or isinstance(e.code, int):
+                    status = e.code or 0
+                else:
+                    print(e.code, file=sys.stderr)
+                    status = 1
+        return {'status': status, 'output': stdout.getvalue(),
+                'error': stderr.getvalue()}
+
+    def server_close(self):
+        super().server_close()
+        if os.path.exists(self.socket_path):
+            os.remove(self.socket_path)
+
+
+def interrupt(signum, frame):
+    """Handle signal by raising KeyboardInterrupt."""
+    raise KeyboardInterrupt
+
+
+def serve(socket_path, build_parser, run):
+    """Serve requests on Unix socket until interrupted."""
+    try:
+        server = Conpar_server(socket_path, build_parser, run)
+    except OSError as e:
+        sys.exit('[error] {}'.format(e))
+    # Stop on SIGTERM (e.g. from a service manager) as on Ctrl-C, so the
+    # socket file is removed when leaving the with block
+    previous = signal.signal(signal.SIGTERM, interrupt)
+    try:
+        with server:
+            print('[serve] Listening on \'{}\' ...'.format(socket_path))
+            try:
+                server.serve_forever()
+            except KeyboardInterrupt:
+                print('[serve] Stopped.')
+    finally:
+        signal.signal(signal.SIGTERM, previous)
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Immutable configuration snapshots shared between threads.
+
+A Snapshot is built once from a parsed configuration and never changes,
+so any number of threads can read it without locks. A Shared_configuration
+holds the current snapshot of a file; reloading parses the file into a new
+snapshot and swaps the reference, so readers see either the old or the new
+snapshot as a whole.
+"""
+
+import os
+import threading
+from types import MappingProxyType
+import functions as fn
+
+
+def freeze(value):
+    """Return read-only copy of value (dicts and lists frozen)."""
+    if isinstance(value, dict):
+        return MappingProxyType({key: freeze(item)
+                                 for key, item in value.items()})
+    if isinstance(value, list):
+        return tuple(freeze(item) for item in value)
+    return value
+
+
+def thaw(value):
+    """Return mutable copy of frozen value."""
+    if isinstance(value, MappingProxyType):
+        return {key: thaw(item) for key, item in value.items()}
+    if isinstance(value, tuple):
+        return [thaw(item) for item in value]
+    return value
+
+
+class Snapshot(object):
+    """Define immutable snapshot of a parsed configuration."""
+
+    def __init__(self, cfg, version=0, mtime_ns=None, size=None):
+        setattr_ = super().__setattr__
+        setattr_('source', cfg.source)
+        setattr_('version', version)
+        # File status the snapshot was parsed from
+        setattr_('mtime_ns', mtime_ns)
+        setattr_('size', size)
+        # Map section name to read-only map of key to (value, line)
+        setattr_('sections', MappingProxyType({
+            name: MappingProxyType({key: (freeze(value), line)
+                                    for key, (value, line)
+                                    in section.entries.items()})
+            for name, section in cfg.sections().items()}))
+        # Dictionary (nested for JSON files), built while still private
+        setattr_('_dict', freeze(cfg.to_dict()))
+
+    def __setattr__(self, name, value):
+        raise AttributeError('Snapshot is read-only')
+
+    def __delattr__(self, name):
+        raise AttributeError('Snapshot is read-only')
+
+    def get(self, section, key, default=None):
+        """Return value of key in section."""
+        entry = self.sections.get(section, {}).get(key)
+        if entry is None:
+            return default
+        return entry[0]
+
+    def line(self, section, key):
+        """Return line number of key in section, or None."""
+        entry = self.sections.get(section, {}).get(key)
+        if entry is None:
+            return None
+        return entry[1]
+
+    def to_dict(self):
+        """Return new mutable dictionary with sections and values."""
+        return thaw(self._dict)
+
+
+def load_snapshot(file_path, comment_char='#', section_marker='[]',
+                  assignment_char='=', version=0):
+    """Parse file into Snapshot."""
+    # File status before parsing, so a change while parsing is seen later
+    stat = os.stat(file_path)
+    cfg = fn.load_configuration(file_path, comment_char, section_marker,
+                                assignment_char)
+    return Snapshot(cfg, version, stat.st_mtime_ns, stat.st_size)
+
+
+class Shared_configuration(object):
+    """Define current snapshot of a file, reloaded and swapped atomically.
+
+    Readers call current() and keep using the returned snapshot; reloads
+    are serialized by a lock that readers never take.
+    """
+
+    def __init__(self, file_path, comment_char='#', section_marker='[]',
+                 assignment_char='='):
+        self.file_path = file_path
+        self.settings = (comment_char, section_marker, assignment_char)
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stop = threading.Event()
+        # Exception of the last failed reload (old snapshot kept)
+        self.error = None
+        self._snapshot = load_snapshot(file_path, *self.settings)
+
+    def current(self):
+        """Return current snapshot."""
+        return self._snapshot
+
+    def get(self, section, key, default=None):
+        """Return value of key in section of current snapshot."""
+        return self._snapshot.get(section, key, default)
+
+    def reload(self, force=False):
+        """Parse file again if changed; return True if swapped."""
+        with self._lock:
+            old = self._snapshot
+            stat = os.stat(self.file_path)
+            if (force is False and stat.st_mtime_ns == old.mtime_ns and
+                    stat.st_size == old.size):
+                return False
+            new = load_snapshot(self.file_path, *self.settings,
+                                version=old.version + 1)
+            # Single reference assignment: readers see old or new snapshot
+            self._snapshot = new
+            return True
+
+    def start(self, interval=1.0):
+        """Start thread reloading the file every interval seconds."""
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._poll, args=(interval,),
+                                        name='conpar-reload', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop background reloading."""
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _poll(self, interval):
+        while self._stop.wait(interval) is False:
+            try:
+                self.reload()
+                self.error = None
+            except Exception as e:
+                # Keep serving the last good snapshot and keep polling (an
+                # uncaught exception would end the thread silently)
+                self.error = e
@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Record buffers with a memory budget that spill to a temporary file.
+
+Records (raw lines, parsed line records or formatted lines) are kept in
+memory until their estimated size exceeds the budget of the buffer. Then
+the records held in memory are pickled as one chunk to an anonymous
+temporary file and released. Reading a buffer back loads one chunk at a
+time, so a buffer holds at most about twice its budget in memory.
+"""
+
+import bisect
+import pickle
+import re
+import tempfile
+
+
+# Estimated bytes of a tuple and of a string besides its characters
+TUPLE_OVERHEAD = 64
+STRING_OVERHEAD = 56
+# Estimated bytes of other values (line numbers, JSON numbers, ...)
+VALUE_SIZE = 32
+
+# Map size suffix to factor
+SIZE_UNITS = {'': 1, 'k': 1024, 'm': 1024 ** 2, 'g': 1024 ** 3}
+
+
+def parse_size(text):
+    """Return number of bytes of size such as '512M', '2g' or '65536'."""
+    match = re.fullmatch(r'\s*(\d+(?:\.\d+)?)\s*([kmgKMG]?)[bB]?\s*', text)
+    if match is None:
+        raise ValueError('Invalid memory size: \'{}\''.format(text))
+    return int(float(match.group(1)) * SIZE_UNITS[match.group(2).lower()])
+
+
+def estimate_size(record):
+    """Return estimated memory size of record (string or tuple) in bytes."""
+    if isinstance(record, str):
+        return STRING_OVERHEAD + len(record)
+    if isinstance(record, tuple):
+        size = TUPLE_OVERHEAD
+        for item in record:
+            size += estimate_size(item)
+        return size
+    return VALUE_SIZE
+
+
+class Record_buffer(object):
+    """Define append-only sequence of records with bounded memory use."""
+
+    def __init__(self, max_memory=None):
+        # No spilling if max_memory is None
+        self.max_memory = max_memory
+        self.memory = []
+        self.memory_size = 0
+        self.file = None
+        # Index of first record and file offset of each spilled chunk
+        self.starts = []
+        self.offsets = []
+        self.spilled = 0
+        # Spilled chunk last read by index (chunk number, records)
+        self._chunk = (None, None)
+
+    def close(self):
+        """Remove temporary file and records."""
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+        self.memory = []
+        self.starts = []
+        self.offsets = []
+        self.spilled = 0
+        self._chunk = (None, None)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def append(self, record):
+        """Append record, spilling records to disk beyond the budget."""
+        self.memory.append(record)
+        if self.max_memory is None:
+            return
+        self.memory_size += estimate_size(record)
+        if self.memory_size > self.max_memory:
+            self.spill()
+
+    def extend(self, records):
+        """Append all records."""
+        for record in records:
+            self.append(record)
+        return self
+
+    def spill(self):
+        """Write records held in memory as one chunk to the temporary file."""
+        if not self.memory:
+            return
+        if self.file is None:
+            self.file = tempfile.TemporaryFile(prefix='conpar-')
+        self.file.seek(0, 2)
+        self.starts.append(self.spilled)
+        self.offsets.append(self.file.tell())
+        pickle.dump(self.memory, self.file, pickle.HIGHEST_PROTOCOL)
+        self.spilled += len(self.memory)
+        self.memory = []
+        self.memory_size = 0
+
+    def read_chunk(self, number):
+        """Return list of records of spilled chunk."""
+        self.file.seek(self.offsets[number])
+        return pickle.load(self.file)
+
+    def iter_chunks(self):
+        """Yield lists of records in order (spilled chunks first)."""
+        for number in range(len(self.offsets)):
+            yield self.read_chunk(number)
+        if self.memory:
+            yield self.memory
+
+    def __iter__(self):
+        for chunk in self.iter_chunks():
+            yield from chunk
+
+    def __len__(self):
+        return self.spilled + len(self.memory)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if index < 0 or index >= len(self):
+            raise IndexError('record index out of range')
+        if index >= self.spilled:
+            return self.memory[index - self.spilled]
+        number = bisect.bisect_right(self.starts, index) - 1
+        # Sequential access reads each chunk once
+        if self._chunk[0] != number:
+            self._chunk = (number, self.read_chunk(number))
+        return self._chunk[1][index - self.starts[number]]
+
+    def column(self, position):
+        """Return sequence view of one field of tuple records."""
+        return Record_column(self, position)
+
+
+class Record_column(object):
+    """Define read-only sequence of one field of buffered records."""
+
+    def __init__(self, buffer, position):
+        self.buffer = buffer
+        self.position = position
+
+    def __iter__(self):
+        position = self.position
+        for record in self.buffer:
+            yield record[position]
+
+    def __len__(self):
+        return len(self.buffer)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [record[self.position] for record in self.buffer[index]]
+        return self.buffer[index][self.position]
+
+
+def budget(max_memory, buffers):
+    """Return budget per buffer for buffers sharing max_memory bytes."""
+    # A buffer holds its records in memory plus one chunk read back
+    return max_memory // (2 * buffers)
+
+
+def buffered(records, max_memory=None):
+    """Return Record_buffer filled with records."""
+    return Record_buffer(max_memory).extend(records)
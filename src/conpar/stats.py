@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Vectorized line-type statistics based on integer type codes."""
+
+import numpy as np
+
+
+# Line types in type-code order
+TYPES = ('comment', 'empty', 'section_head', 'key_value_pair', 'unknown',
+         'continuation')
+
+# Integer type codes
+(COMMENT, EMPTY, SECTION_HEAD, KEY_VALUE_PAIR, UNKNOWN,
+ CONTINUATION) = range(len(TYPES))
+
+# Map line-type strings to type codes
+CODES = {line_type: code for code, line_type in enumerate(TYPES)}
+
+
+def type_codes(types):
+    """Convert list of line-type strings into array of type codes."""
+    # Unexpected line types are counted as unknown; no intermediate list
+    # (types may be a column of spilled records)
+    return np.fromiter((CODES.get(line_type, UNKNOWN) for line_type in types),
+                       dtype=np.int8, count=len(types))
+
+
+def skip_mask(codes, skip_comments, skip_empty, skip_unknown):
+    """Return boolean array marking lines to be skipped."""
+    # Look-up table with one skip flag per type code
+    table = np.zeros(len(TYPES), dtype=bool)
+    table[COMMENT] = skip_comments is True
+    table[EMPTY] = skip_empty is True
+    table[UNKNOWN] = skip_unknown is True
+    return table[codes]
+
+
+def count_codes(codes):
+    """Return array with frequencies of type codes."""
+    return np.bincount(codes, minlength=len(TYPES))
+
+
+def section_key_counts(codes, content):
+    """Return dict with number of key-value pairs per section."""
+    is_section = codes == SECTION_HEAD
+    # Running section number of each line (0 = before first section head)
+    section_number = np.cumsum(is_section)
+    key_counts = np.bincount(section_number[codes == KEY_VALUE_PAIR],
+                             minlength=int(section_number[-1]) + 1
+                             if len(codes) > 0 else 1)
+    counts = {}
+    # Key-value pairs before the first section head are listed under ''
+    if key_counts[0] > 0:
+        counts[''] = int(key_counts[0])
+    for number, index in enumerate(np.flatnonzero(is_section), start=1):
+        name = content[index]
+        # Sections occurring more than once are summed up
+        counts[name] = counts.get(name, 0) + int(key_counts[number])
+    return counts
+
+
+def length_histogram(rawlines, bin_width=10):
+    """Return array with frequencies of raw-line lengths per bin."""
+    lengths = np.fromiter(map(len, rawlines), dtype=np.int64,
+                          count=len(rawlines))
+    return np.bincount(lengths // bin_width)
+
+
+class Line_statistics(object):
+    """Define line statistics computed from a single type-code array."""
+
+    def __init__(self, types, content, rawlines=None, skip_comments=False,
+                 skip_empty=False, skip_unknown=False, bin_width=10):
+        self.codes = type_codes(types)
+        self.skip = skip_mask(self.codes, skip_comments, skip_empty,
+                              skip_unknown)
+        self.counts = count_codes(self.codes)
+        self.section_keys = section_key_counts(self.codes, content)
+        self.bin_width = bin_width
+        if rawlines is None:
+            self.histogram = None
+        else:
+            self.histogram = length_histogram(rawlines, bin_width)
+
+    def type_counts(self):
+        """Return dict with frequencies of line types."""
+        return dict(zip(TYPES, self.counts.tolist()))
+
+    def summary(self):
+        """Return list of summary lines."""
+        lines = ['lines: {}'.format(len(self.codes))]
+        for line_type, count in self.type_counts().items():
+            lines.append('{}: {}'.format(line_type, count))
+        lines.append('skipped: {}'.format(int(self.skip.sum())))
+        lines.append('sections: {}'.format(len(self.section_keys)))
+        for section, count in self.section_keys.items():
+            lines.append('  [{}]: {} keys'.format(section, count))
+        if self.histogram is not None:
+            lines.append('line lengths:')
+            for i, count in enumerate(self.histogram.tolist()):
+                if count > 0:
+                    lines.append('  {}-{}: {}'.format(
+                        i * self.bin_width, (i + 1) * self.bin_width - 1,
+                        count))
+        return lines
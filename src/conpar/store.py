@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""SQLite store of parsed configurations with incremental bulk ingest."""
+
+import os
+import re
+import sqlite3
+import functions as fn
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    id INTEGER PRIMARY KEY,
+    path TEXT UNIQUE NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS postings (
+    section TEXT NOT NULL,
+    key TEXT NOT NULL,
+    value TEXT NOT NULL,
+    number REAL,
+    file_id INTEGER NOT NULL REFERENCES files(id) ON DELETE CASCADE,
+    line INTEGER
+);
+"""
+
+# Map index name to indexed columns of postings; indexes are created
+# after bulk loads into an empty store
+INDEXES = {
+    'postings_section_key': 'section, key',
+    'postings_key': 'key',
+    'postings_file': 'file_id',
+    }
+
+
+def to_number(value):
+    """Return value as float, or None if not numeric."""
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class Config_store(object):
+    """Define SQLite store of section/key/value postings of config files."""
+
+    # Journal mode of the store file (None: SQLite's rollback journal)
+    JOURNAL_MODE = 'WAL'
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self.connection = sqlite3.connect(db_path)
+        self.connection.execute('PRAGMA foreign_keys = ON')
+        if self.JOURNAL_MODE == 'WAL':
+            # Fewer fsyncs; a crash can lose the last transaction only.
+            # Needs a writable directory for the -wal and -shm files.
+            self.connection.execute('PRAGMA journal_mode = WAL')
+            self.connection.execute('PRAGMA synchronous = NORMAL')
+        self.connection.executescript(SCHEMA)
+        self.create_indexes()
+
+    def close(self):
+        """Close store file."""
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def create_indexes(self):
+        """Create missing indexes of postings."""
+        for name, columns in INDEXES.items():
+            self.connection.execute('CREATE INDEX IF NOT EXISTS {} ON '
+                                    'postings({})'.format(name, columns))
+
+    def drop_indexes(self):
+        """Drop indexes of postings."""
+        for name in INDEXES:
+            self.connection.execute('DROP INDEX IF EXISTS {}'.format(name))
+
+    def ingest(self, paths, base=None, prune=False, comment_char='#',
+               section_marker='[]', assignment_char='='):
+        """Parse new and changed files in one transaction.
+
+        Paths are stored as given and resolved relative to base. If prune,
+        stored files missing from paths are dropped. Return tuple (number
+        of parsed files, number of dropped files).
+        """
+        settings = (comment_char, section_marker, assignment_char)
+        db = self.connection
+        known = {path: (file_id, mtime_ns, size) for file_id, path, mtime_ns,
+                 size in db.execute('SELECT id, path, mtime_ns, size '
+                                    'FROM files')}
+        parsed = 0
+        with db:
+            if not known:
+                # Bulk load: building the indexes once at the end is faster
+                # than updating them for every row
+                self.drop_indexes()
+            for path in paths:
+                full_path = path if base is None else os.path.join(base, path)
+                stat = os.stat(full_path)
+                entry = known.pop(path, None)
+                if (entry is not None and entry[1] == stat.st_mtime_ns and
+                        entry[2] == stat.st_size):
+                    continue
+                if entry is not None:
+                    db.execute('DELETE FROM files WHERE id = ?', (entry[0],))
+                file_id = db.execute('INSERT INTO files (path, mtime_ns, '
+                                     'size) VALUES (?, ?, ?)',
+                                     (path, stat.st_mtime_ns,
+                                      stat.st_size)).lastrowid
+                try:
+                    cfg = fn.load_configuration(full_path, *settings)
+                except ValueError:
+                    # Unknown format, invalid JSON, undecodable text (see
+                    # load_configuration); remember it as ingested
+                    continue
+                db.executemany('INSERT INTO postings VALUES '
+                               '(?, ?, ?, ?, ?, ?)',
+                               self.postings(cfg, file_id))
+                parsed += 1
+            dropped = 0
+            if prune is True:
+                for file_id, mtime_ns, size in known.values():
+                    db.execute('DELETE FROM files WHERE id = ?', (file_id,))
+                dropped = len(known)
+            self.create_indexes()
+        return parsed, dropped
+
+    @staticmethod
+    def postings(cfg, file_id):
+        """Yield posting rows of configuration."""
+        for section in cfg.sections().values():
+            for key, (value, line) in section.entries.items():
+                value = fn.value_str(value)
+                yield (section.name, key, value, to_number(value), file_id,
+                       line)
+
+    def paths(self):
+        """Return sorted list of stored paths."""
+        return [path for path, in self.connection.execute(
+            'SELECT path FROM files ORDER BY path')]
+
+    def to_dict(self, path):
+        """Return dictionary with sections and values of stored file."""
+        rows = self.connection.execute(
+            'SELECT postings.section, postings.key, postings.value FROM '
+            'postings JOIN files ON files.id = postings.file_id WHERE '
+            'files.path = ? ORDER BY postings.line', (path,))
+        cfg_dict = {}
+        for section, key, value in rows:
+            cfg_dict.setdefault(section, {})[key] = value
+        return cfg_dict
+
+    def get(self, path, section, key, default=None):
+        """Return stored value of key in section of file."""
+        row = self.connection.execute(
+            'SELECT postings.value FROM postings JOIN files ON files.id = '
+            'postings.file_id WHERE files.path = ? AND postings.section = ? '
+            'AND postings.key = ?', (path, section, key)).fetchone()
+        if row is None:
+            return default
+        return row[0]
+
+    def query(self, key, section=None, equal=None, greater=None, less=None,
+              match=None):
+        """Return list of (path, line, section, key, value) tuples."""
+        sql = ('SELECT files.path, postings.line, postings.section, '
+               'postings.key, postings.value FROM postings JOIN files ON '
+               'files.id = postings.file_id WHERE postings.key = ?')
+        parameters = [key]
+        if section is not None:
+            sql += ' AND postings.section = ?'
+            parameters.append(section)
+        if equal is not None:
+            sql += ' AND postings.value = ?'
+            parameters.append(equal)
+        if greater is not None:
+            sql += ' AND postings.number > ?'
+            parameters.append(float(greater))
+        if less is not None:
+            sql += ' AND postings.number < ?'
+            parameters.append(float(less))
+        sql += ' ORDER BY files.path, postings.line'
+        rows = self.connection.execute(sql, parameters).fetchall()
+        if match is not None:
+            pattern = re.compile(match)
+            rows = [row for row in rows if pattern.search(row[4])]
+        return rows
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Transparent gzip, bz2 and xz input and output streams."""
+
+import bz2
+import contextlib
+import gzip
+import lzma
+import os
+import sys
+
+
+# Magic bytes of compressed input streams
+MAGIC = (
+    (b'\x1f\x8b', gzip.open),
+    (b'BZh', bz2.open),
+    (b'\xfd7zXZ\x00', lzma.open),
+    )
+
+# File-name extensions of compressed output streams
+COMPRESSION_EXTENSIONS = {
+    '.gz': gzip.open,
+    '.bz2': bz2.open,
+    '.xz': lzma.open,
+    }
+
+
+def config_extension(file_path):
+    """Return extension of config file, ignoring compression extension."""
+    root, extension = os.path.splitext(file_path)
+    if extension in COMPRESSION_EXTENSIONS:
+        extension = os.path.splitext(root)[-1]
+    return extension
+
+
+def compression_of_prefix(prefix):
+    """Return open function of compression codec of prefix, or None."""
+    for magic, open_function in MAGIC:
+        if prefix.startswith(magic):
+            return open_function
+    return None
+
+
+def compression(file_path):
+    """Return open function of compression codec of file, or None."""
+    with open(file_path, 'rb') as f:
+        return compression_of_prefix(f.read(6))
+
+
+def open_input(file_path):
+    """Open file ('-' = stdin) as binary stream, decompressing on the fly.
+
+    Standard input is returned as buffered stream that supports peek().
+    """
+    if file_path == '-':
+        stream = sys.stdin.buffer
+        open_function = compression_of_prefix(stream.peek(6)[:6])
+        if open_function is None:
+            return stream
+        return open_function(stream, 'rb')
+    open_function = compression(file_path)
+    if open_function is None:
+        return open(file_path, 'rb')
+    return open_function(file_path, 'rb')
+
+
+def open_output(file_path, encoding='utf-8', stdout=None):
+    """Open text output stream ('-' = stdout), compressing by extension."""
+    if file_path == '-':
+        # Leave stdout open after the with block
+        if stdout is None:
+            stdout = sys.stdout
+        return contextlib.nullcontext(stdout)
+    open_function = COMPRESSION_EXTENSIONS.get(
+        os.path.splitext(file_path)[-1])
+    if open_function is None:
+        return open(file_path, 'w', encoding=encoding)
+    return open_function(file_path, 'wt', encoding=encoding)
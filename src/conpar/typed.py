@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Typed view over parsed configurations with cached value coercion."""
+
+import re
+import numpy as np
+
+
+# Words accepted as boolean values
+BOOLEANS = {'true': True, 'yes': True, 'on': True, '1': True,
+            'false': False, 'no': False, 'off': False, '0': False}
+
+# Duration units in seconds
+DURATION_UNITS = {'ms': 0.001, 's': 1, 'm': 60, 'h': 3600, 'd': 86400,
+                  'w': 604800}
+
+INT_PATTERN = re.compile(r'[+-]?\d+\Z')
+FLOAT_PATTERN = re.compile(r'[+-]?(\d+\.\d*|\.\d+|\d+)([eE][+-]?\d+)?\Z')
+DURATION_PATTERN = re.compile(r'(\d+(?:\.\d+)?)(ms|s|m|h|d|w)')
+DURATION_FULL_PATTERN = re.compile(r'(?:\d+(?:\.\d+)?(?:ms|s|m|h|d|w))+\Z')
+
+
+def to_int(value):
+    """Convert value to int."""
+    return int(value)
+
+
+def to_float(value):
+    """Convert value to float."""
+    return float(value)
+
+
+def to_bool(value):
+    """Convert value to bool."""
+    if isinstance(value, bool):
+        return value
+    try:
+        return BOOLEANS[str(value).strip().lower()]
+    except KeyError:
+        raise ValueError('Not a boolean: {!r}'.format(value)) from None
+
+
+def to_duration(value):
+    """Convert duration (e.g. '90', '1h30m', '250ms') to seconds."""
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value)
+    value = value.strip()
+    if FLOAT_PATTERN.match(value):
+        return float(value)
+    if not DURATION_FULL_PATTERN.match(value):
+        raise ValueError('Not a duration: {!r}'.format(value))
+    return float(sum(float(number) * DURATION_UNITS[unit]
+                     for number, unit in DURATION_PATTERN.findall(value)))
+
+
+def to_list(value):
+    """Convert comma-separated value to list of strings."""
+    if isinstance(value, list):
+        return value
+    return [item.strip() for item in value.split(',') if item.strip() != '']
+
+
+def to_str(value):
+    """Return value unchanged."""
+    return value
+
+
+COERCERS = {
+    'int': to_int,
+    'float': to_float,
+    'bool': to_bool,
+    'duration': to_duration,
+    'list': to_list,
+    'str': to_str,
+    }
+
+
+def infer_type(value):
+    """Infer type name of raw value."""
+    if not isinstance(value, str):
+        # JSON values are typed already
+        if isinstance(value, bool):
+            return 'bool'
+        if isinstance(value, int):
+            return 'int'
+        if isinstance(value, float):
+            return 'float'
+        if isinstance(value, list):
+            return 'list'
+        return 'str'
+    stripped = value.strip().lower()
+    if stripped in BOOLEANS and stripped not in ('0', '1'):
+        return 'bool'
+    if INT_PATTERN.match(stripped):
+        return 'int'
+    if FLOAT_PATTERN.match(stripped):
+        return 'float'
+    if DURATION_FULL_PATTERN.match(stripped):
+        return 'duration'
+    if ',' in stripped:
+        return 'list'
+    return 'str'
+
+
+def coerce_values(values, type_name):
+    """Convert list of values to one type (vectorized for int and float)."""
+    if type_name in ('int', 'float') and len(values) > 0:
+        dtype = np.int64 if type_name == 'int' else np.float64
+        try:
+            return np.array(values, dtype=str).astype(dtype).tolist()
+        except (ValueError, OverflowError):
+            # Fall back to per-value conversion (ints beyond 64 bits, error
+            # messages)
+            pass
+    coercer = COERCERS[type_name]
+    return [coercer(value) for value in values]
+
+
+class Typed_configuration(object):
+    """Define typed view over a Configuration object.
+
+    Schema maps section names to dicts of key names and type names (see
+    COERCERS). Keys missing from the schema get an inferred type. Each
+    value is converted at most once.
+    """
+
+    def __init__(self, configuration, schema=None):
+        self.configuration = configuration
+        if schema is None:
+            schema = {}
+        self.schema = schema
+        # Map (section, key) to converted value
+        self._cache = {}
+
+    def type_of(self, section, key):
+        """Return declared or inferred type name of key."""
+        type_name = self.schema.get(section, {}).get(key)
+        if type_name is None:
+            type_name = infer_type(self._raw(section, key)[0])
+        return type_name
+
+    def _raw(self, section, key):
+        """Return tuple (raw value, line)."""
+        try:
+            return self.configuration.sections()[section].entries[key]
+        except KeyError:
+            raise KeyError('[{}] {}'.format(section, key)) from None
+
+    def get(self, section, key, type_name=None):
+        """Return converted value (declared, given or inferred type)."""
+        cache_key = (section, key, type_name)
+        if cache_key in self._cache:
+            return self._cache[cache_key]
+        value, line = self._raw(section, key)
+        if type_name is None:
+            type_name = self.type_of(section, key)
+        try:
+            result = COERCERS[type_name](value)
+        except (ValueError, TypeError) as e:
+            raise ValueError('[{}] {} (line {}): {}'.format(
+                section, key, line, e)) from None
+        self._cache[cache_key] = result
+        return result
+
+    def get_int(self, section, key):
+        """Return value as int."""
+        return self.get(section, key, 'int')
+
+    def get_float(self, section, key):
+        """Return value as float."""
+        return self.get(section, key, 'float')
+
+    def get_bool(self, section, key):
+        """Return value as bool."""
+        return self.get(section, key, 'bool')
+
+    def get_duration(self, section, key):
+        """Return duration value in seconds."""
+        return self.get(section, key, 'duration')
+
+    def get_list(self, section, key):
+        """Return comma-separated value as list."""
+        return self.get(section, key, 'list')
+
+    def coerce_section(self, section, type_name=None):
+        """Convert and cache all values of section, grouped by type."""
+        entries = self.configuration.sections()[section].entries
+        # Group keys by type to convert each group in one batch
+        groups = {}
+        for key in entries:
+            if type_name is None:
+                key_type = self.type_of(section, key)
+                cache_type = None
+            else:
+                key_type = type_name
+                cache_type = type_name
+            groups.setdefault((key_type, cache_type), []).append(key)
+        result = {}
+        for (key_type, cache_type), keys in groups.items():
+            try:
+                converted = coerce_values([entries[key][0] for key in keys],
+                                          key_type)
+            except (ValueError, TypeError):
+                # Convert one by one for the section, key and line of the
+                # failing value
+                converted = [self.get(section, key, key_type)
+                             for key in keys]
+            for key, value in zip(keys, converted):
+                self._cache[(section, key, cache_type)] = value
+                result[key] = value
+        # Keep key order of section
+        return {key: result[key] for key in entries}
+
+    def to_dict(self):
+        """Create dictionary with converted values of all sections."""
+        return {section: self.coerce_section(section)
+                for section in self.configuration.sections()}
@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Validate configurations against a JSON schema during parsing.
+
+Schema format:
+
+    {
+        "allow_unknown_sections": true,
+        "sections": {
+            "db": {
+                "required": true,
+                "allow_unknown_keys": false,
+                "keys": {
+                    "port": {"required": true, "type": "int",
+                             "min": 1, "max": 65535},
+                    "mode": {"choices": ["primary", "replica"]},
+                    "host": {"pattern": "^[a-z0-9.-]+$"}
+                }
+            }
+        }
+    }
+
+Types are the type names of typed.COERCERS. Key-value pairs before the
+first section head are checked against the rules of section "".
+"""
+
+import json
+import re
+import formats
+import functions as fn
+import typed
+
+
+class Schema_error(ValueError):
+    """Define error for invalid schema rules."""
+
+
+class Violation(object):
+    """Define single schema violation."""
+
+    def __init__(self, line, section, key, message):
+        self.line = line
+        self.section = section
+        self.key = key
+        self.message = message
+
+    def __str__(self):
+        if self.key is None:
+            location = '[{}]'.format(self.section)
+        else:
+            location = '[{}] {}'.format(self.section, self.key)
+        if self.line is None:
+            return '{}: {}'.format(location, self.message)
+        return 'line {}: {}: {}'.format(self.line, location, self.message)
+
+    def __repr__(self):
+        return 'Violation({!r}, {!r}, {!r}, {!r})'.format(
+            self.line, self.section, self.key, self.message)
+
+
+def compile_key(rules):
+    """Compile key rules into list of check closures.
+
+    Each check takes the raw value and returns an error message or None.
+    """
+    checks = []
+    type_name = rules.get('type')
+    coercer = None
+    if type_name is not None:
+        try:
+            coercer = typed.COERCERS[type_name]
+        except (KeyError, TypeError):
+            raise Schema_error('Unknown type {!r} (use one of {})'.format(
+                type_name, ', '.join(typed.COERCERS))) from None
+
+    def convert(value):
+        if coercer is None:
+            return value
+        return coercer(value)
+
+    if coercer is not None:
+        def check_type(value):
+            try:
+                coercer(value)
+            except (ValueError, TypeError):
+                return 'expected {}, got {!r}'.format(type_name, value)
+        checks.append(check_type)
+    if 'min' in rules:
+        minimum = rules['min']
+
+        def check_min(value):
+            try:
+                if convert(value) < minimum:
+                    return 'value {!r} is below minimum {}'.format(value,
+                                                                   minimum)
+            except (ValueError, TypeError):
+                pass
+        checks.append(check_min)
+    if 'max' in rules:
+        maximum = rules['max']
+
+        def check_max(value):
+            try:
+                if convert(value) > maximum:
+                    return 'value {!r} is above maximum {}'.format(value,
+                                                                   maximum)
+            except (ValueError, TypeError):
+                pass
+        checks.append(check_max)
+    if 'choices' in rules:
+        choices = frozenset(fn.value_str(choice)
+                            for choice in rules['choices'])
+
+        def check_choices(value):
+            if fn.value_str(value) not in choices:
+                return 'value {!r} is not one of {}'.format(
+                    value, sorted(choices))
+        checks.append(check_choices)
+    if 'pattern' in rules:
+        try:
+            pattern = re.compile(rules['pattern'])
+        except (re.error, TypeError) as e:
+            raise Schema_error('Invalid pattern {!r}: {}'.format(
+                rules['pattern'], e)) from None
+
+        def check_pattern(value):
+            if pattern.search(fn.value_str(value)) is None:
+                return 'value {!r} does not match {!r}'.format(
+                    value, pattern.pattern)
+        checks.append(check_pattern)
+    return checks
+
+
+class Section_validator(object):
+    """Define compiled rules of one section."""
+
+    def __init__(self, rules):
+        self.required = rules.get('required', False)
+        self.allow_unknown_keys = rules.get('allow_unknown_keys', True)
+        keys = rules.get('keys', {})
+        self.checks = {key: compile_key(key_rules)
+                       for key, key_rules in keys.items()}
+        self.required_keys = [key for key, key_rules in keys.items()
+                              if key_rules.get('required', False)]
+
+
+class Validator(object):
+    """Define compiled schema."""
+
+    def __init__(self, schema):
+        self.allow_unknown_sections = schema.get('allow_unknown_sections',
+                                                 True)
+        self.sections = {name: Section_validator(rules)
+                         for name, rules in schema.get('sections',
+                                                       {}).items()}
+
+    def iter_violations(self, records):
+        """Yield violations for records (line, line type, content)."""
+        # Map section name to (head line, set of keys seen)
+        seen = {}
+        section = None
+        rules = None
+        keys = None
+        for line, line_type, content in records:
+            head = None
+            if line_type == 'section_head':
+                head = content
+            elif line_type == 'key_value_pair' and section is None:
+                # Pairs before the first section head (see records_to_dict)
+                head = ''
+            if head is not None:
+                section = head
+                rules = self.sections.get(section)
+                if section not in seen:
+                    seen[section] = (line, set())
+                    if rules is None and not self.allow_unknown_sections:
+                        yield Violation(line, section, None,
+                                        'unknown section')
+                keys = seen[section][1]
+            if line_type == 'key_value_pair':
+                key, value = content
+                keys.add(key)
+                if rules is None:
+                    continue
+                checks = rules.checks.get(key)
+                if checks is None:
+                    if not rules.allow_unknown_keys:
+                        yield Violation(line, section, key, 'unknown key')
+                    continue
+                for check in checks:
+                    message = check(value)
+                    if message is not None:
+                        yield Violation(line, section, key, message)
+        # Required sections and keys can only be checked at the end
+        for name, rules in self.sections.items():
+            if name not in seen:
+                if rules.required:
+                    yield Violation(None, name, None,
+                                    'missing required section')
+                continue
+            line, keys = seen[name]
+            for key in rules.required_keys:
+                if key not in keys:
+                    yield Violation(line, name, key, 'missing required key')
+
+    def validate(self, records, fail_fast=False):
+        """Return list of violations (only the first one if fail_fast)."""
+        violations = []
+        for violation in self.iter_violations(records):
+            violations.append(violation)
+            if fail_fast is True:
+                break
+        return violations
+
+
+def compile_schema(schema):
+    """Compile schema dict into Validator object."""
+    return Validator(schema)
+
+
+def load_schema(file_path):
+    """Read JSON schema file and compile it."""
+    with open(file_path, 'r', encoding='utf-8') as f:
+        return compile_schema(json.load(f))
+
+
+def iter_records(file_path, comment_char='#', section_marker='[]',
+                 assignment_char='='):
+    """Yield records (line, line type, content) of INI or JSON file."""
+    config_file = fn.Config_file(file_path, verbose=False)
+    if config_file.format == 'unknown':
+        raise ValueError('Unknown file format: \'{}\''.format(file_path))
+    # INI lines are parsed while they are read
+    yield from formats.backend(config_file.format).parse_stream(
+        config_file, None, comment_char, section_marker, assignment_char)
+
+
+def validate_file(file_path, validator, fail_fast=False, comment_char='#',
+                  section_marker='[]', assignment_char='='):
+    """Validate INI or JSON file and return list of violations."""
+    records = iter_records(file_path, comment_char, section_marker,
+                           assignment_char)
+    return validator.validate(records, fail_fast)
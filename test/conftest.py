@@ -0,0 +1,16 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Make conpar importable as package and its modules importable flat."""
+
+import os
+import sys
+
+
+here = os.path.dirname(os.path.abspath(__file__))
+# Package directory first, so that 'conpar' is the package and not
+# src/conpar/conpar.py
+for i, path in enumerate((os.path.join(here, '..', 'src'),
+                          os.path.join(here, '..', 'src', 'conpar'))):
+    path = os.path.normpath(path)
+    if path not in sys.path:
+        sys.path.insert(i, path)
@@ -0,0 +1,19 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Test functions for cache.py"""
+
+import os
+import conpar.cache as ch
+
+
+def test_parse_cache(tmp_path):
+    path = tmp_path / 'config.ini'
+    path.write_text('[db]\nport = 5432\n')
+    cache = ch.Parse_cache()
+    cfg = cache.get(str(path))
+    assert cache.get(str(path)) is cfg
+    path.write_text('[db]\nport = 5433\nhost = x\n')
+    os.utime(path, ns=(0, 0))
+    cfg2 = cache.get(str(path))
+    assert cfg2 is not cfg
+    assert cfg2.to_dict() == {'db': {'port': '5433', 'host': 'x'}}
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Test functions for canonical.py"""
+
+import conpar.canonical as canonical
+import conpar.functions as fn
+
+
+def records(text):
+    return zip(*fn.Configuration_INI(text.split('\n'), False, False, False,
+                                     '#', '[]', '=').parse())
+
+
+def test_canonical_lines():
+    text = ('# header\n[web]\nx=1\n\n[db]\n# port\nport   =5432\n'
+            'host = a\n[db]\nhost = b\n# end')
+    assert canonical.canonical_lines(records(text)) == [
+        '[ db ]', 'host = b', 'port = 5432', '', '[ web ]', 'x = 1']
+    assert canonical.canonical_lines(records(text), comments=True) == [
+        '[ db ]', 'host = b', '# port', 'port = 5432', '', '# header',
+        '[ web ]', 'x = 1', '# end']
+
+
+def test_fingerprint(tmp_path):
+    variants = {
+        'a.ini': '[db]\nport = 5432\nhost = x\n\n[web]\nx = 1\n',
+        'b.ini': '# other\n[web]\n  x=1\n[db]\nhost=x\n\nport  =  5432\n',
+        'c.json': '{"web": {"x": 1}, "db": {"port": 5432, "host": "x"}}',
+        'd.ini': '[db]\nport = 5432\nhost = y\n[web]\nx = 1\n',
+        }
+    for name, text in variants.items():
+        (tmp_path / name).write_text(text)
+    prints = {name: canonical.fingerprint_file(str(tmp_path / name))
+              for name in variants}
+    assert prints['a.ini'] == prints['b.ini'] == prints['c.json']
+    assert prints['a.ini'] != prints['d.ini']
+    # Only the changed section has a different digest
+    assert prints['a.ini'].sections['web'] == prints['d.ini'].sections['web']
+    assert prints['a.ini'].sections['db'] != prints['d.ini'].sections['db']
+    # Comments count only if requested
+    assert (canonical.fingerprint_file(str(tmp_path / 'a.ini'), True) !=
+            canonical.fingerprint_file(str(tmp_path / 'b.ini'), True))
+    groups = canonical.group_files(
+        [str(tmp_path / name) for name in sorted(variants)])
+    assert sorted(len(paths) for paths in groups.values()) == [1, 3]
+
+
+def test_fingerprint_matches_canonical_form():
+    texts = ['[a]\nx = 1\n[b]\ny = 2\n', '[b]\ny = 2\n[a]\nx = 1\n',
+             '[a]\nx = 1\n[b]\ny = 2\n[a]\nx = 1\n', '[a]\nx = 1\n',
+             '[a]\nx = 1\n[b]\n', 'z = 0\n[a]\nx = 1\n[b]\ny = 2\n',
+             '[a]\nx = "1"\n[b]\ny = 2\n', '[a]\nx = 1 \\\n  2\n[b]\ny = 2\n']
+    for comments in (False, True):
+        for text in texts:
+            for other in texts:
+                same_form = (
+                    canonical.canonical_lines(records(text), comments) ==
+                    canonical.canonical_lines(records(other), comments))
+                same_print = (
+                    canonical.fingerprint_records(records(text), comments) ==
+                    canonical.fingerprint_records(records(other), comments))
+                assert same_form == same_print
+
+
+def test_top_level_values(tmp_path):
+    (tmp_path / 'a.ini').write_text('name = app\n[db]\nport = 5432\n')
+    (tmp_path / 'b.json').write_text(
+        '{"db": {"port": 5432}, "name": "app"}')
+    prints = [canonical.fingerprint_file(str(tmp_path / name))
+              for name in ('a.ini', 'b.json')]
+    assert prints[0] == prints[1]
+    assert prints[0].sections.keys() == {'', 'db'}
+    cfg_json = fn.Configuration_JSON({'db': {'port': 5432}, 'name': 'app'})
+    records = zip(cfg_json.get_types(), cfg_json.get_content())
+    # Top-level pairs are written first, without section head
+    assert canonical.canonical_lines(records) == [
+        'name = app', '', '[ db ]', 'port = 5432']
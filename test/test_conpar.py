@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Test functions for conpar.py (command line)"""
+
+import pytest
+import conpar.conpar as cp
+
+
+def run_command(argv, capsys):
+    """Run subcommand and return its standard output."""
+    args = cp.build_parser().parse_args(argv)
+    cp.run_command(args, None, None)
+    return capsys.readouterr().out
+
+
+def test_merge_includes(tmp_path, capsys):
+    (tmp_path / 'common.ini').write_text('[log]\nlevel = info\n')
+    (tmp_path / 'app.ini').write_text(
+        'include = common.ini\n[db]\nport = 5433\n')
+    app = str(tmp_path / 'app.ini')
+    out = run_command(['merge', app, '-n'], capsys)
+    assert 'include' not in out
+    assert 'level' in out and 'port' in out
+    out = run_command(['merge', app, '-n', '-P'], capsys)
+    assert out.splitlines() == ['[log] level = info  # {}:2'.format(
+        str(tmp_path / 'common.ini')), '[db] port = 5433  # {}:3'.format(app)]
+
+
+def test_read_selection_json(tmp_path, capsys):
+    path = str(tmp_path / 'x.json')
+    (tmp_path / 'x.json').write_text('{\n  "db": {\n    "port": 1\n  }\n}\n')
+    for selection in (['-l', '2:3'], ['--in-section', 'db']):
+        with pytest.raises(SystemExit, match='requires an INI file'):
+            run_command(['read', path, '-j'] + selection, capsys)
+    path = str(tmp_path / 'x.ini')
+    (tmp_path / 'x.ini').write_text('[a]\nx = 1\n[db]\nport = 2\n')
+    out = run_command(['read', path, '-p', '-j', '--in-section', 'db'],
+                      capsys)
+    assert '  4  key_value_pair  (port, 2)' in out
+    assert '"x"' not in out
+
+
+def test_read_json_lines(tmp_path, capsys):
+    path = str(tmp_path / 'x.json')
+    (tmp_path / 'x.json').write_text(
+        '{\n  "a": {\n    "b": {"x": 1},\n    "y": "z"\n  },\n  "t": 1\n}\n')
+    out = run_command(['read', path, '-p'], capsys)
+    # Source lines of the keys, blank for repeated section heads
+    lines = [row.split()[0] if row[:7].strip() else ''
+             for row in out.splitlines() if 'section_head' in row or
+             'key_value_pair' in row]
+    assert lines == ['3', '3', '2', '4', '', '6']
+
+
+def test_read_duplicates(tmp_path, capsys):
+    path = str(tmp_path / 'dup.ini')
+    (tmp_path / 'dup.ini').write_text('[a]\nx = 1\nx = 2\n')
+    for flags in (['-j'], ['-j', '-p']):
+        out = run_command(['read', path] + flags, capsys)
+        assert out.count('[duplicate] line 3:') == 1
+        assert '"x": "2"' in out
+        with pytest.raises(SystemExit, match='line 3'):
+            run_command(['read', path, '-U', 'error'] + flags, capsys)
+        out = run_command(['read', path, '-U', 'first'] + flags, capsys)
+        assert out.count('[duplicate]') == 1 and '"x": "1"' in out
+
+
+def test_validate_schema_error(tmp_path, capsys):
+    (tmp_path / 'schema.json').write_text(
+        '{"sections": {"db": {"keys": {"port": {"type": "integer"}}}}}')
+    (tmp_path / 'x.ini').write_text('[db]\nport = 1\n')
+    with pytest.raises(SystemExit, match=r"\[error\] Unknown type 'integer'"):
+        run_command(['validate', str(tmp_path / 'x.ini'),
+                     str(tmp_path / 'schema.json')], capsys)
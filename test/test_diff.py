@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Test functions for diff.py"""
+
+import json
+import conpar.diff as diff
+import conpar.functions as fn
+
+
+def test_diff_files(tmp_path):
+    old = tmp_path / 'old.ini'
+    old.write_text('[db]\nhost = localhost\nport = 5432\n\n[web]\nx = 1\n')
+    new = tmp_path / 'new.json'
+    new.write_text(json.dumps({'db': {'host': 'localhost', 'port': 5433,
+                                      'user': 'admin'},
+                               'cache': {'size': 1}}, indent=4))
+    changes = diff.diff_files(str(old), str(new))
+    summary = [(c.kind, c.section, c.key, c.old_line, c.new_line)
+               for c in changes]
+    assert summary == [
+        ('removed', 'web', None, 5, None),
+        ('changed', 'db', 'port', 3, 4),
+        ('added', 'db', 'user', None, 5),
+        ('added', 'cache', None, None, 7),
+        ]
+
+
+def test_identical_sections(tmp_path):
+    old = tmp_path / 'old.ini'
+    old.write_text('[db]\nhost = localhost\nport = 5432\n')
+    new = tmp_path / 'new.ini'
+    new.write_text('# moved\n[db]\nport = 5432\nhost = localhost\n')
+    assert diff.diff_files(str(old), str(new)) == []
+
+
+def test_top_level_lines(tmp_path):
+    old = tmp_path / 'old.json'
+    old.write_text('{\n  "name": "a",\n  "db": {"port": 1}\n}\n')
+    new = tmp_path / 'new.json'
+    new.write_text('{\n  "db": {"port": 1},\n  "name": "b"\n}\n')
+    other = tmp_path / 'other.ini'
+    other.write_text('[db]\nport = 1\n')
+    changes = diff.diff_files(str(old), str(new))
+    assert [(c.section, c.key, c.old_line, c.new_line)
+            for c in changes] == [('', 'name', 2, 3)]
+    changes += diff.diff_files(str(old), str(other))
+    # Section '' has no head line: line of its first key
+    assert (changes[1].section, changes[1].old_line) == ('', 2)
+    color = fn.Color('', '', '', '', '')
+    assert diff.format_changes(changes, color) == [
+        '~ [] name = a (line 2) -> b (line 3)', '- [] (line 2)']
+    assert diff.format_changes([diff.Change('added', 'x', 'k', new=1)],
+                               color) == ['+ [x] k = 1']
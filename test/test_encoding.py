@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Test functions for encoding.py"""
+
+import codecs
+import io
+import pytest
+import conpar.encoding as enc
+import conpar.functions as fn
+
+
+def test_decode():
+    assert enc.decode(b'key = value') == ('key = value', 'ascii')
+    assert enc.decode('café'.encode('utf-8')) == ('café', 'utf-8')
+    assert enc.decode('café'.encode('latin-1')) == ('café',
+                                                          'latin-1')
+    assert enc.decode(codecs.BOM_UTF8 + b'x') == ('x', 'utf-8-sig')
+    assert enc.decode('x'.encode('utf-16')) == ('x', 'utf-16')
+    assert enc.decode('x'.encode('utf-32')) == ('x', 'utf-32')
+
+
+def test_config_file_encoding(tmp_path):
+    path = tmp_path / 'legacy.ini'
+    path.write_bytes('[db]\nname = café\n'.encode('latin-1'))
+    config_file = fn.Config_file(str(path), verbose=False)
+    assert config_file.format == 'INI'
+    assert config_file.encoding == 'latin-1'
+    assert config_file.to_list() == ['[db]', 'name = café']
+    path = tmp_path / 'bom.json'
+    path.write_bytes(codecs.BOM_UTF8 + b'{"db": {"name": "x"}}')
+    config_file = fn.Config_file(str(path), verbose=False)
+    assert config_file.format == 'JSON'
+    assert config_file.to_dict() == {'db': {'name': 'x'}}
+
+
+def test_decoder(tmp_path):
+    def decoded(data, chunk_size=3):
+        decoder = enc.Decoder(io.BytesIO(data), chunk_size)
+        lines = list(enc.iter_lines(decoder.iter_text()))
+        return lines, decoder.encoding
+
+    # Characters and line breaks cut at chunk boundaries
+    assert decoded('a = é\nb = ü\n'.encode('utf-8')) == (
+        ['a = é', 'b = ü'], 'utf-8')
+    assert decoded(b'x = 1\r\n\ny') == (['x = 1', '', 'y'], 'ascii')
+    # Invalid UTF-8 after ASCII text falls back for the whole stream
+    assert decoded('a = 1\nname = café\n'.encode('latin-1')) == (
+        ['a = 1', 'name = café'], 'latin-1')
+    assert decoded('x'.encode('utf-16') + '\ny'.encode('utf-16-le')) == (
+        ['x', 'y'], 'utf-16')
+    with pytest.raises(enc.Decode_error, match='byte 7'):
+        decoded('é = 1\n'.encode('utf-8') + 'é'.encode('latin-1'))
+    # Fallback decided after the first chunk, as for the whole file
+    path = tmp_path / 'legacy.ini'
+    path.write_bytes(b'[s]\n' + b'k = v\n' * 20000 +
+                     'name = café\n'.encode('latin-1'))
+    config_file = fn.Config_file(str(path), verbose=False)
+    assert config_file.to_list()[-1] == 'name = café'
+    assert config_file.encoding == 'latin-1'
+
+
+def test_read_text_mixed(tmp_path):
+    path = tmp_path / 'mixed.ini'
+    data = 'é = 1\n'.encode('utf-8') + b'k = v\n' * 20000 + b'\xe9\n'
+    path.write_bytes(data)
+    # Same result as decoding the whole file at once
+    assert enc.read_text(str(path)) == enc.decode(data)
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Test functions for export.py"""
+
+import csv
+import io
+import json
+import sqlite3
+import conpar.export as ex
+
+
+def write_files(tmp_path):
+    (tmp_path / 'a.ini').write_text('# db\n[db]\nport = 5432\n\n')
+    (tmp_path / 'b.json').write_text('{"db": {"port": 1, "on": true}}')
+    (tmp_path / 'c.conf').write_text('not a config\n')
+    return ex.expand_paths([str(tmp_path)])
+
+
+def test_iter_records(tmp_path):
+    errors = []
+    records = list(ex.iter_records(write_files(tmp_path), errors=errors))
+    a = str(tmp_path / 'a.ini')
+    b = str(tmp_path / 'b.json')
+    assert records[:4] == [(a, 1, 'comment', None, None, 'db'),
+                           (a, 2, 'section_head', 'db', None, None),
+                           (a, 3, 'key_value_pair', 'db', 'port', '5432'),
+                           (a, 4, 'empty', 'db', None, None)]
+    assert records[-1] == (b, 1, 'key_value_pair', 'db', 'on', 'true')
+    assert [path for path, message in errors] == [str(tmp_path / 'c.conf')]
+
+
+def test_iter_records_late_error(tmp_path):
+    # Invalid UTF-8 after UTF-8 text, beyond the first decoded chunk
+    data = ('[s]\nname = \u00e4\n'.encode('utf-8') + b'#\n' * 40000 +
+            b'\nx = \xff\n')
+    (tmp_path / 'a.ini').write_bytes(data)
+    (tmp_path / 'b.ini').write_text('[t]\ny = 1\n')
+    errors = []
+    records = list(ex.iter_records(ex.expand_paths([str(tmp_path)]),
+                                   errors=errors))
+    a = str(tmp_path / 'a.ini')
+    assert records[1] == (a, 2, 'key_value_pair', 's', 'name', '\u00e4')
+    assert records[-1][0] == str(tmp_path / 'b.ini')
+    assert [path for path, message in errors] == [a]
+
+
+def test_export_formats(tmp_path):
+    file_paths = write_files(tmp_path)
+    out = io.StringIO()
+    assert ex.export(ex.iter_records(file_paths), '-', 'csv', out) == 7
+    rows = list(csv.reader(io.StringIO(out.getvalue())))
+    assert rows[0] == list(ex.COLUMNS)
+    assert rows[3][4:] == ['port', '5432']
+    out = io.StringIO()
+    ex.export(ex.iter_records(file_paths), '-', 'ndjson', out)
+    assert json.loads(out.getvalue().splitlines()[2])['key'] == 'port'
+    db_path = str(tmp_path / 'out.sqlite')
+    assert ex.format_of(db_path) == 'sqlite'
+    ex.export(ex.iter_records(file_paths), db_path, 'sqlite')
+    connection = sqlite3.connect(db_path)
+    assert connection.execute('SELECT COUNT(*) FROM records WHERE '
+                              'key = ?', ('port',)).fetchone() == (2,)
+    connection.close()
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Test functions for formats.py"""
+
+import sys
+import conpar.functions as fn
+
+# Registry used by functions.py
+formats = fn.formats
+
+
+DEMO_BACKEND = '''
+NESTED = False
+STREAM_JSON = None
+
+
+def accepts(config_file):
+    return config_file.read_text().startswith('demo:')
+
+
+def parse_stream(config_file, rawlines=None, comment_char='#',
+                 section_marker='[]', assignment_char='=', first_line=1):
+    yield (first_line, 'section_head', 'demo')
+    for line, rawline in enumerate(rawlines[1:], start=first_line + 1):
+        key, value = rawline.split(':')
+        yield (line, 'key_value_pair', (key, value))
+'''
+
+
+def test_detect():
+    assert formats.detect('  {"a": {}}') == 'JSON'
+    assert formats.detect('\ufeff[db]\nport = 1\n') == 'INI'
+    assert formats.detect('# header\n# more\n') == 'INI'
+    assert formats.detect('just text') == 'unknown'
+    # No evidence in the prefix: INI is still tried, accepts() decides
+    assert formats.candidates('just text') == ['INI']
+    # File-name extension breaks ties between plausible formats
+    assert formats.candidates('{"a": "b=c"}') == ['JSON', 'INI']
+    assert formats.candidates('{"a": "b=c"}', '.ini') == ['INI', 'JSON']
+    assert formats.columns(iter([(1, 'empty', ''), (2, 'comment', 'x')])) \
+        == ([1, 2], ['empty', 'comment'], ['', 'x'])
+
+
+def test_lazy_backend(tmp_path, monkeypatch):
+    (tmp_path / 'demo_backend.py').write_text(DEMO_BACKEND)
+    monkeypatch.syspath_prepend(str(tmp_path))
+    monkeypatch.setitem(formats.REGISTRY, 'DEMO', formats.Format(
+        'DEMO', 'demo_backend', ('.demo',),
+        lambda prefix: 0.9 if prefix.startswith('demo:') else 0.0))
+    path = tmp_path / 'config.ini'
+    path.write_text('[db]\nport = 5432\n')
+    assert fn.load_configuration(str(path)).to_dict() == {
+        'db': {'port': '5432'}}
+    # Not imported while other formats are detected
+    assert 'demo_backend' not in sys.modules
+    path = tmp_path / 'config.demo'
+    path.write_text('demo:\nport:5432\n')
+    cfg = fn.load_configuration(str(path))
+    assert 'demo_backend' in sys.modules
+    assert cfg.to_dict() == {'demo': {'port': '5432'}}
+    assert cfg.lines == [1, 2]
+    monkeypatch.delitem(sys.modules, 'demo_backend')
+
+
+def test_emit(tmp_path):
+    dictionary = {'db': {'port': 5432, 'tls': {'on': True}}}
+    path = tmp_path / 'out.ini'
+    with open(path, 'w') as f:
+        formats.backend('INI').emit(dictionary, f)
+    assert path.read_text() == ('[ db ]\nport = 5432\n\n[ db.tls ]\n'
+                                'on = true\n')
+    assert fn.load_configuration(str(path)).to_dict() == {
+        'db': {'port': '5432'}, 'db.tls': {'on': 'true'}}
+
+
+def test_emit_top_level(tmp_path):
+    dictionary = {'db': {'port': 5432}, 'top': True}
+    path = tmp_path / 'out.ini'
+    with open(path, 'w') as f:
+        formats.backend('INI').emit(dictionary, f)
+    # Top-level values first, without section head
+    assert path.read_text() == 'top = true\n\n[ db ]\nport = 5432\n'
+    cfg = fn.load_configuration(str(path))
+    assert fn.unflatten(cfg.to_dict()) == {'top': 'true',
+                                           'db': {'port': '5432'}}
+    # Single-pass dictionary agrees with the parsed sections
+    assert formats.backend('INI').to_dict(None, path.read_text().split(
+        '\n')) == cfg.to_dict()
+
+
+def test_long_preamble(tmp_path):
+    path = tmp_path / 'config.cfg'
+    path.write_text('preamble line\n' * 6000 + '[db]\nport = 5432\n')
+    config_file = fn.Config_file(str(path), verbose=False)
+    assert config_file.format == 'INI'
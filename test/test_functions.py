@@ -2,6 +2,8 @@
 # -*- coding: utf-8 -*-
 """Test functions for functions.py"""
 
+import json
+import pytest
 import conpar.functions as fn
 
 
@@ -28,9 +30,9 @@ def test_is_comment():
         'assignment_char': '=',
         }
     for line in line_iscomment_true:
-        assert fn.Line(line, **cfg).is_comment() is True
+        assert fn.Line_INI(line, **cfg).is_comment() is True
     for line in line_iscomment_false:
-        assert fn.Line(line, **cfg).is_comment() is False
+        assert fn.Line_INI(line, **cfg).is_comment() is False
 
 
 def test_is_empty():
@@ -52,9 +54,9 @@ def test_is_empty():
         'assignment_char': '=',
         }
     for line in line_isempty_true:
-        assert fn.Line(line, **cfg).is_empty() is True
+        assert fn.Line_INI(line, **cfg).is_empty() is True
     for line in line_isempty_false:
-        assert fn.Line(line, **cfg).is_empty() is False
+        assert fn.Line_INI(line, **cfg).is_empty() is False
 
 
 def test_is_key_value_pair():
@@ -76,9 +78,9 @@ def test_is_key_value_pair():
         'assignment_char': '=',
         }
     for line in line_iskeyvaluepair_true:
-        assert fn.Line(line, **cfg).is_key_value_pair() is True
+        assert fn.Line_INI(line, **cfg).is_key_value_pair() is True
     for line in line_iskeyvaluepair_false:
-        assert fn.Line(line, **cfg).is_key_value_pair() is False
+        assert fn.Line_INI(line, **cfg).is_key_value_pair() is False
 
 
 def test_is_section():
@@ -102,9 +104,9 @@ def test_is_section():
         'assignment_char': '=',
         }
     for line in line_issection_true:
-        assert fn.Line(line, **cfg).is_section() is True
+        assert fn.Line_INI(line, **cfg).is_section() is True
     for line in line_issection_false:
-        assert fn.Line(line, **cfg).is_section() is False
+        assert fn.Line_INI(line, **cfg).is_section() is False
 
 
 def test_is_unknown():
@@ -136,9 +138,9 @@ def test_is_unknown():
         'assignment_char': '=',
         }
     for line in line_is_unknown_true:
-        assert fn.Line(line, **cfg).is_unknown() is True
+        assert fn.Line_INI(line, **cfg).is_unknown() is True
     for line in line_is_unknown_false:
-        assert fn.Line(line, **cfg).is_unknown() is False
+        assert fn.Line_INI(line, **cfg).is_unknown() is False
 
 
 def test_comment():
@@ -162,7 +164,7 @@ def test_comment():
         'assignment_char': '=',
         }
     for line_in, line_out in zip(line_comments_raw, line_comments_content):
-        assert fn.Line(line_in, **cfg).comment() == line_out
+        assert fn.Line_INI(line_in, **cfg).comment() == line_out
 
 
 def test_section_name():
@@ -189,7 +191,7 @@ def test_section_name():
         }
     for line_in, line_out in zip(line_section_name_raw,
                                  line_section_name_content):
-        assert fn.Line(line_in, **cfg).section_name() == line_out
+        assert fn.Line_INI(line_in, **cfg).section_name() == line_out
 
 
 def test_key_value_pair():
@@ -211,7 +213,7 @@ def test_key_value_pair():
         'assignment_char': '=',
         }
     for line_in, line_out in zip(line_key_value_raw, line_key_value_content):
-        assert fn.Line(line_in, **cfg).key_value_pair() == line_out
+        assert fn.Line_INI(line_in, **cfg).key_value_pair() == line_out
 
 
 def test_get_types():
@@ -258,7 +260,8 @@ def test_get_types():
         'section_marker': '[]',
         'assignment_char': '=',
         }
-    assert fn.Configuration(rawlines, **cfg).get_types() == types
+    assert fn.Configuration_INI(rawlines, False, False, False,
+                                  **cfg).get_types() == types
 
 
 def test_get_content():
@@ -305,7 +308,8 @@ def test_get_content():
         'section_marker': '[]',
         'assignment_char': '=',
         }
-    assert fn.Configuration(rawlines, **cfg).get_content() == content
+    assert fn.Configuration_INI(rawlines, False, False, False,
+                                  **cfg).get_content() == content
 
 
 def test_formatted():
@@ -336,12 +340,13 @@ def test_formatted():
         'section_marker': '[]',
         'assignment_char': '=',
         }
-    types = fn.Configuration(rawlines, **cfg).get_types()
-    content = fn.Configuration(rawlines, **cfg).get_content()
-    assert fn.formatted(types, content, **cfg) == formatted
+    types, content = fn.Configuration_INI(rawlines, False, False, False,
+                                          **cfg).parse()
+    assert fn.formatted(types, content, False, False, False,
+                        **cfg) == formatted
 
 
-def test_is_json_str():
+def test_is_json_str(tmp_path):
     is_json_str_true = [
         '{}',
         '{"key1": "value1"}',
@@ -360,10 +365,15 @@ def test_is_json_str():
         '# Comment1',
         '',
         ]
+    path = tmp_path / 'config.txt'
+
+    def is_json_str(string):
+        path.write_text(string)
+        return fn.Config_file(str(path), verbose=False).is_json()
     for string in is_json_str_true:
-        assert fn.is_json_str(string) is True
+        assert is_json_str(string) is True
     for string in is_json_str_false:
-        assert fn.is_json_str(string) is False
+        assert is_json_str(string) is False
 
 
 def test_is_ini_str():
@@ -400,7 +410,119 @@ def test_is_ini_str():
         'section_marker': '[]',
         'assignment_char': '=',
         }
+    # Each line is valid INI if its type is known
     for string in is_ini_str_true:
-        assert fn.is_ini_str(string, **cfg) is True
+        assert fn.Line_INI(string, **cfg).is_unknown() is False
     for string in is_ini_str_false:
-        assert fn.is_ini_str(string, **cfg) is False
+        assert fn.Line_INI(string, **cfg).is_unknown() is True
+
+
+def test_to_dict_duplicates():
+    rawlines = ['[a]', 'x = 1', 'x = 2', '[b]', 'y = 1', '[a]', 'x = 3']
+
+    def to_dict(duplicates, report=None):
+        cfg_ini = fn.Configuration_INI(rawlines, False, False, False, '#',
+                                       '[]', '=')
+        return cfg_ini.to_dict(duplicates, report)
+    report = []
+    assert to_dict('last', report) == {'a': {'x': '3'}, 'b': {'y': '1'}}
+    assert [(d.section, d.key, d.line, d.first_line) for d in report] == [
+        ('a', 'x', 3, 2), ('a', None, 6, 1), ('a', 'x', 7, 2)]
+    assert to_dict('first')['a'] == {'x': '1'}
+    assert to_dict('list')['a'] == {'x': ['1', '2', '3']}
+    with pytest.raises(fn.Duplicate_error, match='line 3'):
+        to_dict('error')
+
+
+def test_quoted_and_escaped_values():
+    pairs = {
+        'url = http://host/?a=1&b=2': ('url', 'http://host/?a=1&b=2'),
+        r'key\=1 = v': ('key=1', 'v'),
+        r'q = "a \"b\" = c"  # note': ('q', 'a "b" = c'),
+        "q = 'open": ('q', "'open"),
+        r'a\\=b': ('a\\', 'b'),
+        r'a\\\=b = c': ('a\\=b', 'c'),
+        r'C:\dir = x': ('C:\\dir', 'x'),
+        r'q = "a" b': ('q', '"a" b'),
+        'q = "a" b \\': ('q', '"a" b'),
+        }
+    for rawline, pair in pairs.items():
+        line = fn.Line_INI(rawline, '#', '[]', '=')
+        assert line.key_value_pair() == pair
+    assert fn.unquote(fn.quoted(' "x" ')) == ' "x" '
+    assert fn.unquote('"a" # note') == 'a'
+    assert fn.unquote('"a"b') == '"a"b'
+    for key in ('a\\', 'a\\=b', 'C:\\dir', 'x=\\\\='):
+        line = fn.Line_INI(fn.escaped_key(key, '=') + ' = v', '#', '[]', '=')
+        assert line.key_value_pair() == (key, 'v')
+    # Pathological line: many escaped assignment characters
+    line = fn.Line_INI('k\\=' * 100000 + ' = v', '#', '[]', '=')
+    assert line.key_value_pair() == ('k=' * 100000, 'v')
+
+
+def test_continuation_lines():
+    rawlines = ['[s]', 'cmd = run \\', '--flag=1 \\', '    --other', '',
+                '    x = 1', '  y = 2', '      more', '# end']
+    cfg_ini = fn.Configuration_INI(rawlines, False, False, False, '#', '[]',
+                                   '=')
+    types, content = cfg_ini.parse()
+    # Parsed once for all columns and statistics
+    assert cfg_ini.get_types() is types and cfg_ini.get_content() is content
+    assert types == ['section_head', 'key_value_pair', 'continuation',
+                     'continuation', 'empty', 'key_value_pair',
+                     'key_value_pair', 'continuation', 'comment']
+    assert cfg_ini.to_dict() == {'s': {'cmd': 'run\n--flag=1\n--other',
+                                       'x': '1', 'y': '2\nmore'}}
+    ini = fn.formatted(types, content, False, False, False, '#', '[]', '=')
+    assert ini[1:4] == ['cmd = run \\', '    --flag=1 \\', '    --other']
+
+
+def test_nested_json():
+    dictionary = {'top': 1, 'a': {'x': 1, 'b': {'c': {'d': True}},
+                                  'z': 's', 'e': {}}}
+    records = list(fn.iter_flatten(dictionary))
+    assert [(t, c) for t, c, name in records] == [
+        ('section_head', ''), ('key_value_pair', ('top', 1)),
+        ('section_head', 'a'), ('key_value_pair', ('x', 1)),
+        ('section_head', 'a.b.c'), ('key_value_pair', ('d', True)),
+        ('section_head', 'a'), ('key_value_pair', ('z', 's')),
+        ('section_head', 'a.e')]
+    flat = fn.records_to_dict((1, t, c) for t, c, name in records)
+    assert flat['a.b.c'] == {'d': True}
+    assert fn.unflatten(flat) == dictionary
+    # Deeper than the recursion limit
+    deep = node = {}
+    for i in range(5000):
+        node['k'] = {}
+        node = node['k']
+    node['v'] = 1
+    (head, section, name), pair = fn.iter_flatten(deep)
+    assert section == '.'.join(['k'] * 5000)
+    node = fn.unflatten({section: {'v': 1}})
+    for i in range(5000):
+        node = node['k']
+    assert node == {'v': 1}
+
+
+def test_json_lines():
+    text = ('{\n'
+            '  "top": "b",\n'
+            '  "a": {\n'
+            '    "b": {"c": {"x": "top"}},\n'
+            '    "\\u00e4": [{"y": 1}, "z"],\n'
+            '    "e": {}\n'
+            '  },\n'
+            '  "s": "one\\ntwo", "b": 2\n'
+            '}\n')
+    cfg_json = fn.Configuration_JSON(json.loads(text))
+    records = list(fn.iter_flatten(cfg_json.dictionary))
+    lines = cfg_json.get_lines(text)
+    assert len(lines) == len(records)
+    assert [(t, c, line) for (t, c, name), line in zip(records, lines)] == [
+        ('section_head', '', None), ('key_value_pair', ('top', 'b'), 2),
+        ('section_head', 'a.b.c', 4), ('key_value_pair', ('x', 'top'), 4),
+        ('section_head', 'a', 3),
+        ('key_value_pair', ('\u00e4', [{'y': 1}, 'z']), 5),
+        ('section_head', 'a.e', 6),
+        ('section_head', '', None), ('key_value_pair', ('s', 'one\ntwo'), 8),
+        ('continuation', 'two', None), ('key_value_pair', ('b', 2), 8)]
@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Test functions for include.py"""
+
+import pytest
+import conpar.cache as ch
+import conpar.include as inc
+
+
+def write_tree(tmp_path):
+    (tmp_path / 'sub').mkdir()
+    (tmp_path / 'common.ini').write_text('[log]\nlevel = info\n')
+    (tmp_path / 'sub' / 'base.ini').write_text(
+        'include = ../common.ini\n[db]\nhost = db1\nport = 5432\n')
+    (tmp_path / 'local.ini').write_text(
+        'include = common.ini\n[log]\nlevel = debug\n')
+    (tmp_path / 'app.ini').write_text(
+        'include = sub/base.ini\ninclude = local.ini\n[db]\nport = 5433\n')
+
+
+def test_load_with_includes(tmp_path):
+    write_tree(tmp_path)
+    cache = ch.Parse_cache()
+    merged = inc.load_with_includes(str(tmp_path / 'app.ini'), cache=cache)
+    assert merged.to_dict() == {'log': {'level': 'debug'},
+                                'db': {'host': 'db1', 'port': '5433'}}
+    assert merged.provenance('db', 'host')[1] == 3
+    assert merged.provenance('db', 'host')[0].endswith('base.ini')
+    # common.ini is included twice but parsed and layered once
+    assert len(merged.layers) == 4
+    assert len(cache.entries) == 4
+    other = inc.resolve_layers(str(tmp_path / 'local.ini'), cache=cache)
+    assert other[0] is merged.layers[0]
+
+
+def test_include_errors(tmp_path):
+    (tmp_path / 'a.ini').write_text('include = b.ini\n[a]\nx = 1\n')
+    (tmp_path / 'b.ini').write_text('include = a.ini\n[b]\ny = 2\n')
+    (tmp_path / 'c.ini').write_text('\ninclude = missing.ini\n')
+    with pytest.raises(inc.Include_error, match='cycle'):
+        inc.resolve_layers(str(tmp_path / 'a.ini'), cache=ch.Parse_cache())
+    with pytest.raises(inc.Include_error, match='line 2'):
+        inc.resolve_layers(str(tmp_path / 'c.ini'), cache=ch.Parse_cache())
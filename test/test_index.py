@@ -0,0 +1,29 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Test functions for index.py"""
+
+import os
+import conpar.index as index
+
+
+def test_index_update_and_query(tmp_path):
+    (tmp_path / 'a').mkdir()
+    (tmp_path / 'a' / 'one.ini').write_text('[db]\nmax_connections = 800\n')
+    (tmp_path / 'two.ini').write_text('[db]\nmax_connections = 100\n'
+                                      '[web]\nmax_connections = 900\n')
+    (tmp_path / 'three.json').write_text('{"db": {"max_connections": 501}}')
+    with index.Config_index(str(tmp_path)) as idx:
+        assert idx.update() == (3, 0)
+        assert idx.update() == (0, 0)
+        rows = idx.query('max_connections', section='db', greater=500)
+        assert rows == [('a/one.ini', 2, 'db', 'max_connections', '800'),
+                        ('three.json', 1, 'db', 'max_connections', '501')]
+        # Changed and removed files are re-indexed incrementally
+        (tmp_path / 'two.ini').write_text('[db]\nmax_connections = 1000\n')
+        os.remove(tmp_path / 'three.json')
+        assert idx.update() == (1, 1)
+        rows = idx.query('max_connections', section='db', greater=500)
+        assert [row[0] for row in rows] == ['a/one.ini', 'two.ini']
+        assert idx.query('max_connections', match='^9') == []
+        # Rollback journal: no WAL files next to the index
+        assert not os.path.exists(idx.index_file + '-wal')
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Test functions for interpolate.py"""
+
+import pytest
+import conpar.functions as fn
+import conpar.interpolate as ip
+
+
+def load(tmp_path, text):
+    path = tmp_path / 'config.ini'
+    path.write_text(text)
+    return fn.load_configuration(str(path))
+
+
+def test_interpolator(tmp_path):
+    cfg = load(tmp_path, '[paths]\nroot = /srv\ndata = ${root}/data\n'
+               'logs = ${paths:data}/logs\nhome = ${HOME}\ncost = $$5\n'
+               '[app]\nurl = file://${paths:logs}\n')
+    interpolator = ip.Interpolator(cfg, environ={'HOME': '/home/u'})
+    assert interpolator.get('app', 'url') == 'file:///srv/data/logs'
+    # Only the keys that were read (and their references) are resolved
+    assert set(interpolator.resolved) == {('app', 'url'),
+                                          ('paths', 'logs'),
+                                          ('paths', 'data'),
+                                          ('paths', 'root')}
+    assert interpolator.to_dict()['paths'] == {
+        'root': '/srv', 'data': '/srv/data', 'logs': '/srv/data/logs',
+        'home': '/home/u', 'cost': '$5'}
+
+
+def test_interpolator_errors(tmp_path):
+    cfg = load(tmp_path, '[a]\nx = ${y}\ny = ${a:z}\nz = ${a:x}\n'
+               'u = ${b:x}\nv = ${UNDEFINED}\n')
+    interpolator = ip.Interpolator(cfg, environ={})
+    with pytest.raises(ip.Interpolation_error, match='cycle'):
+        interpolator.get('a', 'x')
+    with pytest.raises(ip.Interpolation_error, match='line 5'):
+        interpolator.get('a', 'u')
+    with pytest.raises(ip.Interpolation_error, match='UNDEFINED'):
+        interpolator.get('a', 'v')
+
+
+def test_interpolator_long_chain(tmp_path):
+    # Deeper than the recursion limit
+    lines = ['[chain]', 'k0 = x']
+    lines += ['k{} = ${{k{}}}'.format(i, i - 1) for i in range(1, 5000)]
+    cfg = load(tmp_path, '\n'.join(lines) + '\n')
+    assert ip.Interpolator(cfg).get('chain', 'k4999') == 'x'
+
+
+def test_interpolator_json_values(tmp_path):
+    path = tmp_path / 'config.json'
+    path.write_text('{"a": {"port": 5432, "tls": true, '
+                    '"url": "h:${port}/${tls}"}}')
+    interpolator = ip.Interpolator(fn.load_configuration(str(path)))
+    assert interpolator.get('a', 'url') == 'h:5432/true'
+    # Values without references keep their JSON type
+    assert interpolator.get('a', 'port') == 5432
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Test functions for lineindex.py"""
+
+import pytest
+import conpar.lineindex as li
+
+
+def test_parse_range():
+    assert li.parse_range('1000:2000') == (1000, 2000)
+    assert li.parse_range(':20') == (1, 20)
+    assert li.parse_range('5:') == (5, None)
+    assert li.parse_range('7') == (7, 7)
+    with pytest.raises(ValueError):
+        li.parse_range('5:4')
+    with pytest.raises(ValueError, match='Invalid line range'):
+        li.parse_range('abc')
+
+
+def test_line_index(tmp_path, monkeypatch):
+    # Small blocks exercise lines spanning block boundaries
+    monkeypatch.setattr(li, 'BLOCK_SIZE', 7)
+    path = tmp_path / 'config.ini'
+    path.write_text('# comment\n[db]\nhost = localhost\n\n  [ web ]  \n'
+                    'x = 1')
+    index = li.Line_index.build(str(path))
+    assert index.num_lines() == 6
+    assert index.sections == [('db', 2), ('web', 5)]
+    assert index.section_range('db') == (2, 4)
+    assert index.read_lines(*index.section_range('web')) == ['  [ web ]',
+                                                             'x = 1']
+    assert index.read_lines(3, 3) == ['host = localhost']
+    assert index.read_lines(6, None) == ['x = 1']
+    with pytest.raises(KeyError):
+        index.section_range('missing')
+
+
+def test_empty_file(tmp_path):
+    path = tmp_path / 'empty.ini'
+    path.write_text('')
+    index = li.Line_index.build(str(path))
+    assert index.num_lines() == 0
+    assert index.read_lines(1) == []
+
+
+def test_sidecar(tmp_path):
+    path = tmp_path / 'config.ini'
+    path.write_text('[db]\nhost = localhost\n[web]\nx = 1\n')
+    index = li.Line_index.open(str(path))
+    assert (tmp_path / ('config.ini' + li.SIDECAR_SUFFIX)).exists()
+    loaded = li.Line_index.load(str(path))
+    assert loaded.offsets.tolist() == index.offsets.tolist()
+    assert loaded.sections == [('db', 1), ('web', 3)]
+    # Other section marker or changed file invalidates the sidecar
+    assert li.Line_index.load(str(path), '<>') is None
+    path.write_text('[db]\nhost = localhost\n')
+    assert li.Line_index.load(str(path)) is None
+    assert li.Line_index.open(str(path)).sections == [('db', 1)]
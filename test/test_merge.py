@@ -0,0 +1,36 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Test functions for merge.py"""
+
+import conpar.functions as fn
+import conpar.merge as merge
+
+
+def load(tmp_path, name, text):
+    path = tmp_path / name
+    path.write_text(text)
+    return fn.load_configuration(str(path))
+
+
+def test_merge_provenance(tmp_path):
+    base = load(tmp_path, 'base.ini', '[db]\nhost = db0\nport = 5432\n')
+    env = load(tmp_path, 'env.ini', '# env\n[db]\nhost = db1\n[web]\nx = 1\n')
+    merged = merge.merge_configurations(base, env)
+    assert merged.to_dict() == {'db': {'host': 'db1', 'port': '5432'},
+                                'web': {'x': '1'}}
+    assert merged.provenance('db', 'host') == (str(tmp_path / 'env.ini'), 3)
+    assert merged.provenance('db', 'port') == (str(tmp_path / 'base.ini'), 3)
+    assert merged.provenance('db', 'missing') is None
+
+
+def test_copy_on_write(tmp_path):
+    base = load(tmp_path, 'base.ini', '[db]\nhost = db0\n')
+    host1 = merge.merge_configurations(base)
+    host2 = merge.merge_configurations(base)
+    host1.set('db', 'host', 'db9')
+    assert host1.get('db', 'host') == 'db9'
+    assert host1.provenance('db', 'host') == ('<local>', None)
+    assert host2.get('db', 'host') == 'db0'
+    assert base.sections()['db'].entries['host'] == ('db0', 2)
+    # Shared base layer is not copied
+    assert host2._chain('db').maps[1] is base.sections()['db'].entries
@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Randomized round-trip and scaling tests for the parser"""
+
+import json
+import random
+import string
+import time
+import conpar.functions as fn
+
+
+SETTINGS = {
+    'comment_char': '#',
+    'section_marker': '[]',
+    'assignment_char': '=',
+    }
+
+# Characters of random names and values (no line breaks, no backslashes)
+NAME_CHARS = string.ascii_letters + string.digits + '_-.= '
+# Keys may also contain (escaped) backslashes
+KEY_CHARS = NAME_CHARS + '\\'
+VALUE_CHARS = string.ascii_letters + string.digits + ' =#[]"\'.:/,;{}'
+
+
+def random_text(rng, chars, minimum=1, maximum=12):
+    """Return random string."""
+    return ''.join(rng.choice(chars)
+                   for i in range(rng.randint(minimum, maximum)))
+
+
+def random_name(rng, chars=NAME_CHARS):
+    """Return random name without outer spaces or leading markers."""
+    return rng.choice(string.ascii_letters) + random_text(
+        rng, chars, 0, 10).strip()
+
+
+def random_ini(rng, sections):
+    """Return tuple (raw INI lines, expected dictionary)."""
+    rawlines = []
+    expected = {}
+    for i in range(sections):
+        name = '{}{}'.format(random_name(rng), i)
+        expected[name] = {}
+        rawlines.append(rng.choice(['', ' ', '  ']) + '[' +
+                        rng.choice(['', ' ']) + name + ']')
+        for j in range(rng.randint(0, 8)):
+            key = '{}{}'.format(random_name(rng, KEY_CHARS), j)
+            value = random_text(rng, VALUE_CHARS, 0)
+            if value != value.strip() or value[:1] in fn.QUOTES:
+                value = fn.quoted(value)
+            rawlines.append('{}{}= {}'.format(
+                fn.escaped_key(key, '='), rng.choice(['', ' ', '   ']),
+                value))
+            expected[name][key] = fn.unquote(value.strip())
+            if value[:1] not in fn.QUOTES and rng.random() < 0.1:
+                # Unquoted value continued on the next line
+                more = random_name(rng)
+                rawlines[-1] += ' \\'
+                rawlines.append('    ' + more)
+                expected[name][key] += '\n' + more
+            if rng.random() < 0.2:
+                rawlines.append(rng.choice(['', '# ' + random_text(
+                    rng, VALUE_CHARS)]))
+    return rawlines, expected
+
+
+def random_json(rng, size):
+    """Return random nested dictionary with about size values."""
+    root = {}
+    # Objects new values and objects can be added to
+    objects = [root]
+    for i in range(size):
+        parent = rng.choice(objects)
+        name = '{}{}'.format(random_name(rng).replace('.', '_'), i)
+        if rng.random() < 0.2:
+            parent[name] = {}
+            objects.append(parent[name])
+        else:
+            parent[name] = rng.choice([
+                random_text(rng, VALUE_CHARS, 0), rng.randint(-1000, 1000),
+                rng.random(), True, None, [1, 'a'],
+                '\n'.join(random_name(rng) for j in range(3))])
+    return root
+
+
+def parse(rawlines):
+    """Return tuple (types, content) of INI lines."""
+    return fn.Configuration_INI(rawlines, False, False, False,
+                                **SETTINGS).parse()
+
+
+def reformat(types, content):
+    """Return raw lines of formatted INI representation."""
+    ini = fn.formatted(types, content, False, False, False, **SETTINGS)
+    # One line per record
+    assert len(ini) == len(types)
+    assert not any('\n' in line for line in ini)
+    return ini
+
+
+def test_ini_round_trip():
+    rng = random.Random(46)
+    for i in range(200):
+        rawlines, expected = random_ini(rng, rng.randint(0, 6))
+        types, content = parse(rawlines)
+        cfg_ini = fn.Configuration_INI(rawlines, False, False, False,
+                                       **SETTINGS)
+        assert cfg_ini.to_dict() == expected
+        # parse -> format -> parse is stable
+        assert parse(reformat(types, content)) == (types, content)
+
+
+def test_json_round_trip():
+    rng = random.Random(46)
+    for i in range(200):
+        dictionary = random_json(rng, rng.randint(0, 40))
+        cfg_json = fn.Configuration_JSON(dictionary)
+        types = cfg_json.get_types()
+        content = cfg_json.get_content()
+        flat = fn.records_to_dict(zip(range(1, len(types) + 1), types,
+                                      content))
+        assert fn.unflatten(flat) == dictionary
+        # JSON -> INI -> dictionary keeps all values (as strings)
+        ini_dict = fn.Configuration_INI(reformat(types, content), False,
+                                        False, False, **SETTINGS).to_dict()
+        assert ini_dict == {section: {key: fn.value_str(value)
+                                      for key, value in values.items()}
+                            for section, values in flat.items()}
+        text = json.dumps(dictionary, indent=4)
+        lines = cfg_json.get_lines(text)
+        assert len(lines) == len(types)
+        # Every key is found on its own line of the indented text
+        rawlines = text.split('\n')
+        for line_type, item, line in zip(types, content, lines):
+            if line_type == 'key_value_pair':
+                assert rawlines[line - 1].lstrip().startswith(
+                    json.dumps(item[0]) + ':')
+
+
+def best_time(function, repeat=3):
+    """Return shortest run time of function in seconds."""
+    times = []
+    for i in range(repeat):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def growth(make_input, function, small=2000, factor=8):
+    """Return ratio of run times for inputs of size small*factor and small.
+
+    Linear run time gives about factor, quadratic about factor**2.
+    """
+    small_input = make_input(small)
+    large_input = make_input(small * factor)
+    return (best_time(lambda: function(large_input)) /
+            best_time(lambda: function(small_input)))
+
+
+def assert_linear(make_input, function, small=2000, factor=8, attempts=3):
+    """Check that run time grows about linearly with input size.
+
+    The bound lies halfway (geometrically) between linear and quadratic
+    growth; timing noise on busy machines is absorbed by measuring again
+    before failing.
+    """
+    bound = factor ** 1.5
+    ratios = []
+    for i in range(attempts):
+        ratios.append(growth(make_input, function, small, factor))
+        if ratios[-1] < bound:
+            return
+    assert min(ratios) < bound
+def test_ini_scaling():
+    def make_input(sections):
+        return random_ini(random.Random(sections), sections)[0]
+
+    def cfg_ini(rawlines):
+        return fn.Configuration_INI(rawlines, False, False, False,
+                                    **SETTINGS)
+    for function in (lambda r: cfg_ini(r).get_types(),
+                     lambda r: cfg_ini(r).get_content(),
+                     lambda r: cfg_ini(r).to_dict()):
+        assert_linear(make_input, function, 200)
+
+
+def test_json_scaling():
+    def make_input(size):
+        return random_json(random.Random(size), size)
+
+    for function in (lambda d: fn.Configuration_JSON(d).get_types(),
+                     lambda d: fn.unflatten(fn.records_to_dict(
+                         (1, t, c) for t, c, n in fn.iter_flatten(d)))):
+        assert_linear(make_input, function)
+    # Deep nesting: section names must not be rebuilt per level
+    def make_deep(depth):
+        deep = node = {}
+        for i in range(depth):
+            node['k'] = {}
+            node = node['k']
+        node['v'] = 1
+        return deep
+    assert_linear(make_deep, lambda d: list(fn.iter_flatten(d)))
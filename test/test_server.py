@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Test functions for server.py"""
+
+import os
+import signal
+import socket
+import subprocess
+import sys
+import pytest
+import conpar.client as cl
+import conpar.defaults as dflt
+import conpar.server as sv
+
+
+def test_socket_path(monkeypatch):
+    monkeypatch.delenv('CONPAR_SOCKET', raising=False)
+    monkeypatch.setenv('XDG_RUNTIME_DIR', '/run/user/1000')
+    assert dflt.socket_path() == '/run/user/1000/conpar.sock'
+    monkeypatch.delenv('XDG_RUNTIME_DIR')
+    assert dflt.socket_path() == os.path.join(dflt.socket_directory(),
+                                              'conpar.sock')
+
+
+def test_private_directory(tmp_path):
+    directory = tmp_path / 'sockets'
+    cl.private_directory(str(directory), True)
+    assert directory.stat().st_mode & 0o777 == 0o700
+    directory.chmod(0o755)
+    with pytest.raises(PermissionError):
+        cl.private_directory(str(directory))
+
+
+def test_remove_stale_socket(tmp_path):
+    path = str(tmp_path / 'conpar.sock')
+    listening = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    listening.bind(path)
+    listening.listen()
+    # Live server: socket is kept
+    with pytest.raises(OSError, match='already running'):
+        sv.remove_stale_socket(path)
+    listening.close()
+    assert os.path.exists(path)
+    sv.remove_stale_socket(path)
+    assert not os.path.exists(path)
+    # Other files are never removed
+    (tmp_path / 'conpar.sock').write_text('data')
+    with pytest.raises(OSError, match='Not a socket'):
+        sv.remove_stale_socket(path)
+
+
+def test_serve_sigterm(tmp_path):
+    path = tmp_path / 'conpar.sock'
+    script = os.path.join(os.path.dirname(__file__), os.pardir, 'src',
+                          'conpar', 'conpar.py')
+    process = subprocess.Popen([sys.executable, '-u', script, 'serve',
+                                '--socket', str(path)],
+                               stdout=subprocess.PIPE)
+    try:
+        # Socket accepts connections once the server says so
+        assert b'Listening' in process.stdout.readline()
+        response = cl.send_request({'command': 'cli', 'argv': [
+            'read', str(tmp_path / 'missing.ini'), '-l', '1:2'],
+            'cwd': str(tmp_path)}, str(path))
+        assert response['status'] == 1
+        assert response['error'].startswith('[error]')
+    finally:
+        process.send_signal(signal.SIGTERM)
+        process.wait(10)
+    # Socket file is removed on SIGTERM as on Ctrl-C
+    assert b'Stopped' in process.stdout.read()
+    process.stdout.close()
+    assert not path.exists()
+
+
+def test_client_error(tmp_path, monkeypatch, capsys):
+    monkeypatch.setattr(cl, 'send_request', lambda request: {
+        'status': 1, 'error': 'Key not found'})
+    monkeypatch.setattr(sys, 'argv', ['client.py', 'get', 'a.ini', 's', 'k'])
+    with pytest.raises(SystemExit):
+        cl.main()
+    assert capsys.readouterr().err == 'Key not found\n'
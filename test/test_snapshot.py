@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Test functions for snapshot.py"""
+
+import os
+import threading
+import time
+import pytest
+import conpar.snapshot as snapshot
+
+
+def write(path, number, mtime):
+    # Replace file atomically, as deployment tools do
+    new_path = path.with_suffix('.new')
+    new_path.write_text('[a]\nx = {0}\n[b]\ny = {0}\n'.format(number))
+    # Distinct modification times even on coarse file systems
+    os.utime(new_path, ns=(mtime, mtime))
+    os.replace(new_path, path)
+
+
+def test_snapshot_read_only(tmp_path):
+    path = tmp_path / 'config.json'
+    path.write_text('{"db": {"port": 5432, "hosts": ["a", "b"], '
+                    '"tls": {"on": true}}}')
+    snap = snapshot.load_snapshot(str(path))
+    assert snap.get('db', 'port') == 5432
+    assert snap.get('db', 'hosts') == ('a', 'b')
+    assert snap.get('db.tls', 'on') is True
+    assert snap.get('db', 'missing', 0) == 0
+    assert snap.line('db', 'port') == 1
+    with pytest.raises(AttributeError):
+        snap.version = 2
+    with pytest.raises(TypeError):
+        snap.sections['db']['port'] = (1, None)
+    cfg_dict = snap.to_dict()
+    assert cfg_dict == {'db': {'port': 5432, 'hosts': ['a', 'b'],
+                               'tls': {'on': True}}}
+    cfg_dict['db']['port'] = 1
+    assert snap.to_dict()['db']['port'] == 5432
+
+
+def test_reload_swap(tmp_path):
+    path = tmp_path / 'config.ini'
+    write(path, 0, 10 ** 9)
+    shared = snapshot.Shared_configuration(str(path))
+    first = shared.current()
+    assert shared.reload() is False
+    write(path, 1, 2 * 10 ** 9)
+    assert shared.reload() is True
+    assert shared.get('a', 'x') == '1'
+    assert shared.current().version == 1
+    # Snapshots held by readers do not change
+    assert first.get('a', 'x') == '0'
+
+
+def test_concurrent_readers(tmp_path):
+    path = tmp_path / 'config.ini'
+    write(path, 0, 10 ** 9)
+    shared = snapshot.Shared_configuration(str(path))
+    failures = []
+    done = threading.Event()
+
+    def read():
+        while not done.is_set():
+            snap = shared.current()
+            # Both values come from the same parse
+            if snap.get('a', 'x') != snap.get('b', 'y'):
+                failures.append(snap.version)
+
+    readers = [threading.Thread(target=read) for i in range(4)]
+    for reader in readers:
+        reader.start()
+    shared.start(0.001)
+    try:
+        for number in range(1, 30):
+            write(path, number, (number + 1) * 10 ** 9)
+            time.sleep(0.005)
+        deadline = time.time() + 5
+        while shared.get('a', 'x') != '29' and time.time() < deadline:
+            time.sleep(0.01)
+    finally:
+        done.set()
+        shared.stop()
+        for reader in readers:
+            reader.join()
+    assert failures == []
+    assert shared.get('a', 'x') == '29'
+    # Failed reloads keep the last good snapshot
+    path.unlink()
+    with pytest.raises(OSError):
+        shared.reload()
+    assert shared.get('b', 'y') == '29'
+
+
+def test_poll_error(tmp_path, monkeypatch):
+    path = tmp_path / 'config.ini'
+    write(path, 0, 10 ** 9)
+    shared = snapshot.Shared_configuration(str(path))
+    load_snapshot = snapshot.load_snapshot
+    broken = threading.Event()
+    broken.set()
+
+    def failing(*args, **kwargs):
+        if broken.is_set():
+            raise RuntimeError('parser bug')
+        return load_snapshot(*args, **kwargs)
+
+    def wait_for(condition):
+        deadline = time.time() + 5
+        while not condition() and time.time() < deadline:
+            time.sleep(0.01)
+
+    monkeypatch.setattr(snapshot, 'load_snapshot', failing)
+    write(path, 1, 2 * 10 ** 9)
+    with shared:
+        shared.start(0.001)
+        wait_for(lambda: shared.error is not None)
+        assert isinstance(shared.error, RuntimeError)
+        assert shared.get('a', 'x') == '0'
+        # The thread keeps polling after the error
+        broken.clear()
+        wait_for(lambda: shared.get('a', 'x') == '1')
+        assert shared._thread.is_alive()
+    assert shared.get('a', 'x') == '1'
+    assert shared.error is None
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Test functions for spill.py"""
+
+import pytest
+import conpar.functions as fn
+import conpar.spill as spill
+
+
+def test_parse_size():
+    assert spill.parse_size('65536') == 65536
+    assert spill.parse_size('4k') == 4096
+    assert spill.parse_size('1.5M') == 1536 * 1024
+    assert spill.parse_size('2GB') == 2 * 1024 ** 3
+    with pytest.raises(ValueError):
+        spill.parse_size('lots')
+
+
+def test_record_buffer():
+    records = [(i, 'key_value_pair', ('k{}'.format(i), 'v' * (i % 7)))
+               for i in range(1000)]
+    with spill.buffered(records, 2000) as buffer:
+        # Most records were spilled to disk in several chunks
+        assert len(buffer.offsets) > 10
+        assert len(buffer.memory) < 100
+        assert len(buffer) == 1000
+        assert list(buffer) == records
+        assert buffer[0] == records[0]
+        assert buffer[-1] == records[-1]
+        assert buffer[500:503] == records[500:503]
+        assert [buffer[i] for i in range(1000)] == records
+        content = buffer.column(2)
+        assert len(content) == 1000
+        assert content[999] == records[999][2]
+        assert list(content) == [record[2] for record in records]
+        with pytest.raises(IndexError):
+            buffer[1000]
+    assert spill.buffered(records).offsets == []
+
+
+def test_load_configuration_budget(tmp_path):
+    path = tmp_path / 'config.ini'
+    with open(path, 'w') as f:
+        for i in range(300):
+            f.write('[s{}]\n# section {}\nkey = value {} \\\n  more\n'
+                    'x = "{}"\n\n'.format(i, i, i, i))
+    cfg = fn.load_configuration(str(path))
+    budget_cfg = fn.load_configuration(str(path), max_memory=20000)
+    # Spilled column of the module used by functions.py
+    assert isinstance(budget_cfg.types, fn.spill.Record_column)
+    assert budget_cfg.types.buffer.offsets != []
+    assert list(budget_cfg.types) == cfg.types
+    assert list(budget_cfg.ini) == cfg.ini
+    assert list(budget_cfg.rawlines) == cfg.rawlines
+    assert budget_cfg.to_dict() == cfg.to_dict()
+    assert (budget_cfg.statistics(budget_cfg.rawlines).summary() ==
+            cfg.statistics(cfg.rawlines).summary())
+    with pytest.raises(ValueError):
+        budget_cfg.to_dataframe()
+
+
+def test_budget_encoding(tmp_path):
+    # Legacy encoding detected after the first 64 KiB, as without budget
+    path = tmp_path / 'legacy.ini'
+    path.write_bytes(b'[s]\n' + b'k = v\n' * 20000 +
+                     'name = café\n'.encode('latin-1'))
+    cfg = fn.load_configuration(str(path), max_memory=1 << 20)
+    assert cfg.to_dict()['s']['name'] == 'café'
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Test functions for stats.py"""
+
+import conpar.stats as st
+
+
+types = [
+    'comment',
+    'section_head',
+    'key_value_pair',
+    'key_value_pair',
+    'empty',
+    'section_head',
+    'key_value_pair',
+    'unknown',
+    ]
+content = [
+    'comment',
+    'section1',
+    ('key1', 'value1'),
+    ('key2', 'value2'),
+    '',
+    'section2',
+    ('key1', 'value1'),
+    'garbage',
+    ]
+
+
+def test_type_codes():
+    assert st.type_codes(types).tolist() == [0, 2, 3, 3, 1, 2, 3, 4]
+
+
+def test_skip_mask():
+    codes = st.type_codes(types)
+    assert st.skip_mask(codes, True, False, True).tolist() == [
+        True, False, False, False, False, False, False, True]
+    assert not st.skip_mask(codes, False, False, False).any()
+
+
+def test_section_key_counts():
+    codes = st.type_codes(types)
+    assert st.section_key_counts(codes, content) == {'section1': 2,
+                                                     'section2': 1}
+    assert st.section_key_counts(st.type_codes([]), []) == {}
+
+
+def test_line_statistics():
+    stats = st.Line_statistics(types, content, rawlines=['x' * 12, ''])
+    assert stats.type_counts() == {
+        'comment': 1,
+        'empty': 1,
+        'section_head': 2,
+        'key_value_pair': 3,
+        'unknown': 1,
+        'continuation': 0,
+        }
+    assert stats.histogram.tolist() == [1, 1]
@@ -0,0 +1,30 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Test functions for store.py"""
+
+import os
+import conpar.store as store
+
+
+def test_store_ingest(tmp_path):
+    hosts = []
+    for i in range(3):
+        path = tmp_path / 'host{}.ini'.format(i)
+        path.write_text('[db]\nport = {}\nhost = h{}\n'.format(5430 + i, i))
+        hosts.append(str(path))
+    db_path = str(tmp_path / 'fleet.sqlite')
+    with store.Config_store(db_path) as s:
+        assert s.ingest(hosts) == (3, 0)
+        # Unchanged files are skipped, files not given are kept
+        assert s.ingest(hosts[:1]) == (0, 0)
+        assert s.paths() == sorted(hosts)
+        assert s.get(hosts[1], 'db', 'port') == '5431'
+        assert s.to_dict(hosts[2]) == {'db': {'port': '5432', 'host': 'h2'}}
+        (tmp_path / 'host0.ini').write_text('[db]\nport = 6000\n')
+        os.remove(hosts[2])
+        assert s.ingest(hosts[:2], prune=True) == (1, 1)
+        assert [row[0] for row in s.query('port', greater=5430.5)] == \
+            hosts[:2]
+        indexes = {name for name, in s.connection.execute(
+            'SELECT name FROM sqlite_master WHERE type = \'index\'')}
+        assert set(store.INDEXES) <= indexes
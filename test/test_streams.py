@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Test functions for streams.py"""
+
+import bz2
+import gzip
+import io
+import json
+import lzma
+import sys
+import pytest
+import conpar.functions as fn
+import conpar.lineindex as li
+import conpar.streams as streams
+
+
+def test_config_extension():
+    assert streams.config_extension('a/config.ini.gz') == '.ini'
+    assert streams.config_extension('config.json.xz') == '.json'
+    assert streams.config_extension('config.ini') == '.ini'
+
+
+def test_compressed_input(tmp_path):
+    text = b'[db]\nhost = localhost\n\n[web]\nx = 1\n'
+    for suffix, module in (('.gz', gzip), ('.bz2', bz2), ('.xz', lzma)):
+        # Misleading extension: compression is detected by magic bytes
+        path = tmp_path / ('config.ini' + suffix + '.bak')
+        path.write_bytes(module.compress(text))
+        config_file = fn.Config_file(str(path), verbose=False)
+        assert config_file.format == 'INI'
+        assert config_file.to_list()[1] == 'host = localhost'
+        with li.Line_index.open(str(path)) as index:
+            assert index.read_lines(*index.section_range('web')) == [
+                '[web]', 'x = 1']
+            # Decompressing stream is kept for further reads
+            stream = index._stream
+            assert index.read_lines(2, 2) == ['host = localhost']
+            assert index._stream is stream
+        assert index._stream is None
+        assert li.Line_index.load(str(path)) is not None
+
+
+def test_compressed_output(tmp_path):
+    path = tmp_path / 'config.json.gz'
+    fn.dict_to_json(str(path), {'db': {'host': 'localhost'}})
+    assert fn.load_configuration(str(path)).to_dict() == {
+        'db': {'host': 'localhost'}}
+    with gzip.open(path, 'rt') as f:
+        assert f.readline() == '{\n'
+
+
+def test_ini_to_json_stream(tmp_path):
+    rawlines = ['# comment', '[db]', 'host = localhost', 'port = 5432', '',
+                '[empty]', '[web]', 'x = 1']
+    out = io.StringIO()
+    fn.ini_to_json_stream(rawlines, out)
+    path = tmp_path / 'config.json'
+    fn.dict_to_json(str(path), fn.Configuration_INI(
+        rawlines, False, False, False, '#', '[]', '=').to_dict())
+    assert out.getvalue() == path.read_text() + '\n'
+    # Pairs before the first section head
+    rawlines = ['top = 1', '[db]', 'x = 2']
+    out = io.StringIO()
+    fn.ini_to_json_stream(rawlines, out)
+    assert json.loads(out.getvalue()) == {'': {'top': '1'},
+                                          'db': {'x': '2'}}
+    # Merging repeated sections and keys needs the whole file
+    for rawlines in (['[a]', 'x = 1', '[b]', '[a]'],
+                     ['[a]', 'x = 1', 'x = 2']):
+        with pytest.raises(fn.Duplicate_error, match='line'):
+            fn.ini_to_json_stream(rawlines, io.StringIO())
+
+
+def test_stdin(monkeypatch):
+    data = gzip.compress(b'[db]\nhost = localhost\n')
+    stdin = io.TextIOWrapper(io.BufferedReader(io.BytesIO(data)))
+    monkeypatch.setattr(sys, 'stdin', stdin)
+    config_file = fn.Config_file('-')
+    assert config_file.format == 'INI'
+    assert list(config_file.iter_lines()) == ['[db]', 'host = localhost']
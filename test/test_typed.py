@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Test functions for typed.py"""
+
+import pytest
+import conpar.functions as fn
+import conpar.typed as ty
+
+
+def test_infer_type():
+    values = {
+        '5432': 'int',
+        '-1': 'int',
+        '0.5': 'float',
+        '1e3': 'float',
+        'yes': 'bool',
+        'Off': 'bool',
+        '1h30m': 'duration',
+        '250ms': 'duration',
+        'a, b, c': 'list',
+        'localhost': 'str',
+        }
+    for value, type_name in values.items():
+        assert ty.infer_type(value) == type_name
+
+
+def test_coercers():
+    assert ty.to_duration('1h30m') == 5400.0
+    assert ty.to_duration('250ms') == 0.25
+    assert ty.to_duration('90') == 90.0
+    assert ty.to_bool('YES') is True
+    assert ty.to_list('a, b,, c') == ['a', 'b', 'c']
+    with pytest.raises(ValueError):
+        ty.to_duration('1 hour')
+
+
+def test_coerce_values():
+    assert ty.coerce_values(['1', ' 2', '-3'], 'int') == [1, 2, -3]
+    assert ty.coerce_values(['1.5', '2'], 'float') == [1.5, 2.0]
+    with pytest.raises(ValueError):
+        ty.coerce_values(['1', 'x'], 'int')
+    # Beyond 64 bits
+    assert ty.coerce_values(['123456789012345678901234', '1'], 'int') == [
+        123456789012345678901234, 1]
+
+
+def test_typed_configuration(tmp_path):
+    path = tmp_path / 'config.ini'
+    path.write_text('[db]\nport = 5432\ndebug = no\ntimeout = 1m\n'
+                    'hosts = a, b\nname = main\n')
+    typed = ty.Typed_configuration(fn.load_configuration(str(path)),
+                                   schema={'db': {'name': 'str'}})
+    assert typed.get('db', 'port') == 5432
+    assert typed.get_bool('db', 'debug') is False
+    assert typed.get_duration('db', 'timeout') == 60.0
+    assert typed.get_float('db', 'port') == 5432.0
+    assert typed.coerce_section('db') == {'port': 5432, 'debug': False,
+                                          'timeout': 60.0,
+                                          'hosts': ['a', 'b'],
+                                          'name': 'main'}
+    with pytest.raises(ValueError):
+        typed.get_int('db', 'name')
+
+
+def test_coerce_section_errors(tmp_path):
+    path = tmp_path / 'config.ini'
+    path.write_text('[s]\nid = 123456789012345678901234\nport = 80\n')
+    typed = ty.Typed_configuration(fn.load_configuration(str(path)),
+                                   schema={'s': {'port': 'int'}})
+    assert typed.to_dict() == {'s': {'id': 123456789012345678901234,
+                                     'port': 80}}
+    path.write_text('[s]\nport = 80\nname = x\n')
+    typed = ty.Typed_configuration(fn.load_configuration(str(path)))
+    with pytest.raises(ValueError, match=r'\[s\] name \(line 3\)'):
+        typed.coerce_section('s', 'int')
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Test functions for validate.py"""
+
+import pytest
+import conpar.validate as validate
+
+
+schema = {
+    'allow_unknown_sections': False,
+    'sections': {
+        'db': {
+            'required': True,
+            'allow_unknown_keys': False,
+            'keys': {
+                'port': {'required': True, 'type': 'int', 'min': 1,
+                         'max': 65535},
+                'mode': {'choices': ['primary', 'replica']},
+                'host': {'pattern': '^[a-z0-9.-]+$'},
+                'password': {'required': True},
+                },
+            },
+        'cache': {'required': True},
+        },
+    }
+
+
+def test_validate_file(tmp_path):
+    path = tmp_path / 'config.ini'
+    path.write_text('[db]\nport = 70000\nmode = standby\nhost = Local_Host\n'
+                    'extra = 1\n\n[web]\nx = 1\n')
+    validator = validate.compile_schema(schema)
+    violations = validate.validate_file(str(path), validator)
+    assert [(v.line, v.section, v.key) for v in violations] == [
+        (2, 'db', 'port'),
+        (3, 'db', 'mode'),
+        (4, 'db', 'host'),
+        (5, 'db', 'extra'),
+        (7, 'web', None),
+        (1, 'db', 'password'),
+        (None, 'cache', None),
+        ]
+    first = validate.validate_file(str(path), validator, fail_fast=True)
+    assert len(first) == 1
+    assert str(first[0]) == ('line 2: [db] port: value \'70000\' is above '
+                             'maximum 65535')
+
+
+def test_validate_type(tmp_path):
+    path = tmp_path / 'config.json'
+    path.write_text('{"db": {"port": "abc", "password": "x"},\n'
+                    ' "cache": {}}')
+    violations = validate.validate_file(str(path),
+                                        validate.compile_schema(schema))
+    assert [str(v) for v in violations] == [
+        'line 1: [db] port: expected int, got \'abc\'']
+
+
+def test_top_level_pairs(tmp_path):
+    path = tmp_path / 'config.ini'
+    path.write_text('name = 1\nport = x\n[db]\nport = 1\npassword = x\n'
+                    '[cache]\n')
+    rules = {'keys': {'port': {'type': 'int'}, 'name': {'required': True}}}
+    validator = validate.compile_schema(dict(schema, sections=dict(
+        schema['sections'], **{'': rules})))
+    violations = validate.validate_file(str(path), validator)
+    assert [str(v) for v in violations] == [
+        'line 2: [] port: expected int, got \'x\'']
+    # Section '' is unknown to a schema without it
+    violations = validate.validate_file(str(path),
+                                        validate.compile_schema(schema))
+    assert [(v.line, v.section, v.key) for v in violations] == [
+        (1, '', None)]
+
+
+def test_schema_errors():
+    for rules, message in (({'type': 'integer'}, 'Unknown type \'integer\''),
+                           ({'pattern': '('}, 'Invalid pattern')):
+        with pytest.raises(validate.Schema_error, match=message):
+            validate.compile_schema({'sections': {'db': {'keys': {
+                'port': rules}}}})